@@ -1,19 +1,163 @@
 # -*- coding: utf-8 -*-
 """
 奇门遁甲排盘系统入口文件
+
+python main.py                      显示示例排盘
+python main.py bulk [输入文件] ...  批量排盘（CSV/JSONL → JSONL），见 --help
+python main.py serve [--port 8000]  启动本地排盘 HTTP 服务，见 --help
+python main.py atlas 起 止 输出文件  生成排盘图集文件，见 --help
+python main.py prefill 结果库 起 止  预先排盘写入持久化结果库，见 --help
 """
 
 import sys
 import os
+import argparse
 
 # 添加当前目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from qimen_system import QiMenDunJia
+from qimen_system import bulk
+from qimen_system.ju_strategy import STRATEGIES, DEFAULT_STRATEGY
+
+def bulk_main(argv):
+    """批量排盘命令"""
+    parser = argparse.ArgumentParser(prog='main.py bulk', description='批量排盘，按输入顺序输出JSONL')
+    parser.add_argument('input', nargs='?', default='-',
+                        help="输入文件，CSV（year,month,day,hour,minute 或 datetime 列）或 JSONL，默认 stdin")
+    parser.add_argument('-f', '--format', choices=('csv', 'jsonl'),
+                        help="输入格式，默认按文件扩展名判断，stdin 默认为 jsonl")
+    parser.add_argument('-o', '--output', default='-', help="输出文件，默认 stdout")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="进程数，默认 CPU 核数")
+    parser.add_argument('-c', '--chunk-size', type=int, default=1000, help="每块行数，默认 1000")
+    parser.add_argument('-j', '--ju', choices=tuple(STRATEGIES), default=DEFAULT_STRATEGY,
+                        help=f"定局方法，默认 {DEFAULT_STRATEGY}（原有的简化算法）")
+    parser.add_argument('--shared-table', action='store_true',
+                        help="多进程时把全部盘面发布到共享内存，各进程共用一份只读表")
+    args = parser.parse_args(argv)
+    
+    fmt = args.format or ('csv' if args.input.lower().endswith('.csv') else 'jsonl')
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8', newline='')
+    target = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        stats = bulk.run(bulk.read_rows(source, fmt), target,
+                         workers=args.workers, chunk_size=args.chunk_size, ju_strategy=args.ju,
+                         shared_table=args.shared_table)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    print(f"共 {stats['rows']} 行，出错 {stats['errors']} 行，实际排盘 {stats['charted']} 次",
+          file=sys.stderr)
+
+def serve_main(argv):
+    """本地排盘服务命令"""
+    from qimen_system import server
+    
+    parser = argparse.ArgumentParser(prog='main.py serve', description='本地排盘 HTTP 服务')
+    parser.add_argument('--host', default=server.HOST, help=f"监听地址，默认 {server.HOST}")
+    parser.add_argument('-p', '--port', type=int, default=server.PORT, help=f"端口，默认 {server.PORT}")
+    parser.add_argument('-w', '--workers', type=int, default=1, help="排盘进程数，默认 1（单个工作线程）")
+    parser.add_argument('--max-batch', type=int, default=server.MAX_BATCH,
+                        help=f"单批最多合并的请求数，默认 {server.MAX_BATCH}")
+    parser.add_argument('--max-delay', type=float, default=server.MAX_DELAY * 1000,
+                        help=f"凑批最长等待（毫秒），默认 {server.MAX_DELAY * 1000:g}")
+    parser.add_argument('--shared-table', action='store_true',
+                        help="多进程时把全部盘面发布到共享内存，各进程共用一份只读表")
+    parser.add_argument('--store', help="持久化结果库（SQLite）文件，命中的请求不再排盘")
+    parser.add_argument('-j', '--ju', choices=tuple(STRATEGIES), default=DEFAULT_STRATEGY,
+                        help=f"定局方法，默认 {DEFAULT_STRATEGY}（原有的简化算法），须与预先排盘时一致")
+    args = parser.parse_args(argv)
+    
+    store = None
+    if args.store:
+        from qimen_system.result_store import ResultStore
+        store = ResultStore(args.store)
+    print(f"排盘服务: http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve(args.host, args.port, args.workers,
+                     max_batch=args.max_batch, max_delay=args.max_delay / 1000,
+                     shared_table=args.shared_table, store=store, ju_strategy=args.ju)
+    finally:
+        if store is not None:
+            store.close()
+
+def atlas_main(argv):
+    """生成排盘图集命令"""
+    import datetime
+    from qimen_system import atlas
+    
+    parser = argparse.ArgumentParser(prog='main.py atlas', description='生成排盘图集文件（定长记录，mmap 读取）')
+    parser.add_argument('start', help="起始时刻（含），如 2000-01-01 或 '2000-01-01 00:00'")
+    parser.add_argument('end', help="结束时刻（不含）")
+    parser.add_argument('output', help="输出文件")
+    parser.add_argument('-s', '--step', type=int, default=60, help="步长（分钟），默认 60")
+    parser.add_argument('-j', '--ju', choices=tuple(STRATEGIES), default=DEFAULT_STRATEGY,
+                        help=f"定局方法，默认 {DEFAULT_STRATEGY}（原有的简化算法），记录在图集文件头中")
+    args = parser.parse_args(argv)
+    
+    start = datetime.datetime.fromisoformat(args.start)
+    end = datetime.datetime.fromisoformat(args.end)
+    count = atlas.write_atlas(args.output, start, end, datetime.timedelta(minutes=args.step),
+                              progress=lambda n: print(f"\r已写入 {n} 条", end='', file=sys.stderr),
+                              ju_strategy=args.ju)
+    print(f"\r共写入 {count} 条记录: {args.output}", file=sys.stderr)
+
+def prefill_main(argv):
+    """预先排盘写入持久化结果库命令"""
+    import datetime
+    from qimen_system.result_store import ResultStore
+    
+    parser = argparse.ArgumentParser(prog='main.py prefill', description='预先排盘写入持久化结果库（SQLite）')
+    parser.add_argument('store', help="结果库文件")
+    parser.add_argument('start', help="起始时刻（含），如 2000-01-01 或 '2000-01-01 00:00'")
+    parser.add_argument('end', help="结束时刻（不含）")
+    parser.add_argument('-s', '--step', type=int, default=60, help="步长（分钟），默认 60")
+    parser.add_argument('-j', '--ju', choices=tuple(STRATEGIES), default=DEFAULT_STRATEGY,
+                        help=f"定局方法，默认 {DEFAULT_STRATEGY}（原有的简化算法）")
+    parser.add_argument('-l', '--location', help="出生地经度或地名，指定时按真太阳时排盘")
+    args = parser.parse_args(argv)
+    
+    start = datetime.datetime.fromisoformat(args.start)
+    end = datetime.datetime.fromisoformat(args.end)
+    step = datetime.timedelta(minutes=args.step)
+    location = args.location
+    if location is not None:
+        try:
+            location = float(location)
+        except ValueError:
+            pass
+    
+    def timestamps():
+        moment = start
+        while moment < end:
+            yield moment.year, moment.month, moment.day, moment.hour, moment.minute
+            moment += step
+    
+    with ResultStore(args.store) as store:
+        if store.invalidated:
+            print(f"算法版本已更新，清除旧结果 {store.invalidated} 条", file=sys.stderr)
+        added = store.prefill(timestamps(), ju_strategy=args.ju, location=location,
+                              progress=lambda n: print(f"\r已新增 {n} 条", end='', file=sys.stderr))
+        print(f"\r新增 {added} 条，结果库共 {len(store)} 条: {args.store}", file=sys.stderr)
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'bulk':
+        bulk_main(sys.argv[2:])
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve_main(sys.argv[2:])
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == 'atlas':
+        atlas_main(sys.argv[2:])
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == 'prefill':
+        prefill_main(sys.argv[2:])
+        sys.exit(0)
+    
     # 创建2025年8月20日17:43的奇门盘
     qimen = QiMenDunJia(2025, 8, 20, 17, 43)
     
     # 显示排盘结果
-    qimen.display()
\ No newline at end of file
+    qimen.display()
@@ -4,189 +4,391 @@
 """
 
 import datetime
-import json
+from typing import Any, Dict, List, Optional, Tuple, Union
 from .sizhu_calculator import SiZhuCalculator
 from .qimen_calculator import QiMenCalculator
 from .lunar_converter import LunarConverter
+from .chart_cache import ChartCache, default_cache
+from .board import Board, LAYERS, YIMA, GUIREN
+from .jieqi_table import JieQiTable, MOMENTS
+from .chart_stream import ChartStream, iter_charts
+from .solar_time import Location
+from .ju_strategy import JuStrategy, get_strategy
+from .frozen import FrozenDict, freeze, thaw
+from . import serialization, metrics
+from .constants import TIANGAN_NAMES, STAR_NAMES, MEN_NAMES, SHEN_NAMES, CHANGSHENG_NAMES
+
+class lazy_property:
+    """首次访问时计算并保存到实例上的属性
+    
+    多个线程同时首次访问时可能各算一次，但只保存先写入的值并都返回它，
+    同一实例上的各部分（如计算器和在其上执行过的步骤）始终一致。
+    """
+    
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+    
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance.__dict__.setdefault(self.name, self.func(instance))
+
+# 排盘各步骤及其依赖的步骤
+STAGE_DEPENDENCIES = {
+    'pai_di_pan': (),
+    'pai_tian_pan': ('pai_di_pan',),
+    'pai_men': (),
+    'pai_shen': ('pai_tian_pan',),
+    'check_special_conditions': ('pai_di_pan',),
+    'calculate_changsheng': ('pai_di_pan',),
+    'calculate_yima_and_guiren': ()
+}
+
+# 各排盘步骤直接使用的盘面输入（缓存键中的项），换时间后这些输入或所依赖的步骤有变化时需要重算
+CACHE_KEY_FIELDS = ('yinyang', 'ju', 'ri_gan', 'ri_zhi', 'shi_gan', 'shi_zhi')
+STAGE_INPUTS = {
+    'pai_di_pan': ('yinyang', 'ju'),
+    'pai_tian_pan': ('shi_gan',),
+    'pai_men': ('ju', 'shi_zhi'),
+    'pai_shen': ('yinyang',),
+    'check_special_conditions': (),
+    'calculate_changsheng': (),
+    'calculate_yima_and_guiren': ('ri_gan', 'ri_zhi')
+}
+
+# 各排盘步骤写入的层（驿马、贵人单独处理）
+STAGE_LAYERS = {
+    'pai_di_pan': 'tiangan',
+    'pai_tian_pan': 'star',
+    'pai_men': 'men',
+    'pai_shen': 'shen',
+    'check_special_conditions': 'flags',
+    'calculate_changsheng': 'changsheng'
+}
+
+def _stage_masks() -> Dict[str, int]:
+    """各步骤受缓存键中哪些项影响（含所依赖步骤的输入），第 i 位对应 CACHE_KEY_FIELDS[i]"""
+    masks = {}
+    for stage, dependencies in STAGE_DEPENDENCIES.items():
+        mask = 0
+        for name in STAGE_INPUTS[stage]:
+            mask |= 1 << CACHE_KEY_FIELDS.index(name)
+        for dependency in dependencies:
+            mask |= masks[dependency]
+        masks[stage] = mask
+    return masks
+
+_STAGE_MASKS = _stage_masks()
 
 class QiMenDunJia:
-    """奇门遁甲排盘主类"""
+    """奇门遁甲排盘主类
+    
+    默认在创建时完成全部计算；lazy=True（或使用 QiMenDunJia.lazy）时各部分
+    在首次访问时才计算：四柱、局数、地盘、天盘、八门、八神、标记、农历。
+    """
     
-    def __init__(self, year: int, month: int, day: int, hour: int, minute: int):
+    def __init__(self, year: int, month: int, day: int, hour: int, minute: int,
+                 cache: ChartCache = None, lazy: bool = False, location: Location = None,
+                 ju_strategy: Union[str, JuStrategy] = None):
         self.year = year
         self.month = month
         self.day = day
         self.hour = hour
         self.minute = minute
+        # 出生地经度或地名，指定时日柱、时柱按真太阳时计算
+        self.location = location
+        # 定局方法（名称或 JuStrategy 实例，见 ju_strategy 模块），默认为原有的简化算法
+        self.ju_strategy = get_strategy(ju_strategy)
+        self.cache = default_cache if cache is None else cache
+        self._stages = set()
+        self._cache_missed = False
+        # 所在节气的分钟区间，换时间时用于判断能否复用节气查找
+        self._term_range = None
         
-        # 计算四柱
-        self.sizhu_calculator = SiZhuCalculator(year, month, day, hour, minute)
-        self.sizhu = self.sizhu_calculator.get_sizhu()
+        if not lazy:
+            # 立即完成全部计算
+            self.result
+    
+    @classmethod
+    def lazy(cls, year: int, month: int, day: int, hour: int, minute: int,
+             cache: ChartCache = None, location: Location = None,
+             ju_strategy: Union[str, JuStrategy] = None) -> 'QiMenDunJia':
+        """创建按需计算的排盘"""
+        return cls(year, month, day, hour, minute, cache=cache, lazy=True, location=location,
+                   ju_strategy=ju_strategy)
+    
+    @classmethod
+    def from_sizhu(cls, sizhu_calculator: SiZhuCalculator, cache: ChartCache = None,
+                   lazy: bool = False, ju_strategy: Union[str, JuStrategy] = None) -> 'QiMenDunJia':
+        """由已算好的四柱计算器创建排盘（供逐时排盘复用节气和日柱）"""
+        chart = cls(sizhu_calculator.year, sizhu_calculator.month, sizhu_calculator.day,
+                    sizhu_calculator.hour, sizhu_calculator.minute, cache=cache, lazy=True,
+                    location=sizhu_calculator.location, ju_strategy=ju_strategy)
+        chart.sizhu_calculator = sizhu_calculator
+        if not lazy:
+            chart.result
+        return chart
+    
+    # ---------- 四柱与局数 ----------
+    
+    @lazy_property
+    def sizhu_calculator(self) -> SiZhuCalculator:
+        """四柱计算器"""
+        return SiZhuCalculator(self.year, self.month, self.day, self.hour, self.minute,
+                               location=self.location)
+    
+    @lazy_property
+    def sizhu(self) -> FrozenDict:
+        """四柱（只读）"""
+        return freeze(self.sizhu_calculator.get_sizhu())
+    
+    @lazy_property
+    def qimen_calculator(self) -> QiMenCalculator:
+        """奇门遁甲计算器（创建时即确定阴阳遁和局数）"""
+        return QiMenCalculator(self.sizhu_calculator, self.ju_strategy)
+    
+    @property
+    def yinyang(self) -> str:
+        """阴阳遁"""
+        return self.qimen_calculator.yinyang
+    
+    @property
+    def ju(self) -> int:
+        """局数"""
+        return self.qimen_calculator.ju
+    
+    # ---------- 盘面 ----------
+    
+    def _run_stage(self, stage: str):
+        """执行排盘步骤（先执行其依赖的步骤，每步只执行一次）"""
+        if stage in self._stages:
+            return
+        for dependency in STAGE_DEPENDENCIES[stage]:
+            self._run_stage(dependency)
+        getattr(self.qimen_calculator, stage)()
+        self._stages.add(stage)
+    
+    def _peek_board(self):
+        """已排好或缓存中已有的完整盘面，没有时返回 None"""
+        if 'board' in self.__dict__:
+            return self.board
+        if self._cache_missed:
+            return None
+        board = self.cache.get(self.qimen_calculator.cache_key())
+        if board is None:
+            self._cache_missed = True
+            return None
+        self.board = board
+        return board
+    
+    def _layer(self, name: str, stage: str) -> Tuple[int, ...]:
+        """某层的编号元组：有完整盘面时直接读取，否则只执行所需的步骤"""
+        board = self._peek_board()
+        if board is not None:
+            return tuple(board.layer(name))
+        self._run_stage(stage)
+        return self.qimen_calculator.layers[name]
+    
+    @lazy_property
+    def board(self) -> Board:
+        """完整的紧凑盘面（相同盘面直接取自缓存）"""
+        key = self.qimen_calculator.cache_key()
+        board = None if self._cache_missed else self.cache.get(key)
+        if board is None:
+            for stage in STAGE_DEPENDENCIES:
+                self._run_stage(stage)
+            board = self.qimen_calculator.get_compact_board()
+            self.cache.put(key, board)
+        return board
+    
+    @lazy_property
+    def di_pan(self) -> Tuple[Optional[str], ...]:
+        """地盘三奇六仪（按宫位下标，0 为坎一宫）"""
+        return tuple(TIANGAN_NAMES[code] for code in self._layer('tiangan', 'pai_di_pan'))
+    
+    @lazy_property
+    def tian_pan(self) -> Tuple[Optional[str], ...]:
+        """天盘九星"""
+        return tuple(STAR_NAMES[code] for code in self._layer('star', 'pai_tian_pan'))
+    
+    @lazy_property
+    def men(self) -> Tuple[Optional[str], ...]:
+        """八门"""
+        return tuple(MEN_NAMES[code] for code in self._layer('men', 'pai_men'))
+    
+    @lazy_property
+    def shen(self) -> Tuple[Optional[str], ...]:
+        """八神"""
+        return tuple(SHEN_NAMES[code] for code in self._layer('shen', 'pai_shen'))
+    
+    @lazy_property
+    def changsheng(self) -> Tuple[Optional[str], ...]:
+        """十二长生状态"""
+        return tuple(CHANGSHENG_NAMES[code] for code in self._layer('changsheng', 'calculate_changsheng'))
+    
+    @lazy_property
+    def flags(self) -> Tuple[int, ...]:
+        """各宫标记位（入墓、击刑、门迫、空亡、驿马、贵人，见 board 模块）"""
+        return self._layer('flags', 'check_special_conditions')
+    
+    @property
+    def yima(self) -> str:
+        """驿马"""
+        board = self._peek_board()
+        if board is not None:
+            return board.yima
+        self._run_stage('calculate_yima_and_guiren')
+        return self.qimen_calculator.yima
+    
+    @property
+    def guiren(self) -> List[str]:
+        """贵人"""
+        board = self._peek_board()
+        if board is not None:
+            return board.guiren
+        self._run_stage('calculate_yima_and_guiren')
+        return self.qimen_calculator.guiren
+    
+    @lazy_property
+    def result(self) -> Dict[str, Any]:
+        """排盘结果"""
+        return self.qimen_calculator.get_result(self.board)
+    
+    @lazy_property
+    def lunar_date(self) -> Optional[str]:
+        """农历日期，超出内置农历表范围（1900-2100年）时为 None，排盘本身不受影响"""
+        try:
+            return LunarConverter.get_lunar_date(self.year, self.month, self.day)
+        except ValueError:
+            return None
+    
+    # ---------- 改变时间 ----------
+    
+    def with_time(self, year: int, month: int, day: int, hour: int, minute: int) -> 'QiMenDunJia':
+        """同一地点另一时刻的排盘（按需计算），只重算受时间变化影响的部分
         
-        # 计算奇门遁甲
-        self.qimen_calculator = QiMenCalculator(self.sizhu_calculator)
-        self.qimen_calculator.pai_pan()
+        节气未变时复用节气查找，日期未变时复用日柱和农历；输入未变的排盘步骤直接沿用本盘的结果：
+        只换时辰时重排天盘、八门、八神，换日后定局改变时全部重排。
+        """
+        previous = self.sizhu_calculator
+        low, high = self._term_bounds()
+        minutes = JieQiTable.to_minutes(year, month, day, hour, minute)
+        pillar_term = (previous.solar_year, previous.term_index) if low <= minutes < high else None
+        same_date = (year, month, day) == (self.year, self.month, self.day)
+        sizhu_calculator = SiZhuCalculator(year, month, day, hour, minute, pillar_term=pillar_term,
+                                           ri_zhu=previous.codes[2] if same_date else None,
+                                           location=self.location)
+        chart = QiMenDunJia.from_sizhu(sizhu_calculator, cache=self.cache, lazy=True,
+                                       ju_strategy=self.ju_strategy)
+        if pillar_term is not None:
+            chart._term_range = (low, high)
+        if same_date and 'lunar_date' in self.__dict__:
+            chart.lunar_date = self.lunar_date
+        if 'qimen_calculator' in self.__dict__:
+            chart._reuse_stages(self)
+        return chart
+    
+    def advance_to(self, moment: datetime.datetime) -> 'QiMenDunJia':
+        """另一时刻（datetime）的排盘，见 with_time"""
+        return self.with_time(moment.year, moment.month, moment.day, moment.hour, moment.minute)
+    
+    def _term_bounds(self) -> Tuple[int, int]:
+        """本盘所在节气的分钟区间 [起, 止)，超出节气时刻表范围时为 (0, 0)"""
+        if self._term_range is None:
+            position = JieQiTable.locate(JieQiTable.to_minutes(self.year, self.month, self.day,
+                                                               self.hour, self.minute))
+            self._term_range = (0, 0) if position < 0 else (MOMENTS[position], MOMENTS[position + 1])
+        return self._term_range
+    
+    def _reuse_stages(self, previous: 'QiMenDunJia'):
+        """沿用另一盘中输入未变的排盘步骤的结果（取自其盘面或已执行的步骤）"""
+        previous_key = previous.qimen_calculator.cache_key()
+        key = self.qimen_calculator.cache_key()
+        board = previous.__dict__.get('board')
+        if board is not None and key == previous_key:
+            self.board = board
+            return
+        changed = 0
+        for bit, (old, new) in enumerate(zip(previous_key, key)):
+            if old != new:
+                changed |= 1 << bit
         
-        # 获取结果
-        self.result = self.qimen_calculator.get_result()
+        calculator = self.qimen_calculator
+        if board is not None:
+            data = board.data
+            done = _STAGE_MASKS
+        else:
+            layers = previous.qimen_calculator.layers
+            done = previous._stages
+        for stage, mask in _STAGE_MASKS.items():
+            if mask & changed or stage not in done:
+                continue
+            if stage == 'calculate_yima_and_guiren':
+                if board is not None:
+                    calculator.yima_code, calculator.guiren_codes = data[YIMA], (data[GUIREN], data[GUIREN + 1])
+                else:
+                    calculator.yima_code = previous.qimen_calculator.yima_code
+                    calculator.guiren_codes = previous.qimen_calculator.guiren_codes
+            else:
+                name = STAGE_LAYERS[stage]
+                if board is not None:
+                    calculator._set_layer(name, data[LAYERS[name]:LAYERS[name] + 9])
+                else:
+                    calculator._set_layer(name, layers[name])
+            self._stages.add(stage)
+    
+    # ---------- 输出 ----------
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """结构化结果：公历、农历、四柱、局数、驿马、贵人和按九宫格排列的宫位布局（指定地点时另有真太阳时）"""
+        result = self.result
+        data = {
+            "公历": f"{self.year}-{self.month:02d}-{self.day:02d} {self.hour:02d}:{self.minute:02d}",
+            "农历": self.lunar_date,
+            "四柱": result["sizhu"],
+            "局数": result["ju"],
+            "驿马": result["yima"],
+            "贵人": result["guiren"],
+            "宫位布局": serialization.palace_grid(self.board)
+        }
+        true_solar_time = self.sizhu_calculator.true_solar_time
+        if true_solar_time is not None:
+            data["真太阳时"] = true_solar_time.strftime('%Y-%m-%d %H:%M')
+        return data
+    
+    def to_json(self, compact: bool = False) -> str:
+        """JSON 字符串，compact=True 时不缩进（安装 orjson 时自动使用）"""
+        return serialization.dumps(self.to_dict(), compact)
+    
+    def to_bytes(self, compact: bool = True) -> bytes:
+        """UTF-8 编码的 JSON 字节串，默认紧凑格式，适合直接写入网络或文件"""
+        return serialization.dumps_bytes(self.to_dict(), compact)
     
     def display(self):
         """显示排盘结果"""
-        # 获取农历信息
-        lunar_date = LunarConverter.get_lunar_date(self.year, self.month, self.day)
-        dizhi_shi = LunarConverter.get_dizhi_shi(self.hour)
-        
+        sizhu = self.sizhu
         print(f"公历: {self.year}-{self.month:02d}-{self.day:02d} {self.hour:02d}:{self.minute:02d}")
-        print(f"农历: {lunar_date}")
-        print(f"四柱: {self.sizhu['年柱'][0]}{self.sizhu['年柱'][1]} "
-              f"{self.sizhu['月柱'][0]}{self.sizhu['月柱'][1]} "
-              f"{self.sizhu['日柱'][0]}{self.sizhu['日柱'][1]} "
-              f"{self.sizhu['时柱'][0]}{self.sizhu['时柱'][1]}")
+        if self.sizhu_calculator.true_solar_time is not None:
+            print(f"真太阳时: {self.sizhu_calculator.true_solar_time:%Y-%m-%d %H:%M}")
+        print(f"农历: {self.lunar_date or '超出内置农历表范围'}")
+        print(f"四柱: {sizhu['年柱'][0]}{sizhu['年柱'][1]} "
+              f"{sizhu['月柱'][0]}{sizhu['月柱'][1]} "
+              f"{sizhu['日柱'][0]}{sizhu['日柱'][1]} "
+              f"{sizhu['时柱'][0]}{sizhu['时柱'][1]}")
         
         print(f"局数: {self.result['ju']}")
         print(f"驿马: {self.result['yima']}, 贵人: {', '.join(self.result['guiren'])}")
         
         print("\n奇门盘面 (JSON格式):")
-        
-        # 按九宫格顺序重新组织数据，并使用中文字段名
-        ordered_result = {
-            "公历": f"{self.year}-{self.month:02d}-{self.day:02d} {self.hour:02d}:{self.minute:02d}",
-            "农历": lunar_date,
-            "四柱": self.result["sizhu"],
-            "局数": self.result["ju"],
-            "驿马": self.result["yima"],
-            "贵人": self.result["guiren"],
-            "宫位布局": {
-                # 第一行：巽四宫 离九宫 坤二宫
-                "第一行": {
-                    "巽四宫": {
-                        "天干": self.result["palaces"][3]["tiangan"],
-                        "八神": self.result["palaces"][3]["shen"],
-                        "九星": self.result["palaces"][3]["star"],
-                        "八门": self.result["palaces"][3]["men"],
-                        "长生": self.result["palaces"][3]["changsheng"],
-                        "入墓": self.result["palaces"][3]["is_rumu"],
-                        "击刑": self.result["palaces"][3]["is_jixing"],
-                        "门迫": self.result["palaces"][3]["is_menpo"],
-                        "空亡": self.result["palaces"][3]["is_kongwang"],
-                        "驿马": self.result["palaces"][3]["yima"],
-                        "贵人": self.result["palaces"][3]["guiren"]
-                    },
-                    "离九宫": {
-                        "天干": self.result["palaces"][8]["tiangan"],
-                        "八神": self.result["palaces"][8]["shen"],
-                        "九星": self.result["palaces"][8]["star"],
-                        "八门": self.result["palaces"][8]["men"],
-                        "长生": self.result["palaces"][8]["changsheng"],
-                        "入墓": self.result["palaces"][8]["is_rumu"],
-                        "击刑": self.result["palaces"][8]["is_jixing"],
-                        "门迫": self.result["palaces"][8]["is_menpo"],
-                        "空亡": self.result["palaces"][8]["is_kongwang"],
-                        "驿马": self.result["palaces"][8]["yima"],
-                        "贵人": self.result["palaces"][8]["guiren"]
-                    },
-                    "坤二宫": {
-                        "天干": self.result["palaces"][1]["tiangan"],
-                        "八神": self.result["palaces"][1]["shen"],
-                        "九星": self.result["palaces"][1]["star"],
-                        "八门": self.result["palaces"][1]["men"],
-                        "长生": self.result["palaces"][1]["changsheng"],
-                        "入墓": self.result["palaces"][1]["is_rumu"],
-                        "击刑": self.result["palaces"][1]["is_jixing"],
-                        "门迫": self.result["palaces"][1]["is_menpo"],
-                        "空亡": self.result["palaces"][1]["is_kongwang"],
-                        "驿马": self.result["palaces"][1]["yima"],
-                        "贵人": self.result["palaces"][1]["guiren"]
-                    }
-                },
-                # 第二行：震三宫 中五宫 兑七宫
-                "第二行": {
-                    "震三宫": {
-                        "天干": self.result["palaces"][2]["tiangan"],
-                        "八神": self.result["palaces"][2]["shen"],
-                        "九星": self.result["palaces"][2]["star"],
-                        "八门": self.result["palaces"][2]["men"],
-                        "长生": self.result["palaces"][2]["changsheng"],
-                        "入墓": self.result["palaces"][2]["is_rumu"],
-                        "击刑": self.result["palaces"][2]["is_jixing"],
-                        "门迫": self.result["palaces"][2]["is_menpo"],
-                        "空亡": self.result["palaces"][2]["is_kongwang"],
-                        "驿马": self.result["palaces"][2]["yima"],
-                        "贵人": self.result["palaces"][2]["guiren"]
-                    },
-                    "中五宫": {
-                        "天干": self.result["palaces"][4]["tiangan"],
-                        "八神": self.result["palaces"][4]["shen"],
-                        "九星": self.result["palaces"][4]["star"],
-                        "八门": self.result["palaces"][4]["men"],
-                        "长生": self.result["palaces"][4]["changsheng"],
-                        "入墓": self.result["palaces"][4]["is_rumu"],
-                        "击刑": self.result["palaces"][4]["is_jixing"],
-                        "门迫": self.result["palaces"][4]["is_menpo"],
-                        "空亡": self.result["palaces"][4]["is_kongwang"],
-                        "驿马": self.result["palaces"][4]["yima"],
-                        "贵人": self.result["palaces"][4]["guiren"]
-                    },
-                    "兑七宫": {
-                        "天干": self.result["palaces"][6]["tiangan"],
-                        "八神": self.result["palaces"][6]["shen"],
-                        "九星": self.result["palaces"][6]["star"],
-                        "八门": self.result["palaces"][6]["men"],
-                        "长生": self.result["palaces"][6]["changsheng"],
-                        "入墓": self.result["palaces"][6]["is_rumu"],
-                        "击刑": self.result["palaces"][6]["is_jixing"],
-                        "门迫": self.result["palaces"][6]["is_menpo"],
-                        "空亡": self.result["palaces"][6]["is_kongwang"],
-                        "驿马": self.result["palaces"][6]["yima"],
-                        "贵人": self.result["palaces"][6]["guiren"]
-                    }
-                },
-                # 第三行：艮八宫 坎一宫 乾六宫
-                "第三行": {
-                    "艮八宫": {
-                        "天干": self.result["palaces"][7]["tiangan"],
-                        "八神": self.result["palaces"][7]["shen"],
-                        "九星": self.result["palaces"][7]["star"],
-                        "八门": self.result["palaces"][7]["men"],
-                        "长生": self.result["palaces"][7]["changsheng"],
-                        "入墓": self.result["palaces"][7]["is_rumu"],
-                        "击刑": self.result["palaces"][7]["is_jixing"],
-                        "门迫": self.result["palaces"][7]["is_menpo"],
-                        "空亡": self.result["palaces"][7]["is_kongwang"],
-                        "驿马": self.result["palaces"][7]["yima"],
-                        "贵人": self.result["palaces"][7]["guiren"]
-                    },
-                    "坎一宫": {
-                        "天干": self.result["palaces"][0]["tiangan"],
-                        "八神": self.result["palaces"][0]["shen"],
-                        "九星": self.result["palaces"][0]["star"],
-                        "八门": self.result["palaces"][0]["men"],
-                        "长生": self.result["palaces"][0]["changsheng"],
-                        "入墓": self.result["palaces"][0]["is_rumu"],
-                        "击刑": self.result["palaces"][0]["is_jixing"],
-                        "门迫": self.result["palaces"][0]["is_menpo"],
-                        "空亡": self.result["palaces"][0]["is_kongwang"],
-                        "驿马": self.result["palaces"][0]["yima"],
-                        "贵人": self.result["palaces"][0]["guiren"]
-                    },
-                    "乾六宫": {
-                        "天干": self.result["palaces"][5]["tiangan"],
-                        "八神": self.result["palaces"][5]["shen"],
-                        "九星": self.result["palaces"][5]["star"],
-                        "八门": self.result["palaces"][5]["men"],
-                        "长生": self.result["palaces"][5]["changsheng"],
-                        "入墓": self.result["palaces"][5]["is_rumu"],
-                        "击刑": self.result["palaces"][5]["is_jixing"],
-                        "门迫": self.result["palaces"][5]["is_menpo"],
-                        "空亡": self.result["palaces"][5]["is_kongwang"],
-                        "驿马": self.result["palaces"][5]["yima"],
-                        "贵人": self.result["palaces"][5]["guiren"]
-                    }
-                }
-            }
-        }
-        
-        print(json.dumps(ordered_result, ensure_ascii=False, indent=2))
+        print(self.to_json())
+
+def set_default_cache(cache: ChartCache) -> ChartCache:
+    """替换未指定 cache 时使用的默认缓存（如 shared_table.SharedBoardTable），返回原来的缓存"""
+    global default_cache
+    previous, default_cache = default_cache, cache
+    return previous
 
 # 使用示例
 if __name__ == "__main__":
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+异步排盘
+在事件循环中先求出盘面缓存键（四柱和局数）查缓存：命中时直接在事件循环中完成，
+不进入线程池；未命中时把排盘交给线程池，同时在途的排盘数不超过 concurrency，
+既不阻塞事件循环，也不会因大量并发调用而超额占用 CPU。
+    
+    from qimen_system.async_chart import achart, AsyncCharter
+    
+    chart = await achart(datetime.datetime(2025, 8, 20, 17, 43))
+    async for chart in AsyncCharter(concurrency=4).map(moments):   # 按输入顺序产生
+        ...
+
+排盘核心可重入（见 frozen 模块），线程池中的计算与事件循环共用缓存不需要加锁。
+"""
+
+import asyncio
+import datetime
+import os
+import weakref
+from collections import deque
+from concurrent.futures import Executor
+from typing import AsyncIterator, Dict, Iterable, Tuple, Union
+from .chart_cache import ChartCache
+from .ju_strategy import JuStrategy, get_strategy
+from .solar_time import Location
+
+# 时刻：datetime 或 (年, 月, 日, 时, 分)
+Moment = Union[datetime.datetime, Tuple[int, int, int, int, int]]
+
+DEFAULT_CONCURRENCY = os.cpu_count() or 1
+
+def _complete(chart):
+    """完成排盘的其余部分（盘面、结果和农历），返回排盘对象"""
+    chart.result
+    chart.lunar_date
+    return chart
+
+class AsyncCharter:
+    """异步排盘器
+    
+    concurrency 为同时在线程池中计算的排盘数上限；executor 为 None 时使用事件循环的默认线程池。
+    只支持线程池：排盘对象在线程与事件循环之间直接传递，不经过序列化。
+    """
+    
+    def __init__(self, concurrency: int = None, executor: Executor = None, cache: ChartCache = None,
+                 location: Location = None, ju_strategy: Union[str, JuStrategy] = None):
+        self.concurrency = concurrency or DEFAULT_CONCURRENCY
+        self.executor = executor
+        self.cache = cache
+        self.location = location
+        self.ju_strategy = get_strategy(ju_strategy)
+        # 在首次使用时创建，与当时的事件循环绑定
+        self._semaphore = None
+        self.hits = 0
+        self.offloaded = 0
+    
+    def _lazy_chart(self, moment: Moment, location: Location = None,
+                    ju_strategy: Union[str, JuStrategy] = None):
+        """按需计算的排盘对象"""
+        from . import QiMenDunJia
+        
+        if isinstance(moment, datetime.datetime):
+            moment = (moment.year, moment.month, moment.day, moment.hour, moment.minute)
+        return QiMenDunJia.lazy(*moment, cache=self.cache,
+                                location=self.location if location is None else location,
+                                ju_strategy=self.ju_strategy if ju_strategy is None else ju_strategy)
+    
+    async def chart(self, moment: Moment, location: Location = None,
+                    ju_strategy: Union[str, JuStrategy] = None):
+        """排出某一时刻的盘（QiMenDunJia，已完成全部计算）
+        
+        location、ju_strategy 为 None 时使用排盘器的设置。
+        """
+        chart = self._lazy_chart(moment, location, ju_strategy)
+        if chart._peek_board() is not None:
+            self.hits += 1
+            return _complete(chart)
+        
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            self.offloaded += 1
+            return await asyncio.get_running_loop().run_in_executor(self.executor, _complete, chart)
+    
+    async def map(self, moments: Iterable[Moment], window: int = None) -> AsyncIterator:
+        """按输入顺序逐个产生排盘结果（moments 可为普通或异步可迭代对象）
+        
+        最多提前开始 window 个时刻（默认为 concurrency 的两倍），内存占用与输入长度无关；
+        某一时刻排盘失败时在产生到该时刻时抛出其异常。
+        """
+        window = window or self.concurrency * 2
+        pending = deque()
+        try:
+            async for moment in _aiter(moments):
+                pending.append(asyncio.ensure_future(self.chart(moment)))
+                if len(pending) >= window:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            # 提前结束（中途出错或调用方停止迭代）时取消其余的排盘
+            for future in pending:
+                if not future.done():
+                    future.cancel()
+                elif not future.cancelled():
+                    future.exception()
+    
+    async def gather(self, moments: Iterable[Moment]) -> list:
+        """排出全部时刻，按输入顺序返回列表"""
+        return [chart async for chart in self.map(moments)]
+    
+    def stats(self) -> Dict[str, int]:
+        """在事件循环中直接完成（缓存命中）和交给线程池的次数"""
+        return {'hits': self.hits, 'offloaded': self.offloaded, 'concurrency': self.concurrency}
+
+async def _aiter(moments):
+    """把普通或异步可迭代对象统一为异步迭代"""
+    if hasattr(moments, '__aiter__'):
+        async for moment in moments:
+            yield moment
+    else:
+        for moment in moments:
+            yield moment
+
+# 各事件循环的默认排盘器（并发上限需与事件循环绑定）
+_default_charters = weakref.WeakKeyDictionary()
+
+def default_charter() -> AsyncCharter:
+    """当前事件循环的默认排盘器（concurrency 为 CPU 核数，使用默认缓存和事件循环的默认线程池）"""
+    loop = asyncio.get_running_loop()
+    charter = _default_charters.get(loop)
+    if charter is None:
+        charter = _default_charters[loop] = AsyncCharter()
+    return charter
+
+async def achart(moment: Moment, location: Location = None,
+                 ju_strategy: Union[str, JuStrategy] = None):
+    """异步排盘（见 AsyncCharter.chart），使用当前事件循环的默认排盘器及其并发上限"""
+    return await default_charter().chart(moment, location, ju_strategy)
+
+async def amap(moments: Iterable[Moment], concurrency: int = None, location: Location = None,
+               ju_strategy: Union[str, JuStrategy] = None) -> AsyncIterator:
+    """按输入顺序异步产生排盘结果（见 AsyncCharter.map）"""
+    async for chart in AsyncCharter(concurrency, location=location, ju_strategy=ju_strategy).map(moments):
+        yield chart
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+排盘图集文件
+把一段时间内按固定步长排出的盘依次写成定长记录，读取时以 mmap 映射文件，
+按时刻算出记录位置后只解码这一条，多个进程打开同一文件时共享页缓存。
+
+文件头 64 字节（小端）：
+    4s      魔数 b'QMAT'
+    uint16  版本
+    uint16  记录长度
+    int64   起始时刻，自 1900-01-01 00:00 起的分钟数
+    uint32  步长（分钟）
+    uint32  记录数
+    16s     定局方法名称（ASCII，末尾补 0；版本 1 的文件没有此项，均为 simplified）
+    其余保留
+
+每条记录 48 字节：
+    0-3     年、月、日、时柱的六十甲子序号（0 为甲子），0xFF 表示该时刻排盘失败
+    4       局数，阴遁时加 0x10
+    5       驿马地支编号
+    6       贵人地支编号（高 4 位、低 4 位各一个）
+    7       保留
+    8-16    各宫 天干 << 4 | 九星
+    17-25   各宫 八门 << 4 | 八神
+    26-34   各宫 长生状态编号
+    35-43   各宫 标记位
+    44-47   保留
+"""
+
+import datetime
+import mmap
+import struct
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from .board import Board, TIANGAN, STAR, MEN, SHEN, CHANGSHENG, FLAGS, YIMA, GUIREN, BOARD_SIZE
+from .chart_cache import ChartCache
+from .chart_stream import ChartStream, STEP_HOUR
+from .constants import TIANGAN_NAMES, DIZHI_NAMES
+from .jieqi_table import JieQiTable
+from .ju_strategy import JuStrategy, get_strategy
+from .core import ganzhi_index
+from . import core
+
+MAGIC = b'QMAT'
+VERSION = 2
+HEADER = struct.Struct('<4sHHqII16s')
+HEADER_SIZE = 64
+RECORD_SIZE = 48
+EMPTY = 0xFF
+
+# 记录中各部分的位置
+PILLARS = 0
+JU = 4
+RECORD_YIMA = 5
+RECORD_GUIREN = 6
+GAN_STAR = 8
+MEN_SHEN = 17
+RECORD_CHANGSHENG = 26
+RECORD_FLAGS = 35
+
+PILLAR_NAMES = ('年柱', '月柱', '日柱', '时柱')
+
+def encode_record(codes: Tuple[Tuple[int, int], ...], yinyang: str, ju: int, board: Board) -> bytes:
+    """一个盘的定长记录：codes 为 SiZhuCalculator.get_sizhu_codes() 的四柱枚举值"""
+    data = board.data
+    record = bytearray(RECORD_SIZE)
+    for i, (gan, zhi) in enumerate(codes):
+        record[PILLARS + i] = ganzhi_index(gan, zhi)
+    record[JU] = ju | (0x10 if yinyang == core.YIN else 0)
+    record[RECORD_YIMA] = data[YIMA]
+    record[RECORD_GUIREN] = data[GUIREN] << 4 | data[GUIREN + 1]
+    for i in range(9):
+        record[GAN_STAR + i] = data[TIANGAN + i] << 4 | data[STAR + i]
+        record[MEN_SHEN + i] = data[MEN + i] << 4 | data[SHEN + i]
+        record[RECORD_CHANGSHENG + i] = data[CHANGSHENG + i]
+        record[RECORD_FLAGS + i] = data[FLAGS + i]
+    return bytes(record)
+
+def decode_board(record) -> Board:
+    """由记录还原紧凑盘面"""
+    data = bytearray(BOARD_SIZE)
+    for i in range(9):
+        data[TIANGAN + i] = record[GAN_STAR + i] >> 4
+        data[STAR + i] = record[GAN_STAR + i] & 0xF
+        data[MEN + i] = record[MEN_SHEN + i] >> 4
+        data[SHEN + i] = record[MEN_SHEN + i] & 0xF
+    data[CHANGSHENG:CHANGSHENG + 9] = record[RECORD_CHANGSHENG:RECORD_CHANGSHENG + 9]
+    data[FLAGS:FLAGS + 9] = record[RECORD_FLAGS:RECORD_FLAGS + 9]
+    data[YIMA] = record[RECORD_YIMA]
+    data[GUIREN] = record[RECORD_GUIREN] >> 4
+    data[GUIREN + 1] = record[RECORD_GUIREN] & 0xF
+    return Board(data)
+
+def write_atlas(path: str, start: datetime.datetime, end: datetime.datetime,
+                step: datetime.timedelta = STEP_HOUR, cache: ChartCache = None,
+                progress: Callable[[int], None] = None,
+                ju_strategy: Union[str, JuStrategy] = None) -> int:
+    """排出 [start, end) 内按 step 递增的各个盘并写入图集文件，返回记录数
+    
+    定局方法记录在文件头中。排盘失败的时刻（如置闰法超出节气时刻表范围）写入空记录。
+    """
+    strategy = get_strategy(ju_strategy)
+    step_minutes, remainder = divmod(int(step.total_seconds()), 60)
+    if remainder or step_minutes <= 0:
+        raise ValueError(f"步长应为正整数分钟，当前: {step}")
+    stream = ChartStream(start, end, step, cache=ChartCache() if cache is None else cache, lazy=True,
+                         ju_strategy=strategy)
+    empty = bytes([EMPTY]) * RECORD_SIZE
+    
+    count = 0
+    with open(path, 'wb') as f:
+        f.write(bytes(HEADER_SIZE))
+        buffer = bytearray()
+        moment = start
+        while moment < end:
+            try:
+                chart = stream.chart(moment)
+                buffer += encode_record(chart.sizhu_calculator.codes, chart.yinyang, chart.ju, chart.board)
+            except Exception:  # 单个时刻失败只写入空记录
+                buffer += empty
+            count += 1
+            moment += step
+            if len(buffer) >= 1 << 20:
+                f.write(buffer)
+                buffer.clear()
+                if progress is not None:
+                    progress(count)
+        f.write(buffer)
+        f.seek(0)
+        minutes = JieQiTable.to_minutes(start.year, start.month, start.day, start.hour, start.minute)
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, minutes, step_minutes, count,
+                            strategy.name.encode('ascii')))
+    return count
+
+class ChartAtlas:
+    """图集文件读取器（mmap，按需解码）
+    
+    ju_strategy 为调用方期望的定局方法，与图集文件记录的不同时打开即抛出 ValueError；
+    为 None 时不检查，图集的定局方法见 self.ju_strategy。
+    """
+    
+    def __init__(self, path: str, ju_strategy: Union[str, JuStrategy] = None):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, self.start_minutes, self.step_minutes, self.count, name = \
+            HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"不是排盘图集文件: {path}")
+        if version not in (1, VERSION) or record_size != RECORD_SIZE:
+            raise ValueError(f"不支持的图集版本: {version}（记录长度 {record_size}）")
+        # 版本 1 的图集均按原有的简化算法定局，该位置为保留的 0
+        self.ju_strategy = get_strategy(name.rstrip(b'\0').decode('ascii') or 'simplified')
+        if ju_strategy is not None and get_strategy(ju_strategy) is not self.ju_strategy:
+            self._mmap.close()
+            raise ValueError(f"图集按 {self.ju_strategy.name} 定局，"
+                             f"与要求的 {get_strategy(ju_strategy).name} 不符: {path}")
+        if len(self._mmap) < HEADER_SIZE + self.count * RECORD_SIZE:
+            raise ValueError(f"图集文件不完整: {path}")
+        self._view = memoryview(self._mmap)
+    
+    @property
+    def start(self) -> datetime.datetime:
+        return datetime.datetime(1900, 1, 1) + datetime.timedelta(minutes=self.start_minutes)
+    
+    @property
+    def step(self) -> datetime.timedelta:
+        return datetime.timedelta(minutes=self.step_minutes)
+    
+    def index_of(self, year: int, month: int, day: int, hour: int, minute: int = 0) -> int:
+        """时刻对应的记录序号，不在图集中（超出范围或不在步长上）时返回 -1"""
+        offset = JieQiTable.to_minutes(year, month, day, hour, minute) - self.start_minutes
+        index, remainder = divmod(offset, self.step_minutes)
+        if remainder or not 0 <= index < self.count:
+            return -1
+        return index
+    
+    def record(self, index: int) -> memoryview:
+        """第 index 条记录（不复制）"""
+        if not 0 <= index < self.count:
+            raise IndexError(f"记录序号超出范围: {index}")
+        position = HEADER_SIZE + index * RECORD_SIZE
+        return self._view[position:position + RECORD_SIZE]
+    
+    def board(self, index: int) -> Optional[Board]:
+        """第 index 条记录的紧凑盘面，空记录返回 None"""
+        record = self.record(index)
+        if record[PILLARS] == EMPTY:
+            return None
+        return decode_board(record)
+    
+    def get_result(self, index: int) -> Optional[Dict[str, Any]]:
+        """第 index 条记录的排盘结果，格式与 QiMenCalculator.get_result 相同，空记录返回 None"""
+        record = self.record(index)
+        if record[PILLARS] == EMPTY:
+            return None
+        sizhu = {}
+        for name, value in zip(PILLAR_NAMES, record[PILLARS:PILLARS + 4]):
+            sizhu[name] = (TIANGAN_NAMES[value % 10 + 1], DIZHI_NAMES[value % 12 + 1])
+        yinyang = core.YIN if record[JU] & 0x10 else core.YANG
+        return {
+            'sizhu': sizhu,
+            'ju': f"{yinyang}{record[JU] & 0xF}局",
+            **decode_board(record).to_dict()
+        }
+    
+    def lookup(self, year: int, month: int, day: int, hour: int, minute: int = 0) -> Optional[Dict[str, Any]]:
+        """按时刻查找排盘结果，不在图集中或为空记录时返回 None"""
+        index = self.index_of(year, month, day, hour, minute)
+        if index < 0:
+            return None
+        return self.get_result(index)
+    
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+    
+    def __enter__(self) -> 'ChartAtlas':
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+紧凑盘面
+以定长字节串保存九宫各层数据，按需转换为字典格式
+"""
+
+from typing import List, Optional, Sequence, Tuple
+from .frozen import FrozenDict
+from .constants import (
+    TIANGAN_NAMES, DIZHI_NAMES, MEN_NAMES, SHEN_NAMES, STAR_NAMES,
+    PALACE_NAMES, CHANGSHENG_NAMES
+)
+
+# 各层在字节串中的起始位置，每层 9 字节对应九宫（坎一宫……离九宫）
+TIANGAN = 0
+STAR = 9
+MEN = 18
+SHEN = 27
+CHANGSHENG = 36
+FLAGS = 45
+# 驿马 1 字节、贵人 2 字节（地支编号，0 表示无）
+YIMA = 54
+GUIREN = 55
+BOARD_SIZE = 57
+
+# 标记位
+FLAG_RUMU = 1       # 入墓
+FLAG_JIXING = 2     # 击刑
+FLAG_MENPO = 4      # 门迫
+FLAG_KONGWANG = 8   # 空亡
+FLAG_YIMA = 16      # 驿马
+FLAG_GUIREN = 32    # 贵人
+
+# 层名 → 起始位置
+LAYERS = {
+    'tiangan': TIANGAN,
+    'star': STAR,
+    'men': MEN,
+    'shen': SHEN,
+    'changsheng': CHANGSHENG,
+    'flags': FLAGS
+}
+
+FLAG_FIELDS = (
+    ('is_rumu', FLAG_RUMU),
+    ('is_jixing', FLAG_JIXING),
+    ('is_menpo', FLAG_MENPO),
+    ('is_kongwang', FLAG_KONGWANG),
+    ('yima', FLAG_YIMA),
+    ('guiren', FLAG_GUIREN)
+)
+
+class Board:
+    """紧凑盘面（不可变）
+    
+    全部数据保存在一个 57 字节的字节串中：天干、九星、八门、八神、长生、标记位
+    各占 9 字节，随后是驿马和贵人。
+    """
+    
+    __slots__ = ('_data', '_dict')
+    
+    def __init__(self, data: bytes):
+        if len(data) != BOARD_SIZE:
+            raise ValueError(f"盘面数据长度应为{BOARD_SIZE}字节，当前: {len(data)}")
+        self._data = bytes(data)
+        # to_dict 的结果（只读，首次调用时生成，缓存中的同一盘面共用）
+        self._dict = None
+    
+    @classmethod
+    def from_layers(cls, tiangan: Sequence[int], star: Sequence[int], men: Sequence[int],
+                    shen: Sequence[int], changsheng: Sequence[int], flags: Sequence[int],
+                    yima: int, guiren: Tuple[int, int]) -> 'Board':
+        """由整数编码的各层数据（列表或元组）创建（见 core 模块）"""
+        return cls(bytes((*tiangan, *star, *men, *shen, *changsheng, *flags, yima, guiren[0], guiren[1])))
+    
+    @property
+    def data(self) -> bytes:
+        """原始字节串"""
+        return self._data
+    
+    def code(self, layer: int, index: int) -> int:
+        """某层某宫的编号，index 为宫位下标（0 为坎一宫）"""
+        return self._data[layer + index]
+    
+    def layer(self, name: str) -> List[int]:
+        """整层的编号列表，name 为 LAYERS 中的层名"""
+        start = LAYERS[name]
+        return list(self._data[start:start + 9])
+    
+    def tiangan(self, index: int) -> Optional[str]:
+        return TIANGAN_NAMES[self._data[TIANGAN + index]]
+    
+    def star(self, index: int) -> Optional[str]:
+        return STAR_NAMES[self._data[STAR + index]]
+    
+    def men(self, index: int) -> Optional[str]:
+        return MEN_NAMES[self._data[MEN + index]]
+    
+    def shen(self, index: int) -> Optional[str]:
+        return SHEN_NAMES[self._data[SHEN + index]]
+    
+    def changsheng(self, index: int) -> Optional[str]:
+        return CHANGSHENG_NAMES[self._data[CHANGSHENG + index]]
+    
+    def flags(self, index: int) -> int:
+        return self._data[FLAGS + index]
+    
+    @property
+    def yima(self) -> str:
+        return DIZHI_NAMES[self._data[YIMA]] or '未知'
+    
+    @property
+    def guiren(self) -> List[str]:
+        guiren = [DIZHI_NAMES[code] for code in self._data[GUIREN:GUIREN + 2] if code]
+        return guiren or ['未知']
+    
+    def palace(self, index: int) -> FrozenDict:
+        """某宫的字典格式（只读），与 QiMenCalculator.get_result 中的宫位一致"""
+        data = self._data
+        flags = data[FLAGS + index]
+        return FrozenDict({
+            'name': PALACE_NAMES[index + 1],
+            'tiangan': TIANGAN_NAMES[data[TIANGAN + index]],
+            'star': STAR_NAMES[data[STAR + index]],
+            'men': MEN_NAMES[data[MEN + index]],
+            'shen': SHEN_NAMES[data[SHEN + index]],
+            'is_rumu': bool(flags & FLAG_RUMU),
+            'is_jixing': bool(flags & FLAG_JIXING),
+            'is_menpo': bool(flags & FLAG_MENPO),
+            'is_kongwang': bool(flags & FLAG_KONGWANG),
+            'changsheng': CHANGSHENG_NAMES[data[CHANGSHENG + index]],
+            'yima': bool(flags & FLAG_YIMA),
+            'guiren': bool(flags & FLAG_GUIREN)
+        })
+    
+    def to_dict(self) -> FrozenDict:
+        """转换为 QiMenCalculator.get_board 的字典格式（只读，宫位和贵人为元组）"""
+        if self._dict is None:
+            self._dict = FrozenDict({
+                'palaces': tuple(self.palace(i) for i in range(9)),
+                'yima': self.yima,
+                'guiren': tuple(self.guiren)
+            })
+        return self._dict
+    
+    def copy(self) -> 'Board':
+        """盘面不可变，复制即返回自身"""
+        return self
+    
+    __copy__ = copy
+    
+    def __deepcopy__(self, memo) -> 'Board':
+        return self
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Board) and self._data == other._data
+    
+    def __hash__(self) -> int:
+        return hash(self._data)
+    
+    def __repr__(self) -> str:
+        return f"Board({self._data.hex()})"
+    
+    def __reduce__(self):
+        return Board, (self._data,)
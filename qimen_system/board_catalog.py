@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+盘面目录
+全部 12960 种缓存键（见 shared_table）排出的盘面中只有 5706 种互不相同，
+目录给每种盘面一个固定的编号（0-65534），以 mmap 映射的数据文件存放：
+任意时刻先算出编号，需要时再展开为完整盘面。下游存储每个时刻只需保存 2 字节的编号。
+    
+    catalog = default_catalog()
+    board_id = catalog.id_for(2025, 8, 20, 17, 43)       # 时刻 → 编号
+    board = catalog.board(board_id)                       # 编号 → Board
+    ids = catalog.ids_batch(years, months, days, hours, minutes)   # 批量，uint16 数组
+
+数据文件 qimen_system/data/board_catalog.bin 由 tools/build_board_catalog.py 生成；
+重新生成时保留已有盘面的编号，新出现的盘面追加在末尾，已发出的编号始终指向同一盘面。
+
+文件头 32 字节（小端）：
+    4s      魔数 b'QMBC'
+    uint16  版本
+    uint16  盘面长度
+    uint32  盘面数
+    uint32  缓存键数
+    其余保留
+随后为各缓存键（按 slot_of 的顺序）对应的盘面编号（uint16），最后按编号依次存放各盘面。
+"""
+
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from .board import Board, BOARD_SIZE
+from .ju_strategy import JuStrategy, get_strategy
+from .jieqi_table import JieQiTable, days_from_civil_batch
+from .shared_table import build_table, slot_of, SLOT_COUNT
+from .solar_time import Location
+from . import core, solar_time
+
+try:
+    import numpy as np
+except ImportError:  # numpy 仅批量查询需要
+    np = None
+
+MAGIC = b'QMBC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')
+HEADER_SIZE = 32
+# 编号以 uint16 存放
+MAX_BOARDS = 0xFFFF
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'board_catalog.bin')
+
+def build_catalog(previous: Iterable[bytes] = ()) -> Tuple[array, List[bytes]]:
+    """排出全部盘面并编号，返回 (各缓存键的盘面编号, 按编号排列的盘面)
+    
+    previous 为已有目录按编号排列的盘面，其编号保持不变；新盘面按首次出现的缓存键顺序追加。
+    """
+    boards = [bytes(data) for data in previous]
+    ids = {data: board_id for board_id, data in enumerate(boards)}
+    table = build_table()
+    slot_ids = array('H')
+    for slot in range(SLOT_COUNT):
+        data = table[slot * BOARD_SIZE:(slot + 1) * BOARD_SIZE]
+        board_id = ids.get(data)
+        if board_id is None:
+            board_id = ids[data] = len(boards)
+            boards.append(data)
+        slot_ids.append(board_id)
+    if len(boards) > MAX_BOARDS:
+        raise ValueError(f"盘面数超出编号范围: {len(boards)}")
+    return slot_ids, boards
+
+def encode_catalog(slot_ids: array, boards: List[bytes]) -> bytes:
+    """build_catalog 的结果编码为目录文件内容"""
+    ids = array('H', slot_ids)
+    if sys.byteorder != 'little':
+        ids.byteswap()
+    header = HEADER.pack(MAGIC, VERSION, BOARD_SIZE, len(boards), len(ids)).ljust(HEADER_SIZE, b'\0')
+    return header + ids.tobytes() + b''.join(boards)
+
+def write_catalog(path: str, slot_ids: array, boards: List[bytes]) -> int:
+    """把 build_catalog 的结果写入目录文件，返回盘面数"""
+    with open(path, 'wb') as f:
+        f.write(encode_catalog(slot_ids, boards))
+    return len(boards)
+
+class BoardCatalog:
+    """盘面目录读取器（mmap，只读，线程安全）"""
+    
+    def __init__(self, path: str = DATA_FILE):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, board_size, self.count, slot_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"不是盘面目录文件: {path}")
+        if version != VERSION or board_size != BOARD_SIZE or slot_count != SLOT_COUNT:
+            raise ValueError(f"不支持的盘面目录版本: {version}（盘面长度 {board_size}，缓存键数 {slot_count}）")
+        self._boards_offset = HEADER_SIZE + SLOT_COUNT * 2
+        if len(self._mmap) < self._boards_offset + self.count * BOARD_SIZE:
+            raise ValueError(f"盘面目录文件不完整: {path}")
+        self._ids = struct.Struct(f'<{SLOT_COUNT}H').unpack_from(self._mmap, HEADER_SIZE)
+        self._id_array = None
+        # 盘面 → 编号，首次调用 id_of_board 时生成
+        self._board_ids = None
+    
+    def id_of_key(self, key: Tuple) -> int:
+        """缓存键（QiMenCalculator.cache_key）对应的盘面编号"""
+        slot = slot_of(key)
+        if slot < 0:
+            raise ValueError(f"不可能出现的盘面缓存键: {key}")
+        return self._ids[slot]
+    
+    def id_of(self, chart) -> int:
+        """排盘对象（QiMenDunJia）的盘面编号，只需四柱和局数，不排盘"""
+        return self.id_of_key(chart.qimen_calculator.cache_key())
+    
+    def id_for(self, year: int, month: int, day: int, hour: int, minute: int,
+               location: Location = None, ju_strategy: Union[str, JuStrategy] = None) -> int:
+        """某一时刻的盘面编号"""
+        from . import QiMenDunJia
+        
+        return self.id_of(QiMenDunJia.lazy(year, month, day, hour, minute,
+                                           location=location, ju_strategy=ju_strategy))
+    
+    def ids_batch(self, years, months, days, hours, minutes, locations=None,
+                  ju_strategy: Union[str, JuStrategy] = None):
+        """批量计算盘面编号（向量化），返回 uint16 数组
+        
+        参数为等长的整数数组，locations 同 SiZhuCalculator.batch；
+        与逐个调用 id_for 的结果相同，但只支持节气时刻表范围内的时刻。
+        """
+        if np is None:
+            raise ImportError("批量查询需要安装 numpy")
+        if self._id_array is None:
+            self._id_array = np.asarray(self._ids, dtype=np.uint16)
+        strategy = get_strategy(ju_strategy)
+        years = np.asarray(years, dtype=np.int64)
+        months = np.asarray(months, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        hours = np.asarray(hours, dtype=np.int64)
+        minutes = np.asarray(minutes, dtype=np.int64)
+        
+        _, term_indexes = JieQiTable.find_batch(years, months, days, hours, minutes)
+        if np.any(term_indexes < 0):
+            bad = int(years[term_indexes < 0][0])
+            raise ValueError(f"批量查询仅支持节气时刻表范围内的时刻"
+                             f"（{JieQiTable.FIRST_YEAR}-{JieQiTable.LAST_YEAR}年），当前年份: {bad}")
+        if locations is None:
+            day_numbers = days_from_civil_batch(years, months, days)
+        else:
+            day_numbers, hours, _ = solar_time.true_solar_batch(years, months, days,
+                                                                hours, minutes, locations)
+        yin, ju = strategy.calculate_batch(day_numbers, term_indexes, months)
+        # 与 slot_of 相同：时干由日干确定，不参与定位
+        day_index = (day_numbers + core.DAY_NUMBER_OFFSET) % 60
+        shi_zhi = (hours + 1) // 2 % 12 + 1
+        slots = ((yin.astype(np.int64) * 9 + ju - 1) * 60 + day_index) * 12 + shi_zhi - 1
+        return self._id_array[slots]
+    
+    def board(self, board_id: int) -> Board:
+        """编号对应的完整盘面"""
+        if not 0 <= board_id < self.count:
+            raise IndexError(f"盘面编号超出范围: {board_id}")
+        position = self._boards_offset + board_id * BOARD_SIZE
+        return Board(self._mmap[position:position + BOARD_SIZE])
+    
+    def boards(self, board_ids: Iterable[int]) -> List[Board]:
+        """批量展开编号（同一编号只展开一次，得到的 Board 共用 to_dict 的结果）"""
+        expanded: Dict[int, Board] = {}
+        result = []
+        for board_id in board_ids:
+            board_id = int(board_id)
+            board = expanded.get(board_id)
+            if board is None:
+                board = expanded[board_id] = self.board(board_id)
+            result.append(board)
+        return result
+    
+    def id_of_board(self, board: Board) -> Optional[int]:
+        """盘面的编号，不在目录中时返回 None（如由旧数据转换为编号）"""
+        if self._board_ids is None:
+            self._board_ids = {self.board(board_id).data: board_id for board_id in range(self.count)}
+        return self._board_ids.get(board.data)
+    
+    def close(self):
+        self._mmap.close()
+    
+    def __enter__(self) -> 'BoardCatalog':
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def __len__(self) -> int:
+        return self.count
+
+_default: Optional[BoardCatalog] = None
+_lock = threading.Lock()
+
+def default_catalog() -> BoardCatalog:
+    """随包发布的盘面目录（首次使用时打开，多个线程同时首次使用时只打开一次）"""
+    global _default
+    if _default is None:
+        with _lock:
+            if _default is None:
+                _default = BoardCatalog()
+    return _default
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+盘面倒排索引
+对一段时间内按固定步长排出的各个盘，以（宫位, 层, 值）为键记录出现该组合的时刻，
+多条件查询只需对各键的时刻集合求交，不必逐个时刻重新排盘。
+
+时刻集合以位图保存（第 i 位表示第 i 个时刻 start + i * step），求交即按位与；
+写入文件时整体 zlib 压缩。
+"""
+
+import datetime
+import json
+import struct
+import zlib
+from typing import Dict, Iterator, List, Tuple, Union
+from .board import (
+    TIANGAN, STAR, MEN, SHEN, CHANGSHENG, FLAGS, FLAG_FIELDS
+)
+from .chart_cache import ChartCache
+from .chart_stream import iter_charts, STEP_HOUR
+from .ju_strategy import JuStrategy, get_strategy
+from .constants import (
+    TIANGAN_NAMES, STAR_NAMES, MEN_NAMES, SHEN_NAMES, CHANGSHENG_NAMES, PALACE_NAMES
+)
+
+# 可索引的层：层名 → (盘面层起始位置, 名称表)
+INDEXED_LAYERS = {
+    'tiangan': (TIANGAN, TIANGAN_NAMES),
+    'star': (STAR, STAR_NAMES),
+    'men': (MEN, MEN_NAMES),
+    'shen': (SHEN, SHEN_NAMES),
+    'changsheng': (CHANGSHENG, CHANGSHENG_NAMES)
+}
+
+# 标记字段名 → 标记位（is_rumu、is_jixing、is_menpo、is_kongwang、yima、guiren）
+FLAG_BITS = dict(FLAG_FIELDS)
+
+MAGIC = b'QMIX'
+VERSION = 1
+
+# 查询条件：(宫位, 层名, 值)，宫位为宫名（如 '坎一宫'）或宫数 1-9，
+# 层名为 INDEXED_LAYERS 中的层（值为名称或编号）或 FLAG_BITS 中的标记（值为 True/False）
+Condition = Tuple[Union[str, int], str, Union[str, int, bool]]
+
+class BoardIndex:
+    """盘面倒排索引
+    
+    键为 (宫位下标, 层起始位置, 编号)，标记位的键为 (宫位下标, FLAGS, 标记位)；
+    值为时刻位图（Python 整数）。ju_strategy 为建立索引时的定局方法，随索引一起保存。
+    """
+    
+    def __init__(self, start: datetime.datetime, step: datetime.timedelta, count: int,
+                 bitmaps: Dict[Tuple[int, int, int], int], ju_strategy: Union[str, JuStrategy] = None):
+        self.start = start
+        self.step = step
+        self.count = count
+        self.bitmaps = bitmaps
+        self.ju_strategy = get_strategy(ju_strategy)
+        self.all = (1 << count) - 1
+    
+    @classmethod
+    def build(cls, start: datetime.datetime, end: datetime.datetime,
+              step: datetime.timedelta = STEP_HOUR, cache: ChartCache = None,
+              ju_strategy: Union[str, JuStrategy] = None) -> 'BoardIndex':
+        """排出 [start, end) 内按 step 递增的各个盘并建立索引（按 ju_strategy 定局）"""
+        strategy = get_strategy(ju_strategy)
+        cache = ChartCache() if cache is None else cache
+        # 建立过程中每个键对应一个字节数组位图，结束时转为整数
+        builders = {}
+        count = 0
+        for i, (_, chart) in enumerate(iter_charts(start, end, step, cache=cache, lazy=True,
+                                                       ju_strategy=strategy)):
+            data = chart.board.data
+            byte, bit = i >> 3, 1 << (i & 7)
+            for palace in range(9):
+                for layer, _ in INDEXED_LAYERS.values():
+                    code = data[layer + palace]
+                    if code:
+                        cls._builder(builders, (palace, layer, code), byte)[byte] |= bit
+                flags = data[FLAGS + palace]
+                while flags:
+                    flag = flags & -flags
+                    cls._builder(builders, (palace, FLAGS, flag), byte)[byte] |= bit
+                    flags ^= flag
+            count = i + 1
+        bitmaps = {key: int.from_bytes(bitmap, 'little') for key, bitmap in builders.items()}
+        return cls(start, step, count, bitmaps, strategy)
+    
+    @staticmethod
+    def _builder(builders: Dict[tuple, bytearray], key: tuple, byte: int) -> bytearray:
+        """键对应的字节数组位图，长度不足时按需扩展"""
+        bitmap = builders.get(key)
+        if bitmap is None:
+            bitmap = builders[key] = bytearray()
+        if len(bitmap) <= byte:
+            bitmap.extend(bytes(max(byte + 1 - len(bitmap), len(bitmap))))
+        return bitmap
+    
+    # ---------- 查询 ----------
+    
+    @staticmethod
+    def palace_index(palace: Union[str, int]) -> int:
+        """宫名或宫数（1-9）转换为宫位下标"""
+        if isinstance(palace, str):
+            if palace not in PALACE_NAMES[1:]:
+                raise ValueError(f"未知宫位: {palace}")
+            return PALACE_NAMES.index(palace) - 1
+        if not 1 <= palace <= 9:
+            raise ValueError(f"宫数应为1-9，当前: {palace}")
+        return palace - 1
+    
+    def bitmap(self, condition: Condition) -> int:
+        """单个条件的时刻位图"""
+        palace, layer, value = condition
+        index = self.palace_index(palace)
+        if layer in FLAG_BITS:
+            bitmap = self.bitmaps.get((index, FLAGS, FLAG_BITS[layer]), 0)
+            return bitmap if value else self.all & ~bitmap
+        if layer not in INDEXED_LAYERS:
+            raise ValueError(f"未知层: {layer}")
+        offset, names = INDEXED_LAYERS[layer]
+        if isinstance(value, str):
+            if value not in names[1:]:
+                raise ValueError(f"{layer} 层没有 {value}")
+            code = names.index(value)
+        else:
+            code = value
+        return self.bitmaps.get((index, offset, code), 0)
+    
+    def match(self, *conditions: Condition) -> int:
+        """同时满足全部条件的时刻位图（无条件时为全部时刻）"""
+        result = self.all
+        # 先与最短的位图求交，结果尽早变小
+        for bitmap in sorted((self.bitmap(c) for c in conditions), key=lambda b: b.bit_length()):
+            result &= bitmap
+            if not result:
+                break
+        return result
+    
+    def count_matches(self, *conditions: Condition) -> int:
+        """同时满足全部条件的时刻数"""
+        return bin(self.match(*conditions)).count('1')
+    
+    def positions(self, bitmap: int) -> Iterator[int]:
+        """位图中各时刻的序号（递增）"""
+        data = bitmap.to_bytes((self.count + 7) // 8, 'little')
+        for byte_index, byte in enumerate(data):
+            while byte:
+                low = byte & -byte
+                yield byte_index * 8 + low.bit_length() - 1
+                byte ^= low
+    
+    def query(self, *conditions: Condition) -> List[datetime.datetime]:
+        """同时满足全部条件的时刻，例如：
+        
+        index.query(('坎一宫', 'men', '开门'), ('坎一宫', 'shen', '值符'))
+        """
+        start, step = self.start, self.step
+        return [start + step * i for i in self.positions(self.match(*conditions))]
+    
+    # ---------- 保存与读取 ----------
+    
+    def save(self, path: str):
+        """保存索引：文件头（JSON）+ zlib 压缩的全部位图"""
+        size = (self.count + 7) // 8
+        keys = sorted(self.bitmaps)
+        payload = zlib.compress(b''.join(self.bitmaps[key].to_bytes(size, 'little') for key in keys))
+        header = json.dumps({
+            'start': self.start.isoformat(),
+            'step_seconds': self.step.total_seconds(),
+            'count': self.count,
+            'ju_strategy': self.ju_strategy.name,
+            'keys': keys
+        }).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<HI', VERSION, len(header)))
+            f.write(header)
+            f.write(payload)
+    
+    @classmethod
+    def load(cls, path: str) -> 'BoardIndex':
+        """读取 save 保存的索引"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"不是盘面索引文件: {path}")
+        version, header_size = struct.unpack_from('<HI', data, 4)
+        if version != VERSION:
+            raise ValueError(f"不支持的索引版本: {version}")
+        header_end = 10 + header_size
+        header = json.loads(data[10:header_end].decode('utf-8'))
+        payload = zlib.decompress(data[header_end:])
+        count = header['count']
+        size = (count + 7) // 8
+        bitmaps = {
+            tuple(key): int.from_bytes(payload[i * size:(i + 1) * size], 'little')
+            for i, key in enumerate(header['keys'])
+        }
+        # 较早保存的索引没有 ju_strategy，均按原有的简化算法定局
+        return cls(datetime.datetime.fromisoformat(header['start']),
+                   datetime.timedelta(seconds=header['step_seconds']), count, bitmaps,
+                   header.get('ju_strategy', 'simplified'))
+    
+    def __len__(self) -> int:
+        return self.count
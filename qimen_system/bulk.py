@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+批量排盘
+从 CSV 或 JSONL 读取时间，分块交给进程池排盘，按输入顺序输出 JSONL；
+单行出错（如时间格式错误）只记录在该行的结果中，不中断整批。
+chart_threaded 在当前进程内用线程池批量排盘，返回 QiMenDunJia 对象
+"""
+
+import csv
+import datetime
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice, repeat
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+from .ju_strategy import JuStrategy, get_strategy
+from .solar_time import Location
+
+# 时间字段
+FIELDS = ('year', 'month', 'day', 'hour', 'minute')
+# 也可以用一个字段给出 "YYYY-MM-DD HH:MM" 格式的时间
+DATETIME_FIELDS = ('datetime', 'time')
+
+Timestamp = Tuple[int, int, int, int, int]
+
+def parse_timestamp(row: Dict[str, object]) -> Timestamp:
+    """由一行输入（字段名 → 值）解析 (年, 月, 日, 时, 分)"""
+    timestamp = None
+    for field in DATETIME_FIELDS:
+        value = row.get(field)
+        if value:
+            date, _, clock = str(value).strip().replace('T', ' ').partition(' ')
+            year, month, day = date.split('-')
+            hour, _, minute = clock.partition(':')
+            timestamp = int(year), int(month), int(day), int(hour or 0), int(minute[:2] or 0)
+            break
+    if timestamp is None:
+        missing = [field for field in FIELDS[:3] if row.get(field) in (None, '')]
+        if missing:
+            raise ValueError(f"缺少字段: {', '.join(missing)}")
+        timestamp = tuple(int(row.get(field) or 0) for field in FIELDS)
+    # 校验日期是否存在（如 2 月 30 日）
+    datetime.datetime(*timestamp)
+    return timestamp
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Dict[str, object]]:
+    """逐行读取输入，fmt 为 'csv'（首行为字段名）或 'jsonl'
+    
+    JSONL 中无法解析的行产生 {'_error': 错误信息}，由调用方按行报告。
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = {'_error': f"JSON解析失败: {e}"}
+        yield row if isinstance(row, dict) else {'_error': "每行应为一个JSON对象"}
+
+def chart_lines(timestamps: List[Timestamp],
+                ju_strategy: str = None) -> List[Tuple[Optional[str], Optional[str]]]:
+    """排盘一组时间，返回 (结果JSON, 错误信息) 列表（在工作进程中执行），ju_strategy 为定局方法名称"""
+    from . import QiMenDunJia
+    
+    lines = []
+    for timestamp in timestamps:
+        try:
+            result = QiMenDunJia(*timestamp, ju_strategy=ju_strategy).result
+        except Exception as e:  # 单行出错只记录在该行，不中断整批
+            lines.append((None, str(e) or type(e).__name__))
+        else:
+            lines.append((json.dumps(result, ensure_ascii=False), None))
+    return lines
+
+def _chart_chunk(timestamps: List[Timestamp], ju_strategy: JuStrategy, location: Location, cache) -> list:
+    """排盘一组时间（在线程池中执行）"""
+    from . import QiMenDunJia
+    
+    return [QiMenDunJia(*timestamp, cache=cache, location=location, ju_strategy=ju_strategy)
+            for timestamp in timestamps]
+
+def chart_threaded(timestamps: Iterable[Timestamp], workers: int = None, chunk_size: int = 256,
+                   ju_strategy: Union[str, JuStrategy] = None, location: Location = None,
+                   cache=None) -> list:
+    """用线程池批量排盘，按输入顺序返回 QiMenDunJia 列表（已完成全部计算）
+    
+    排盘核心可重入、结果只读，各线程共用缓存和结果时不需要另加锁或复制。
+    在自由线程（无 GIL）的 CPython 上随线程数扩展；有 GIL 时与单线程相当。
+    workers 默认为 CPU 核数，为 1 时在当前线程中计算；任一时间排盘失败时抛出其异常。
+    """
+    strategy = get_strategy(ju_strategy)
+    timestamps = [tuple(timestamp) for timestamp in timestamps]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(timestamps) <= chunk_size:
+        return _chart_chunk(timestamps, strategy, location, cache)
+    
+    chunks = [timestamps[i:i + chunk_size] for i in range(0, len(timestamps), chunk_size)]
+    charts = []
+    with ThreadPoolExecutor(workers) as executor:
+        for chunk in executor.map(_chart_chunk, chunks, repeat(strategy), repeat(location), repeat(cache)):
+            charts.extend(chunk)
+    return charts
+
+def _prepare_chunk(rows: List[Tuple[int, Dict[str, object]]]):
+    """解析一块输入并去重：返回 (各行的 (行号, 时间或错误)、去重后的时间列表)"""
+    entries = []
+    unique = {}
+    for number, row in rows:
+        if '_error' in row:
+            entries.append((number, None, row['_error']))
+            continue
+        try:
+            timestamp = parse_timestamp(row)
+        except (ValueError, TypeError) as e:
+            entries.append((number, None, f"时间格式错误: {e}"))
+            continue
+        entries.append((number, unique.setdefault(timestamp, len(unique)), timestamp))
+    return entries, list(unique)
+
+def _format_entries(entries, lines) -> Iterator[str]:
+    """按输入顺序生成输出行"""
+    for number, index, value in entries:
+        if index is None:
+            yield json.dumps({'row': number, 'error': value}, ensure_ascii=False)
+            continue
+        result, error = lines[index]
+        time = "{}-{:02d}-{:02d} {:02d}:{:02d}".format(*value)
+        if error is not None:
+            yield json.dumps({'row': number, 'time': time, 'error': error}, ensure_ascii=False)
+        else:
+            yield f'{{"row": {number}, "time": "{time}", "result": {result}}}'
+
+def run(rows: Iterable[Dict[str, object]], output: TextIO, workers: int = None,
+        chunk_size: int = 1000, ju_strategy: str = None,
+        shared_table: bool = False) -> Dict[str, int]:
+    """批量排盘并按输入顺序写出 JSONL，返回行数、出错行数和实际排盘次数
+    
+    输入按 chunk_size 行分块，每块内相同时间只排一次；workers 为进程数
+    （默认 CPU 核数，1 表示在当前进程中计算）。同时在途的块数有上限，
+    内存占用与输入总行数无关。ju_strategy 为定局方法名称（见 ju_strategy 模块）。
+    shared_table=True 且多进程时，先把全部盘面发布到共享内存，各工作进程挂接同一份只读表。
+    """
+    get_strategy(ju_strategy)  # 先在主进程中检查名称
+    workers = workers or os.cpu_count() or 1
+    numbered = enumerate(rows, 1)
+    stats = {'rows': 0, 'errors': 0, 'charted': 0}
+    
+    def chunks():
+        while True:
+            chunk = list(islice(numbered, chunk_size))
+            if not chunk:
+                return
+            yield _prepare_chunk(chunk)
+    
+    def write(entries, lines):
+        for line in _format_entries(entries, lines):
+            output.write(line)
+            output.write('\n')
+        stats['rows'] += len(entries)
+        stats['errors'] += sum(1 for _, index, _ in entries
+                               if index is None or lines[index][1] is not None)
+        stats['charted'] += len(lines)
+    
+    if workers == 1:
+        for entries, timestamps in chunks():
+            write(entries, chart_lines(timestamps, ju_strategy))
+        return stats
+    
+    from multiprocessing import Pool
+    
+    table = None
+    initializer = None
+    if shared_table:
+        from .shared_table import SharedBoardTable, attach_default
+        table = SharedBoardTable.publish()
+        initializer = attach_default
+    try:
+        with Pool(workers, initializer, (table.name,) if table is not None else ()) as pool:
+            pending = deque()
+            for entries, timestamps in chunks():
+                pending.append((entries, pool.apply_async(chart_lines, (timestamps, ju_strategy))))
+                # 在途块数达到上限时先写出最早的一块
+                if len(pending) >= workers * 2:
+                    entries, result = pending.popleft()
+                    write(entries, result.get())
+            while pending:
+                entries, result = pending.popleft()
+                write(entries, result.get())
+    finally:
+        if table is not None:
+            table.unlink()
+    return stats
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+排盘缓存
+盘面只取决于阴阳遁、局数、日柱和时柱，相同输入直接复用已排好的盘面
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+from .board import Board
+
+class ChartCache:
+    """盘面LRU缓存"""
+    
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._boards = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(yinyang: str, ju: int, ri_gan: int, ri_zhi: int,
+                 shi_gan: int, shi_zhi: int) -> Tuple:
+        """由盘面的规范输入生成缓存键，干支为枚举值"""
+        return yinyang, ju, ri_gan, ri_zhi, shi_gan, shi_zhi
+    
+    def get(self, key: Tuple) -> Optional[Board]:
+        """查找盘面，未命中返回 None"""
+        with self._lock:
+            board = self._boards.get(key)
+            if board is None:
+                self.misses += 1
+                return None
+            self._boards.move_to_end(key)
+            self.hits += 1
+            return board
+    
+    def put(self, key: Tuple, board: Board):
+        """存入盘面，超出容量时淘汰最久未使用的盘面"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._boards[key] = board
+            self._boards.move_to_end(key)
+            while len(self._boards) > self.maxsize:
+                self._boards.popitem(last=False)
+                self.evictions += 1
+    
+    def resize(self, maxsize: int):
+        """调整容量"""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._boards) > max(maxsize, 0):
+                self._boards.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        """清空缓存和统计"""
+        with self._lock:
+            self._boards.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+    
+    def warm(self, timestamps: Iterable[Tuple[int, int, int, int, int]]) -> int:
+        """预热缓存：按 (年, 月, 日, 时, 分) 逐个排盘，返回新增的盘面数"""
+        from . import QiMenDunJia
+        
+        before = len(self._boards)
+        for year, month, day, hour, minute in timestamps:
+            QiMenDunJia(year, month, day, hour, minute, cache=self)
+        return len(self._boards) - before
+    
+    def stats(self) -> Dict[str, int]:
+        """命中统计"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._boards),
+                'maxsize': self.maxsize
+            }
+    
+    def __len__(self) -> int:
+        return len(self._boards)
+    
+    def __contains__(self, key: Tuple) -> bool:
+        return key in self._boards
+
+# 默认共享缓存
+default_cache = ChartCache()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+逐时排盘生成器
+按固定步长遍历一段时间，逐个产生排盘结果：同一天内复用日柱，
+同一节气内复用节气查找，只保存当前状态，内存占用与时间范围长短无关
+"""
+
+import datetime
+from typing import Iterator, Optional, Tuple, Union
+from .sizhu_calculator import SiZhuCalculator, SolarTerm
+from .jieqi_table import JieQiTable, MOMENTS
+from .chart_cache import ChartCache
+from .ju_strategy import JuStrategy, get_strategy
+from . import core
+
+# 常用步长
+STEP_HOUR = datetime.timedelta(hours=1)
+STEP_SHICHEN = datetime.timedelta(hours=2)
+
+CURSOR_FORMAT = '%Y-%m-%dT%H:%M'
+
+class ChartStream:
+    """逐时排盘生成器
+    
+    遍历 [start, end) 内按 step 递增的各个时刻，产生 (时刻, QiMenDunJia)。
+    cursor 为下一个待排时刻的字符串，传给新的 ChartStream 即可从中断处继续。
+    """
+    
+    def __init__(self, start: datetime.datetime, end: datetime.datetime,
+                 step: datetime.timedelta = STEP_SHICHEN, cache: ChartCache = None,
+                 lazy: bool = False, cursor: Union[str, datetime.datetime] = None,
+                 ju_strategy: Union[str, JuStrategy] = None):
+        if step <= datetime.timedelta(0):
+            raise ValueError(f"步长必须为正数，当前: {step}")
+        self.start = start
+        self.end = end
+        self.step = step
+        self.cache = cache
+        self.lazy = lazy
+        self.ju_strategy = get_strategy(ju_strategy)
+        self._next = self.parse_cursor(cursor) if cursor is not None else start
+        # 当前日期及其日柱
+        self._date = None
+        self._ri_zhu = None
+        # 当前节气（节气年, 节气索引）及其有效的分钟区间 [起, 止)
+        self._pillar_term = None
+        self._term_range = (0, 0)
+    
+    @staticmethod
+    def parse_cursor(cursor: Union[str, datetime.datetime]) -> datetime.datetime:
+        """解析游标（datetime 或 CURSOR_FORMAT 格式的字符串）"""
+        if isinstance(cursor, datetime.datetime):
+            return cursor
+        return datetime.datetime.strptime(cursor, CURSOR_FORMAT)
+    
+    @property
+    def cursor(self) -> Optional[str]:
+        """下一个待排时刻，遍历结束后为 None"""
+        if self._next >= self.end:
+            return None
+        return self._next.strftime(CURSOR_FORMAT)
+    
+    def _day_pillar(self, moment: datetime.datetime) -> Tuple[int, int]:
+        """日柱，同一天内只计算一次"""
+        date = moment.date()
+        if date != self._date:
+            self._ri_zhu = core.ri_zhu(moment.year, moment.month, moment.day)
+            self._date = date
+        return self._ri_zhu
+    
+    def _term(self, moment: datetime.datetime) -> Tuple[int, int]:
+        """（节气年, 节气索引），同一节气内只查找一次"""
+        minutes = JieQiTable.to_minutes(moment.year, moment.month, moment.day,
+                                        moment.hour, moment.minute)
+        low, high = self._term_range
+        if low <= minutes < high:
+            return self._pillar_term
+        
+        position = JieQiTable.locate(minutes)
+        if position < 0:
+            # 超出节气时刻表范围时不复用，按太阳黄经求解（每年只求解一次）
+            self._term_range = (0, 0)
+            return SolarTerm.get_pillar_term(moment.year, moment.month, moment.day,
+                                             moment.hour, moment.minute)
+        self._pillar_term = JieQiTable.solar_year(position), JieQiTable.term_index(position)
+        self._term_range = (MOMENTS[position], MOMENTS[position + 1])
+        return self._pillar_term
+    
+    def chart(self, moment: datetime.datetime):
+        """排出某一时刻的盘（复用当前的日柱和节气）"""
+        from . import QiMenDunJia
+        
+        sizhu_calculator = SiZhuCalculator(
+            moment.year, moment.month, moment.day, moment.hour, moment.minute,
+            pillar_term=self._term(moment), ri_zhu=self._day_pillar(moment))
+        return QiMenDunJia.from_sizhu(sizhu_calculator, cache=self.cache, lazy=self.lazy,
+                                      ju_strategy=self.ju_strategy)
+    
+    def __iter__(self) -> Iterator[tuple]:
+        while self._next < self.end:
+            moment = self._next
+            chart = self.chart(moment)
+            self._next = moment + self.step
+            yield moment, chart
+
+def iter_charts(start: datetime.datetime, end: datetime.datetime,
+                step: datetime.timedelta = STEP_SHICHEN, cache: ChartCache = None,
+                lazy: bool = False, cursor: Union[str, datetime.datetime] = None,
+                ju_strategy: Union[str, JuStrategy] = None) -> ChartStream:
+    """按步长遍历 [start, end) 逐个排盘，返回可迭代的 ChartStream（见 ChartStream）"""
+    return ChartStream(start, end, step, cache=cache, lazy=lazy, cursor=cursor, ju_strategy=ju_strategy)
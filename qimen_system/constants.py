@@ -20,9 +20,7 @@ class TianGan(Enum):
     GUI = 10  # 癸
     
     def __str__(self):
-        names = {1: "甲", 2: "乙", 3: "丙", 4: "丁", 5: "戊", 
-                6: "己", 7: "庚", 8: "辛", 9: "壬", 10: "癸"}
-        return names[self.value]
+        return TIANGAN_NAMES[self.value]
 
 class DiZhi(Enum):
     """地支枚举"""
@@ -40,10 +38,7 @@ class DiZhi(Enum):
     HAI = 12  # 亥
     
     def __str__(self):
-        names = {1: "子", 2: "丑", 3: "寅", 4: "卯", 5: "辰", 
-                6: "巳", 7: "午", 8: "未", 9: "申", 10: "酉", 
-                11: "戌", 12: "亥"}
-        return names[self.value]
+        return DIZHI_NAMES[self.value]
 
 class Men(Enum):
     """八门枚举"""
@@ -57,9 +52,7 @@ class Men(Enum):
     KAI = 8   # 开门
     
     def __str__(self):
-        names = {1: "休门", 2: "生门", 3: "伤门", 4: "杜门", 
-                5: "景门", 6: "死门", 7: "惊门", 8: "开门"}
-        return names[self.value]
+        return MEN_NAMES[self.value]
 
 class Shen(Enum):
     """八神枚举"""
@@ -73,9 +66,7 @@ class Shen(Enum):
     JIUDI = 8     # 九地
     
     def __str__(self):
-        names = {1: "值符", 2: "螣蛇", 3: "太阴", 4: "六合", 
-                5: "白虎", 6: "玄武", 7: "九天", 8: "九地"}
-        return names[self.value]
+        return SHEN_NAMES[self.value]
 
 class Star(Enum):
     """九星枚举"""
@@ -90,9 +81,7 @@ class Star(Enum):
     TIANYING = 9   # 天英
     
     def __str__(self):
-        names = {1: "天蓬", 2: "天芮", 3: "天冲", 4: "天辅", 
-                5: "天禽", 6: "天心", 7: "天柱", 8: "天任", 9: "天英"}
-        return names[self.value]
+        return STAR_NAMES[self.value]
 
 class Palace(Enum):
     """九宫枚举"""
@@ -107,9 +96,7 @@ class Palace(Enum):
     LI = 9     # 离九宫
     
     def __str__(self):
-        names = {1: "坎一宫", 2: "坤二宫", 3: "震三宫", 4: "巽四宫", 
-                5: "中五宫", 6: "乾六宫", 7: "兑七宫", 8: "艮八宫", 9: "离九宫"}
-        return names[self.value]
+        return PALACE_NAMES[self.value]
 
 # 节气数据
 JIEQI_LIST = [
@@ -124,4 +111,27 @@ JIEQI_APPROX_DATES = [
     (5, 5), (5, 21), (6, 6), (6, 21), (7, 7), (7, 23),
     (8, 8), (8, 23), (9, 8), (9, 23), (10, 8), (10, 23),
     (11, 7), (11, 22), (12, 7), (12, 22), (1, 6), (1, 20)
-]
\ No newline at end of file
+]
+
+# 十二长生状态
+CHANGSHENG_STATES = [
+    "长生", "沐浴", "冠带", "临官", "帝旺",
+    "衰", "病", "死", "墓", "绝", "胎", "养"
+]
+
+# 名称表：下标为枚举值，0 表示空
+TIANGAN_NAMES = (None, "甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸")
+DIZHI_NAMES = (None, "子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥")
+MEN_NAMES = (None, "休门", "生门", "伤门", "杜门", "景门", "死门", "惊门", "开门")
+SHEN_NAMES = (None, "值符", "螣蛇", "太阴", "六合", "白虎", "玄武", "九天", "九地")
+STAR_NAMES = (None, "天蓬", "天芮", "天冲", "天辅", "天禽", "天心", "天柱", "天任", "天英")
+PALACE_NAMES = (None, "坎一宫", "坤二宫", "震三宫", "巽四宫", "中五宫", "乾六宫", "兑七宫", "艮八宫", "离九宫")
+CHANGSHENG_NAMES = (None,) + tuple(CHANGSHENG_STATES)
+
+# 枚举成员表：下标为枚举值，0 表示空
+TIANGAN_MEMBERS = (None,) + tuple(TianGan)
+DIZHI_MEMBERS = (None,) + tuple(DiZhi)
+MEN_MEMBERS = (None,) + tuple(Men)
+SHEN_MEMBERS = (None,) + tuple(Shen)
+STAR_MEMBERS = (None,) + tuple(Star)
+PALACE_MEMBERS = (None,) + tuple(Palace)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+整数编码计算核心
+天干、地支、九星、八门、八神在各计算步骤之间均以枚举值（小整数）传递，
+宫位数据为按宫位下标（0 为坎一宫）排列的 9 元整数列表，0 表示空，
+名称只在输出时通过 constants 中的名称表转换
+"""
+
+from typing import List, Tuple
+from .board import Board, FLAG_RUMU
+from .jieqi_table import days_from_civil
+
+# 阴阳遁
+YANG = "阳"
+YIN = "阴"
+
+# ---------- 四柱 ----------
+
+# 五虎遁：年干 → 寅月月干
+WUHUDUN = (0, 3, 5, 7, 9, 1, 3, 5, 7, 9, 1)
+
+# 五鼠遁：日干 → 子时时干
+WUSHUDUN = (0, 1, 3, 5, 7, 9, 1, 3, 5, 7, 9)
+
+# 时辰地支：下标为小时
+HOUR_ZHI = (1, 2, 2, 3, 3, 4, 4, 5, 5, 6, 6, 7, 7, 8, 8, 9, 9, 10, 10, 11, 11, 12, 12, 1)
+
+# 1970-01-01（days_from_civil 的起点）的日柱六十甲子序号（0 为甲子）：辛巳
+DAY_NUMBER_OFFSET = 17
+
+def _one_based(value: int, modulus: int) -> int:
+    """取模并将 0 映射为模数本身"""
+    return value % modulus or modulus
+
+def true_solar_hour(hour: int, minute: int) -> int:
+    """真太阳时（简化版）：北京时间减15分钟，时辰改变时保持原时"""
+    adjusted_hour = hour - 1 if minute < 15 else hour
+    if adjusted_hour < 0:
+        adjusted_hour += 24
+    if (hour + 1) // 2 % 12 != (adjusted_hour + 1) // 2 % 12:
+        return hour
+    return adjusted_hour
+
+def nian_zhu(solar_year: int) -> Tuple[int, int]:
+    """年柱：年干 = (年份 - 3) % 10，年支 = (年份 - 3) % 12"""
+    return _one_based(solar_year - 3, 10), _one_based(solar_year - 3, 12)
+
+def yue_zhu(nian_gan: int, term_index: int) -> Tuple[int, int]:
+    """月柱：月支由节气确定，月干按五虎遁从寅月推算"""
+    yue_zhi = _one_based(term_index // 2 + 3, 12)
+    yue_gan = _one_based(WUHUDUN[nian_gan] + (yue_zhi - 3) % 12, 10)
+    return yue_gan, yue_zhi
+
+def ri_zhu(year: int, month: int, day: int) -> Tuple[int, int]:
+    """日柱：干支逐日循环，由自 1970-01-01 起的天数对 60 取模得到，适用于任意前推格里历日期"""
+    index = (days_from_civil(year, month, day) + DAY_NUMBER_OFFSET) % 60
+    return index % 10 + 1, index % 12 + 1
+
+def ganzhi_index(gan: int, zhi: int) -> int:
+    """干支枚举值 → 六十甲子序号（0 为甲子）"""
+    return (6 * (gan - 1) - 5 * (zhi - 1)) % 60
+
+def shi_zhu(ri_gan: int, hour: int) -> Tuple[int, int]:
+    """时柱：时支按时辰划分，时干按五鼠遁从子时推算"""
+    shi_zhi = HOUR_ZHI[hour]
+    return _one_based(WUSHUDUN[ri_gan] + shi_zhi - 1, 10), shi_zhi
+
+# ---------- 定局 ----------
+
+# 阳遁月份（简化：按公历月份）
+YANG_MONTHS = frozenset((11, 12, 1, 2, 3, 4, 5))
+
+def calculate_ju(month: int, ri_gan: int, ri_zhi: int) -> Tuple[str, int]:
+    """阴阳遁和局数（简化：局数由日干支推算）"""
+    yinyang = YANG if month in YANG_MONTHS else YIN
+    return yinyang, _one_based(ri_gan + ri_zhi, 9)
+
+# ---------- 排盘 ----------
+
+# 各局戊的起始宫位下标
+DI_PAN_START = (0, 3, 3, 3, 0, 0, 0, 6, 6, 6)
+
+# 三奇六仪顺序
+YANG_SEQUENCE = (5, 6, 7, 8, 9, 10, 4, 3, 2)  # 戊己庚辛壬癸丁丙乙
+YIN_SEQUENCE = (5, 3, 4, 10, 9, 8, 7, 6, 2)   # 戊丙丁癸壬辛庚己乙
+
+# 时干 → 值符星（甲取天蓬）
+ZHIFU_STAR = (0, 1, 9, 8, 7, 1, 2, 3, 4, 5, 6)
+
+# 八神顺序
+YANG_SHEN_ORDER = (1, 2, 3, 4, 5, 6, 8, 7)  # 值符 螣蛇 太阴 六合 白虎 玄武 九地 九天
+YIN_SHEN_ORDER = (1, 7, 8, 6, 5, 4, 3, 2)   # 值符 九天 九地 玄武 白虎 六合 太阴 螣蛇
+
+# 天干长生位（地支编号）
+CHANGSHENG_POSITION = (0, 12, 8, 3, 10, 3, 10, 6, 1, 9, 4)
+
+# 各宫对应的地支编号（简化）
+PALACE_DIZHI = (1, 8, 3, 5, 5, 7, 10, 2, 7)
+
+# 驿马：日支 → 驿马地支
+YIMA = (0, 7, 8, 9, 10, 11, 12, 1, 2, 3, 4, 5, 6)
+
+# 天乙贵人：日干 → 两个贵人地支
+GUIREN = (
+    (0, 0),
+    (2, 8), (1, 9), (12, 10), (12, 10), (2, 8),
+    (1, 9), (2, 8), (3, 7), (6, 4), (6, 4)
+)
+
+# 中五宫下标（无门、无神）
+CENTER = 4
+
+def pai_di_pan(yinyang: str, ju: int) -> List[int]:
+    """排地盘 - 三奇六仪"""
+    start = DI_PAN_START[ju]
+    sequence = YANG_SEQUENCE if yinyang == YANG else YIN_SEQUENCE
+    tiangan = [0] * 9
+    for i, gan in enumerate(sequence):
+        tiangan[(start + i) % 9] = gan
+    return tiangan
+
+def pai_tian_pan(tiangan: List[int], shi_gan: int) -> List[int]:
+    """排天盘 - 九星，时干不在地盘（甲）时不排"""
+    stars = [0] * 9
+    if shi_gan not in tiangan:
+        return stars
+    position = tiangan.index(shi_gan)
+    star_index = ZHIFU_STAR[shi_gan] - 1
+    for i in range(9):
+        stars[(position + i) % 9] = (star_index + i) % 9 + 1
+    return stars
+
+def pai_men(ju: int, shi_zhi: int) -> List[int]:
+    """排八门（中五宫无门）"""
+    men = [0] * 9
+    men_index = (shi_zhi - 1) % 8
+    start = (ju - 1) % 9
+    count = 0
+    for i in range(9):
+        index = (start + i) % 9
+        if index != CENTER:
+            men[index] = (men_index + count) % 8 + 1
+            count += 1
+    return men
+
+def pai_shen(yinyang: str, stars: List[int]) -> List[int]:
+    """排八神（中五宫无神），从第一个有星的宫位起排"""
+    shen = [0] * 9
+    start = next((i for i, star in enumerate(stars) if star), None)
+    if start is None:
+        return shen
+    order = YANG_SHEN_ORDER if yinyang == YANG else YIN_SHEN_ORDER
+    count = 0
+    for i in range(9):
+        index = (start + i) % 9
+        if index != CENTER:
+            shen[index] = order[count % 8]
+            count += 1
+    return shen
+
+def check_special_conditions(tiangan: List[int]) -> List[int]:
+    """特殊条件标记位（简化：丙、丁、戊临坤二宫为入墓）"""
+    flags = [0] * 9
+    if tiangan[1] in (3, 4, 5):
+        flags[1] |= FLAG_RUMU
+    return flags
+
+def calculate_changsheng(tiangan: List[int]) -> List[int]:
+    """十二长生状态编号（CHANGSHENG_STATES 下标 + 1），阳干顺行，阴干逆行"""
+    changsheng = [0] * 9
+    for i, gan in enumerate(tiangan):
+        if gan:
+            if gan % 2:
+                diff = (PALACE_DIZHI[i] - CHANGSHENG_POSITION[gan]) % 12
+            else:
+                diff = (CHANGSHENG_POSITION[gan] - PALACE_DIZHI[i]) % 12
+            changsheng[i] = diff + 1
+    return changsheng
+
+def calculate_yima_and_guiren(ri_gan: int, ri_zhi: int) -> Tuple[int, Tuple[int, int]]:
+    """驿马（按日支）和天乙贵人（按日干）"""
+    return YIMA[ri_zhi], GUIREN[ri_gan]
+
+def pai_pan(yinyang: str, ju: int, ri_gan: int, ri_zhi: int,
+            shi_gan: int, shi_zhi: int) -> Board:
+    """完整排盘，返回紧凑盘面"""
+    tiangan = pai_di_pan(yinyang, ju)
+    stars = pai_tian_pan(tiangan, shi_gan)
+    men = pai_men(ju, shi_zhi)
+    shen = pai_shen(yinyang, stars)
+    flags = check_special_conditions(tiangan)
+    changsheng = calculate_changsheng(tiangan)
+    yima, guiren = calculate_yima_and_guiren(ri_gan, ri_zhi)
+    return Board.from_layers(tiangan, stars, men, shen, changsheng, flags, yima, guiren)
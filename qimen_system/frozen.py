@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+只读结果
+排盘结果在多个线程间共享时不应被任何一方修改，结果中的字典转为 FrozenDict、列表转为元组。
+FrozenDict 是 dict 的子类，可直接 JSON 编码（json、orjson）、与普通字典比较和 pickle。
+需要修改结果时用 thaw 得到可变的副本。
+"""
+
+from typing import Any
+
+class FrozenDict(dict):
+    """只读字典，修改时抛出 TypeError"""
+    
+    __slots__ = ()
+    
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} 只读，请先用 dict(...) 复制")
+    
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+    
+    def __repr__(self) -> str:
+        return f"FrozenDict({dict.__repr__(self)})"
+
+def freeze(obj: Any) -> Any:
+    """递归转为只读结构：字典 → FrozenDict，列表和元组 → 元组，其余原样返回"""
+    if isinstance(obj, FrozenDict):
+        return obj
+    if isinstance(obj, dict):
+        return FrozenDict({key: freeze(value) for key, value in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(value) for value in obj)
+    return obj
+
+def thaw(obj: Any) -> Any:
+    """递归复制为可变结构：字典（含 FrozenDict）→ dict，列表和元组 → 列表，其余原样返回"""
+    if isinstance(obj, dict):
+        return {key: thaw(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(value) for value in obj]
+    return obj
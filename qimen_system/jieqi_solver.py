@@ -0,0 +1,402 @@
+# -*- coding: utf-8 -*-
+"""
+节气时刻求解
+按太阳视黄经求任意年份二十四节气的交节时刻（纯 Python，无需星历服务），
+用于节气时刻表范围之外的年份，每年的结果只计算一次并缓存
+"""
+
+import math
+import datetime
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Tuple
+from .jieqi_table import JieQiTable
+
+# 每年缓存的年数上限
+CACHE_SIZE = 64
+
+# 每年按时间顺序的节气黄经：小寒 285°、大寒 300°、立春 315° …… 冬至 270°
+TERM_LONGITUDES = tuple((285 + 15 * i) % 360 for i in range(24))
+
+# 回归年长度（日）
+TROPICAL_YEAR = 365.2422
+
+# 1900-01-01 00:00 北京时间对应的儒略日（世界时），与节气时刻表一致
+EPOCH_JD = 2415020.5 - 8 / 24
+
+# VSOP87D 地球日心坐标周期项（截取自 Meeus《天文算法》附录三的项数）
+# 每项为 (A, B, C)，贡献为 A * cos(B + C * tau)，单位 1e-8 弧度 / 1e-8 AU
+_EARTH_L = (
+    (  # L0
+        (175347046, 0.00000000, 0.00000000),
+        (3341656, 4.66925680, 6283.07584999),
+        (34894, 4.62610242, 12566.15169998),
+        (3497, 2.74411801, 5753.38488490),
+        (3418, 2.82886580, 3.52311835),
+        (3136, 3.62767042, 77713.77146812),
+        (2676, 4.41808351, 7860.41939244),
+        (2343, 6.13516238, 3930.20969622),
+        (1324, 0.74246356, 11506.76976979),
+        (1273, 2.03709656, 529.69096509),
+        (1199, 1.10962944, 1577.34354245),
+        (990, 5.23268130, 5884.92684658),
+        (902, 2.04505444, 26.29831980),
+        (857, 3.50849157, 398.14900341),
+        (780, 1.17882652, 5223.69391980),
+        (753, 2.53339054, 5507.55323867),
+        (505, 4.58292563, 18849.22754997),
+        (492, 4.20506640, 775.52261132),
+        (357, 2.91954117, 0.06731030),
+        (317, 5.84901952, 11790.62908866),
+        (284, 1.89869034, 796.29800682),
+        (271, 0.31488608, 10977.07880470),
+        (243, 0.34481141, 5486.77784318),
+        (206, 4.80646606, 2544.31441988),
+        (205, 1.86947814, 5573.14280143),
+        (202, 2.45767795, 6069.77675455),
+        (156, 0.83306074, 213.29909544),
+        (132, 3.41118276, 2942.46342329),
+        (126, 1.08302630, 20.77539549),
+        (115, 0.64544912, 0.98032107),
+        (103, 0.63599847, 4694.00295471),
+        (102, 0.97569222, 15720.83878488),
+        (102, 4.26679821, 7.11354700),
+        (99, 6.20992940, 2146.16541648),
+        (98, 0.68101272, 155.42039943),
+        (86, 5.98322631, 161000.68573767),
+        (85, 1.29870743, 6275.96230299),
+        (85, 3.67080093, 71430.69561813),
+        (80, 1.80791331, 17260.15465469),
+        (79, 3.03698313, 12036.46073489),
+        (75, 1.75508916, 5088.62883977),
+        (74, 3.50319443, 3154.68708490),
+        (74, 4.67926565, 801.82093112),
+        (70, 0.83297597, 9437.76293489),
+        (62, 3.97763881, 8827.39026987),
+        (61, 1.81839811, 7084.89678112),
+        (57, 2.78430398, 6286.59896834),
+        (56, 4.38694881, 14143.49524243),
+        (56, 3.47006009, 6279.55273164),
+        (52, 0.18914946, 12139.55350911),
+        (52, 1.33282747, 1748.01641307),
+        (51, 0.28306865, 5856.47765912),
+        (49, 0.48735065, 1194.44701022),
+        (41, 5.36817351, 8429.24126647),
+        (41, 2.39850882, 19651.04848110),
+        (39, 6.16832995, 10447.38783960),
+        (37, 6.04133859, 10213.28554621),
+        (37, 2.56955239, 1059.38193019),
+        (36, 1.70876112, 2352.86615377),
+        (36, 1.77597315, 6812.76681509),
+        (33, 0.59309499, 17789.84561978),
+        (30, 0.44294464, 83996.84731811),
+        (30, 2.73975124, 1349.86740966),
+        (25, 3.16470953, 4690.47983636),
+    ),
+    (  # L1
+        (628331966747, 0.00000000, 0.00000000),
+        (206059, 2.67823456, 6283.07584999),
+        (4303, 2.63512650, 12566.15169998),
+        (425, 1.59046981, 3.52311835),
+        (119, 5.79557488, 26.29831980),
+        (109, 2.96618002, 1577.34354245),
+        (93, 2.59212835, 18849.22754997),
+        (72, 1.13846158, 529.69096509),
+        (68, 1.87472305, 398.14900341),
+        (67, 4.40918235, 5507.55323867),
+        (59, 2.88797038, 5223.69391980),
+        (56, 2.17471680, 155.42039943),
+        (45, 0.39803080, 796.29800682),
+        (36, 0.46624740, 775.52261132),
+        (29, 2.64707384, 7.11354700),
+        (21, 5.34138275, 0.98032107),
+        (19, 1.84628333, 5486.77784318),
+        (19, 4.96855125, 213.29909544),
+        (17, 2.99116865, 6275.96230299),
+        (16, 0.03216483, 2544.31441988),
+        (16, 1.43049285, 2146.16541648),
+        (15, 1.20532366, 10977.07880470),
+        (12, 2.83432286, 1748.01641307),
+        (12, 3.25804816, 5088.62883977),
+        (12, 5.27379790, 1194.44701022),
+        (12, 2.07502418, 4694.00295471),
+        (11, 0.76614199, 553.56940284),
+        (10, 1.30262991, 6286.59896834),
+        (10, 4.23925472, 1349.86740966),
+        (9, 2.69957063, 242.72860397),
+        (9, 5.64475868, 951.71840625),
+        (8, 5.30062665, 2352.86615377),
+        (6, 2.65033985, 9437.76293489),
+        (6, 4.66632584, 4690.47983636),
+    ),
+    (  # L2
+        (52919, 0.00000000, 0.00000000),
+        (8720, 1.07209665, 6283.07584999),
+        (309, 0.86728819, 12566.15169998),
+        (27, 0.05297872, 3.52311835),
+        (16, 5.18826691, 26.29831980),
+        (16, 3.68457889, 155.42039943),
+        (10, 0.75742298, 18849.22754997),
+        (9, 2.05705419, 77713.77146812),
+        (7, 0.82673305, 775.52261132),
+        (5, 4.66284525, 1577.34354245),
+        (4, 1.03057163, 7.11354700),
+        (4, 3.44050803, 5573.14280143),
+        (3, 5.14074633, 796.29800682),
+        (3, 6.05291851, 5507.55323867),
+        (3, 1.19246506, 242.72860397),
+        (3, 6.11652627, 529.69096509),
+        (3, 0.30637881, 398.14900341),
+        (3, 2.27992811, 553.56940284),
+        (2, 4.38118838, 5223.69391980),
+        (2, 3.75435330, 0.98032107),
+    ),
+    (  # L3
+        (289, 5.84384199, 6283.07584999),
+        (35, 0.00000000, 0.00000000),
+        (17, 5.48766912, 12566.15169998),
+        (3, 5.19577265, 155.42039943),
+        (1, 4.72200252, 3.52311835),
+        (1, 5.30045809, 18849.22754997),
+        (1, 5.96925937, 242.72860397),
+    ),
+    (  # L4
+        (114, 3.14159265, 0.00000000),
+        (8, 4.13446589, 6283.07584999),
+        (1, 3.83803776, 12566.15169998),
+    ),
+    (  # L5
+        (1, 3.14159265, 0.00000000),
+    ),
+)
+
+_EARTH_B = (
+    (  # B0
+        (280, 3.19870156, 84334.66158131),
+        (102, 5.42248619, 5507.55323867),
+        (80, 3.88013204, 5223.69391980),
+        (44, 3.70444690, 2352.86615377),
+        (32, 4.00026370, 1577.34354245),
+    ),
+    (  # B1
+        (9, 3.89729062, 5507.55323867),
+        (6, 1.73038850, 5223.69391980),
+    ),
+)
+
+_EARTH_R = (
+    (  # R0
+        (100013989, 0.00000000, 0.00000000),
+        (1670700, 3.09846351, 6283.07584999),
+        (13956, 3.05524610, 12566.15169998),
+        (3084, 5.19846674, 77713.77146812),
+        (1628, 1.17387749, 5753.38488490),
+        (1576, 2.84685246, 7860.41939244),
+        (925, 5.45292234, 11506.76976979),
+        (542, 4.56409150, 3930.20969622),
+        (472, 3.66100022, 5884.92684658),
+        (346, 0.96368618, 5507.55323867),
+        (329, 5.89983646, 5223.69391980),
+        (307, 0.29867140, 5573.14280143),
+        (243, 4.27349536, 11790.62908866),
+        (212, 5.84714540, 1577.34354245),
+        (186, 5.02194447, 10977.07880470),
+        (175, 3.01193637, 18849.22754997),
+        (110, 5.05510636, 5486.77784318),
+        (98, 0.88681311, 6069.77675455),
+        (86, 5.68959778, 15720.83878488),
+        (86, 1.27083733, 161000.68573767),
+        (65, 0.27250614, 17260.15465469),
+        (63, 0.92177109, 529.69096509),
+        (57, 2.01374292, 83996.84731811),
+        (56, 5.24159799, 71430.69561813),
+        (49, 3.24501240, 2544.31441988),
+        (47, 2.57805070, 775.52261132),
+        (45, 5.53715807, 9437.76293489),
+        (43, 6.01110242, 6275.96230299),
+        (39, 5.36071738, 4694.00295471),
+        (38, 2.39255344, 8827.39026987),
+        (37, 0.82952922, 19651.04848110),
+        (37, 4.90107592, 12139.55350911),
+        (36, 1.67468059, 12036.46073489),
+        (35, 1.84270693, 2942.46342329),
+        (33, 0.24370300, 7084.89678112),
+        (32, 0.18368230, 5088.62883977),
+        (32, 1.77775642, 398.14900341),
+        (28, 1.21344868, 6286.59896834),
+        (28, 1.89934331, 6279.55273164),
+        (26, 4.58896850, 10447.38783960),
+    ),
+    (  # R1
+        (103019, 1.10748970, 6283.07584999),
+        (1721, 1.06442301, 12566.15169998),
+        (702, 3.14159265, 0.00000000),
+        (32, 1.02169059, 18849.22754997),
+        (31, 2.84353805, 5507.55323867),
+        (25, 1.31906709, 5223.69391980),
+        (18, 1.42429749, 1577.34354245),
+        (10, 5.91378195, 10977.07880470),
+        (9, 1.42046854, 6275.96230299),
+        (9, 0.27146151, 5486.77784318),
+    ),
+    (  # R2
+        (4359, 5.78455134, 6283.07584999),
+        (124, 5.57934722, 12566.15169998),
+        (12, 3.14159265, 0.00000000),
+        (9, 3.62777733, 77713.77146812),
+        (6, 1.86958905, 5573.14280143),
+        (3, 5.47027913, 18849.22754997),
+    ),
+    (  # R3
+        (145, 4.27319435, 6283.07584999),
+        (7, 3.91697609, 12566.15169998),
+    ),
+    (  # R4
+        (4, 2.56384387, 6283.07584999),
+    ),
+)
+
+def delta_t(year: float) -> float:
+    """地球时与世界时之差 ΔT（秒），Espenak & Meeus 多项式"""
+    if year < -500:
+        u = (year - 1820) / 100
+        return -20 + 32 * u ** 2
+    if year < 500:
+        u = year / 100
+        return (10583.6 - 1014.41 * u + 33.78311 * u ** 2 - 5.952053 * u ** 3
+                - 0.1798452 * u ** 4 + 0.022174192 * u ** 5 + 0.0090316521 * u ** 6)
+    if year < 1600:
+        u = (year - 1000) / 100
+        return (1574.2 - 556.01 * u + 71.23472 * u ** 2 + 0.319781 * u ** 3
+                - 0.8503463 * u ** 4 - 0.005050998 * u ** 5 + 0.0083572073 * u ** 6)
+    if year < 1700:
+        t = year - 1600
+        return 120 - 0.9808 * t - 0.01532 * t ** 2 + t ** 3 / 7129
+    if year < 1800:
+        t = year - 1700
+        return (8.83 + 0.1603 * t - 0.0059285 * t ** 2 + 0.00013336 * t ** 3
+                - t ** 4 / 1174000)
+    if year < 1860:
+        t = year - 1800
+        return (13.72 - 0.332447 * t + 0.0068612 * t ** 2 + 0.0041116 * t ** 3
+                - 0.00037436 * t ** 4 + 0.0000121272 * t ** 5
+                - 0.0000001699 * t ** 6 + 0.000000000875 * t ** 7)
+    if year < 1900:
+        t = year - 1860
+        return (7.62 + 0.5737 * t - 0.251754 * t ** 2 + 0.01680668 * t ** 3
+                - 0.0004473624 * t ** 4 + t ** 5 / 233174)
+    if year < 1920:
+        t = year - 1900
+        return (-2.79 + 1.494119 * t - 0.0598939 * t ** 2 + 0.0061966 * t ** 3
+                - 0.000197 * t ** 4)
+    if year < 1941:
+        t = year - 1920
+        return 21.20 + 0.84493 * t - 0.076100 * t ** 2 + 0.0020936 * t ** 3
+    if year < 1961:
+        t = year - 1950
+        return 29.07 + 0.407 * t - t ** 2 / 233 + t ** 3 / 2547
+    if year < 1986:
+        t = year - 1975
+        return 45.45 + 1.067 * t - t ** 2 / 260 - t ** 3 / 718
+    if year < 2005:
+        t = year - 2000
+        return (63.86 + 0.3345 * t - 0.060374 * t ** 2 + 0.0017275 * t ** 3
+                + 0.000651814 * t ** 4 + 0.00002373599 * t ** 5)
+    if year < 2050:
+        t = year - 2000
+        return 62.92 + 0.32217 * t + 0.005589 * t ** 2
+    if year < 2150:
+        return -20 + 32 * ((year - 1820) / 100) ** 2 - 0.5628 * (2150 - year)
+    u = (year - 1820) / 100
+    return -20 + 32 * u ** 2
+
+
+def _sum_series(series, tau: float) -> float:
+    """计算 VSOP87 级数"""
+    total = 0.0
+    for power, terms in enumerate(series):
+        subtotal = 0.0
+        for a, b, c in terms:
+            subtotal += a * math.cos(b + c * tau)
+        total += subtotal * tau ** power
+    return total / 1e8
+
+
+def apparent_longitude(jde: float) -> float:
+    """太阳视黄经（度），jde 为力学时儒略日"""
+    tau = (jde - 2451545.0) / 365250
+    t = tau * 10
+    
+    # 地心太阳几何黄经、黄纬
+    longitude = math.degrees(_sum_series(_EARTH_L, tau)) + 180
+    radius = _sum_series(_EARTH_R, tau)
+    
+    # 转换到 FK5 坐标系
+    longitude -= 0.09033 / 3600
+    
+    # 黄经章动（简化，精度约 0.5"）
+    omega = math.radians(125.04452 - 1934.136261 * t)
+    sun_mean = math.radians(280.4665 + 36000.7698 * t)
+    moon_mean = math.radians(218.3165 + 481267.8813 * t)
+    nutation = (-17.20 * math.sin(omega) - 1.32 * math.sin(2 * sun_mean)
+                - 0.23 * math.sin(2 * moon_mean) + 0.21 * math.sin(2 * omega))
+    
+    # 光行差
+    aberration = -20.4898 / radius
+    
+    return (longitude + (nutation + aberration) / 3600) % 360
+
+
+def solve_term(year: int, longitude: float) -> float:
+    """求太阳视黄经到达指定值的时刻，返回儒略日（世界时）"""
+    # 初值：按平均速度从当年春分附近推算，小寒、大寒在当年一月
+    jde = 1721058.5 + 365.2425 * year + 80 + longitude / 360 * TROPICAL_YEAR
+    if longitude >= 285:
+        jde -= TROPICAL_YEAR
+    for _ in range(20):
+        diff = (longitude - apparent_longitude(jde) + 180) % 360 - 180
+        jde += diff / 360 * TROPICAL_YEAR
+        if abs(diff) < 1e-7:
+            break
+    return jde - delta_t(year + 0.5) / 86400
+
+
+class JieQiSolver:
+    """节气时刻求解器"""
+    
+    @staticmethod
+    @lru_cache(maxsize=CACHE_SIZE)
+    def solve_year(year: int) -> Tuple[int, ...]:
+        """求一年 24 个节气的交节时刻
+        
+        按时间顺序（小寒、大寒、立春……冬至）返回自 1900-01-01 00:00（北京时间）
+        起的分钟数，编码与节气时刻表相同。
+        """
+        return tuple(math.ceil(round((solve_term(year, longitude) - EPOCH_JD) * 1440, 6))
+                     for longitude in TERM_LONGITUDES)
+    
+    @staticmethod
+    def find(year: int, month: int, day: int, hour: int = 0, minute: int = 0) -> Tuple[int, int]:
+        """求（节气年, 节气索引），只需计算当年的节气"""
+        moments = JieQiSolver.solve_year(year)
+        position = bisect_right(moments, JieQiTable.to_minutes(year, month, day, hour, minute)) - 1
+        if position < 0:
+            # 小寒之前仍属上一年冬至
+            return year - 1, 21
+        return (year if position >= 2 else year - 1), (position + 22) % 24
+    
+    @staticmethod
+    def get_term_moment(year: int, term_index: int) -> datetime.datetime:
+        """获取指定年份某节气的交节时刻（北京时间）"""
+        minutes = JieQiSolver.solve_year(year)[(term_index + 2) % 24]
+        return datetime.datetime(1900, 1, 1) + datetime.timedelta(minutes=minutes)
+    
+    @staticmethod
+    def cache_info():
+        """缓存命中统计"""
+        return JieQiSolver.solve_year.cache_info()
+    
+    @staticmethod
+    def cache_clear():
+        """清空缓存"""
+        JieQiSolver.solve_year.cache_clear()
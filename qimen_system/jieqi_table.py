@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+节气时刻表
+预先计算的 1900-2101 年节气交节时刻（北京时间，精确到分钟），
+以二分查找定位任意时刻所在的节气
+"""
+
+import os
+import sys
+import datetime
+from array import array
+from bisect import bisect_right
+from typing import Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy 仅批量查询需要
+    np = None
+
+
+def days_from_civil(year: int, month: int, day: int) -> int:
+    """公历日期转换为自 1970-01-01 起的天数（前推格里历）"""
+    year -= month <= 2
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def days_from_civil_batch(years, months, days):
+    """days_from_civil 的向量化版本（numpy 数组）"""
+    if np is None:
+        raise ImportError("批量计算需要安装 numpy")
+    years = np.asarray(years, dtype=np.int64)
+    months = np.asarray(months, dtype=np.int64)
+    y = years - (months <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * np.where(months > 2, months - 3, months + 9) + 2) // 5 + np.asarray(days) - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+class JieQiTable:
+    """节气时刻表
+    
+    时刻表按时间顺序存放每年的 24 个节气（小寒、大寒、立春……冬至），
+    数值为自 1900-01-01 00:00（北京时间）起的分钟数。
+    数据由 tools/build_jieqi_table.py 生成。
+    """
+    
+    FIRST_YEAR = 1900
+    LAST_YEAR = 2101
+    DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'data', 'jieqi_1900_2101.bin')
+    
+    # 时刻表起点 1900-01-01 对应的天数
+    EPOCH_DAYS = days_from_civil(1900, 1, 1)
+    
+    @staticmethod
+    def _load() -> array:
+        """读取节气时刻表"""
+        moments = array('i')
+        with open(JieQiTable.DATA_FILE, 'rb') as f:
+            moments.frombytes(f.read())
+        if sys.byteorder != 'little':
+            moments.byteswap()
+        return moments
+    
+    @staticmethod
+    def to_minutes(year: int, month: int, day: int, hour: int = 0, minute: int = 0) -> int:
+        """公历时刻转换为时刻表使用的分钟数"""
+        days = days_from_civil(year, month, day) - JieQiTable.EPOCH_DAYS
+        return (days * 24 + hour) * 60 + minute
+    
+    @staticmethod
+    def locate(minutes: int) -> int:
+        """返回该时刻所在节气在时刻表中的位置，超出时刻表范围时返回 -1"""
+        position = bisect_right(MOMENTS, minutes) - 1
+        if position < 0 or position >= len(MOMENTS) - 1:
+            return -1
+        return position
+    
+    @staticmethod
+    def term_index(position: int) -> int:
+        """时刻表位置对应的节气索引（JIEQI_LIST 中的位置）"""
+        return (position + 22) % 24
+    
+    @staticmethod
+    def solar_year(position: int) -> int:
+        """时刻表位置所属的节气年（以立春为岁首）"""
+        return JieQiTable.FIRST_YEAR + (position - 2) // 24
+    
+    @staticmethod
+    def find(year: int, month: int, day: int, hour: int = 0, minute: int = 0) -> Tuple[int, int]:
+        """一次查找得到（节气年, 节气索引），超出时刻表范围时返回 (-1, -1)"""
+        position = JieQiTable.locate(JieQiTable.to_minutes(year, month, day, hour, minute))
+        if position < 0:
+            return -1, -1
+        return JieQiTable.solar_year(position), JieQiTable.term_index(position)
+    
+    @staticmethod
+    def get_term_moment(year: int, term_index: int) -> datetime.datetime:
+        """获取指定年份某节气的交节时刻（北京时间）"""
+        if not (JieQiTable.FIRST_YEAR <= year <= JieQiTable.LAST_YEAR):
+            raise ValueError(f"节气时刻表仅支持{JieQiTable.FIRST_YEAR}-{JieQiTable.LAST_YEAR}年，"
+                             f"当前年份: {year}")
+        position = (year - JieQiTable.FIRST_YEAR) * 24 + (term_index + 2) % 24
+        return datetime.datetime(1900, 1, 1) + datetime.timedelta(minutes=MOMENTS[position])
+    
+    @staticmethod
+    def locate_batch(minutes):
+        """批量定位：返回时刻表位置数组，超出范围的元素为 -1"""
+        if np is None:
+            raise ImportError("批量查询需要安装 numpy")
+        moments = np.frombuffer(MOMENTS, dtype=np.int32)
+        positions = np.searchsorted(moments, np.asarray(minutes, dtype=np.int64), side='right') - 1
+        return np.where((positions >= 0) & (positions < len(moments) - 1), positions, -1)
+    
+    @staticmethod
+    def find_batch(years, months, days, hours, minutes) -> Tuple:
+        """批量查找：返回（节气年数组, 节气索引数组），超出范围的元素均为 -1"""
+        if np is None:
+            raise ImportError("批量查询需要安装 numpy")
+        day_numbers = days_from_civil_batch(years, months, days) - JieQiTable.EPOCH_DAYS
+        positions = JieQiTable.locate_batch(
+            (day_numbers * 24 + np.asarray(hours)) * 60 + np.asarray(minutes))
+        valid = positions >= 0
+        return (np.where(valid, JieQiTable.FIRST_YEAR + (positions - 2) // 24, -1),
+                np.where(valid, (positions + 22) % 24, -1))
+
+
+# 节气时刻表（导入时加载一次，约 19KB）
+MOMENTS = JieQiTable._load()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+定局方法
+阴阳遁和局数由节气和上中下元确定，不同流派的区别在于某日归属哪个节气：
+    拆补法  以交节时刻为界，元由当日的符头（甲、己日）决定
+    置闰法  每个节气的上元从符头起算，符头超前节气（超神）过多时在芒种、大雪之后置闰
+各节气三元的局数在导入时编成 节气 × 元 查找表，置闰法另在导入时把节气时刻表范围内
+每 15 日（一个节气的三元）归属的节气编成表，任一时刻定局只需查表。
+
+默认沿用原有的简化算法（按公历月份分阴阳遁，局数由日干支推算），可按排盘或批量任务选择。
+"""
+
+from typing import Dict, Tuple, Union
+from .constants import JIEQI_LIST
+from .jieqi_table import JieQiTable, MOMENTS, days_from_civil, days_from_civil_batch
+from . import core
+
+try:
+    import numpy as np
+except ImportError:  # numpy 仅批量计算需要
+    np = None
+
+YUAN_NAMES = ('上元', '中元', '下元')
+
+# 各节气的阴阳遁和上、中、下元局数（拆补、置闰通用）
+TERM_JU = {
+    '冬至': (core.YANG, (1, 7, 4)), '惊蛰': (core.YANG, (1, 7, 4)),
+    '小寒': (core.YANG, (2, 8, 5)), '大寒': (core.YANG, (3, 9, 6)),
+    '春分': (core.YANG, (3, 9, 6)), '立春': (core.YANG, (8, 5, 2)),
+    '雨水': (core.YANG, (9, 6, 3)), '清明': (core.YANG, (4, 1, 7)),
+    '立夏': (core.YANG, (4, 1, 7)), '谷雨': (core.YANG, (5, 2, 8)),
+    '小满': (core.YANG, (5, 2, 8)), '芒种': (core.YANG, (6, 3, 9)),
+    '夏至': (core.YIN, (9, 3, 6)), '白露': (core.YIN, (9, 3, 6)),
+    '小暑': (core.YIN, (8, 2, 5)), '大暑': (core.YIN, (7, 1, 4)),
+    '秋分': (core.YIN, (7, 1, 4)), '立秋': (core.YIN, (2, 5, 8)),
+    '处暑': (core.YIN, (1, 4, 7)), '寒露': (core.YIN, (6, 9, 3)),
+    '立冬': (core.YIN, (6, 9, 3)), '霜降': (core.YIN, (5, 8, 2)),
+    '小雪': (core.YIN, (5, 8, 2)), '大雪': (core.YIN, (4, 7, 1))
+}
+
+def _build_ju_table() -> Tuple[Tuple[str, int], ...]:
+    """节气 × 元 查找表：下标为 节气索引 * 3 + 元（0 上元、1 中元、2 下元），值为 (阴阳遁, 局数)"""
+    table = []
+    for term in JIEQI_LIST:
+        yinyang, numbers = TERM_JU[term]
+        table.extend((yinyang, ju) for ju in numbers)
+    return tuple(table)
+
+JU_TABLE = _build_ju_table()
+
+# 六十甲子序号 → 元：符头（甲、己日）为子午卯酉者上元，寅申巳亥者中元，辰戌丑未者下元
+YUAN_OF_DAY = tuple(index // 5 % 3 for index in range(60))
+
+# 置闰只在芒种、大雪之后进行，超神超过该天数时置闰
+ZHIRUN_TERMS = (JIEQI_LIST.index('芒种'), JIEQI_LIST.index('大雪'))
+ZHIRUN_THRESHOLD = 9
+
+def _build_zhirun_table() -> Tuple[int, bytes]:
+    """置闰法的节气表：返回 (首个上元符头的天数, 此后每 15 日依次归属的节气索引)
+    
+    天数为自 1970-01-01 起的天数；上元符头为六十甲子序号为 15 的倍数的日子（甲子、己卯、甲午、己酉）。
+    自时刻表中第一个芒种或大雪起，取交节当日或之前最近的上元符头为其上元，此后每个节气占 15 日；
+    芒种、大雪的上元符头早于交节超过 ZHIRUN_THRESHOLD 日时，该节气再重复 15 日（闰）。
+    """
+    term_days = [JieQiTable.EPOCH_DAYS + minutes // 1440 for minutes in MOMENTS]
+    position = next(p for p in range(len(MOMENTS)) if JieQiTable.term_index(p) in ZHIRUN_TERMS)
+    start = term_days[position] - (term_days[position] + core.DAY_NUMBER_OFFSET) % 15
+    block = start
+    terms = bytearray()
+    for position in range(position, len(MOMENTS) - 1):
+        term = JieQiTable.term_index(position)
+        terms.append(term)
+        if term in ZHIRUN_TERMS and term_days[position] - block > ZHIRUN_THRESHOLD:
+            terms.append(term)
+            block += 15
+        block += 15
+    return start, bytes(terms)
+
+ZHIRUN_START, ZHIRUN_TABLE = _build_zhirun_table()
+
+class JuStrategy:
+    """定局方法接口
+    
+    calculate 为单个排盘定局；calculate_batch 为批量定局，参数为自 1970-01-01 起的天数、
+    节气索引和公历月份数组，返回 (是否阴遁数组, 局数数组)。
+    """
+    
+    name = ''
+    
+    def calculate(self, sizhu_calculator) -> Tuple[str, int]:
+        raise NotImplementedError
+    
+    def calculate_batch(self, day_numbers, term_indexes, months) -> Tuple:
+        raise NotImplementedError
+    
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name}>"
+
+class SimplifiedStrategy(JuStrategy):
+    """原有的简化算法：按公历月份分阴阳遁，局数由日干支推算"""
+    
+    name = 'simplified'
+    
+    def calculate(self, sizhu_calculator) -> Tuple[str, int]:
+        ri_gan, ri_zhi = sizhu_calculator.codes[2]
+        return core.calculate_ju(sizhu_calculator.month, ri_gan, ri_zhi)
+    
+    def calculate_batch(self, day_numbers, term_indexes, months) -> Tuple:
+        index = (np.asarray(day_numbers) + core.DAY_NUMBER_OFFSET) % 60
+        ju = (index % 10 + index % 12 + 1) % 9 + 1
+        return ~np.isin(months, tuple(core.YANG_MONTHS)), ju
+
+class ChaiBuStrategy(JuStrategy):
+    """拆补法：节气以交节时刻为界，元由当日符头决定"""
+    
+    name = 'chaibu'
+    
+    def calculate(self, sizhu_calculator) -> Tuple[str, int]:
+        yuan = YUAN_OF_DAY[core.ganzhi_index(*sizhu_calculator.codes[2])]
+        return JU_TABLE[sizhu_calculator.term_index * 3 + yuan]
+    
+    def calculate_batch(self, day_numbers, term_indexes, months) -> Tuple:
+        index = (np.asarray(day_numbers) + core.DAY_NUMBER_OFFSET) % 60
+        return _lookup_batch(np.asarray(term_indexes) * 3 + index // 5 % 3)
+
+class ZhiRunStrategy(JuStrategy):
+    """置闰法：节气与符头对齐，芒种、大雪后按需置闰（支持节气时刻表范围）"""
+    
+    name = 'zhirun'
+    
+    def calculate(self, sizhu_calculator) -> Tuple[str, int]:
+        # 指定出生地时以真太阳时的日期为准，与日柱一致
+        moment = sizhu_calculator.true_solar_time or sizhu_calculator
+        offset = days_from_civil(moment.year, moment.month, moment.day) - ZHIRUN_START
+        if not 0 <= offset < len(ZHIRUN_TABLE) * 15:
+            raise ValueError(f"置闰法仅支持节气时刻表范围内的日期"
+                             f"（{JieQiTable.FIRST_YEAR}-{JieQiTable.LAST_YEAR}年），"
+                             f"当前: {moment.year}-{moment.month:02d}-{moment.day:02d}")
+        block, day = divmod(offset, 15)
+        return JU_TABLE[ZHIRUN_TABLE[block] * 3 + day // 5]
+    
+    def calculate_batch(self, day_numbers, term_indexes, months) -> Tuple:
+        offsets = np.asarray(day_numbers) - ZHIRUN_START
+        if np.any((offsets < 0) | (offsets >= len(ZHIRUN_TABLE) * 15)):
+            raise ValueError(f"置闰法仅支持节气时刻表范围内的日期"
+                             f"（{JieQiTable.FIRST_YEAR}-{JieQiTable.LAST_YEAR}年）")
+        terms = np.frombuffer(ZHIRUN_TABLE, dtype=np.uint8)[offsets // 15].astype(np.int64)
+        return _lookup_batch(terms * 3 + offsets % 15 // 5)
+
+def _lookup_batch(keys):
+    """批量查 JU_TABLE：返回 (是否阴遁数组, 局数数组)"""
+    yin = np.array([yinyang == core.YIN for yinyang, _ in JU_TABLE])
+    ju = np.array([ju for _, ju in JU_TABLE], dtype=np.int64)
+    return yin[keys], ju[keys]
+
+STRATEGIES = {
+    'simplified': SimplifiedStrategy(),
+    'chaibu': ChaiBuStrategy(),
+    'zhirun': ZhiRunStrategy()
+}
+
+# 中文名称
+ALIASES = {'简化': 'simplified', '拆补': 'chaibu', '置闰': 'zhirun'}
+
+DEFAULT_STRATEGY = 'simplified'
+
+def get_strategy(strategy: Union[str, JuStrategy] = None) -> JuStrategy:
+    """定局方法：名称（simplified/chaibu/zhirun 或 简化/拆补/置闰）或 JuStrategy 实例，None 为默认方法"""
+    if isinstance(strategy, JuStrategy):
+        return strategy
+    name = ALIASES.get(strategy, strategy) if strategy is not None else DEFAULT_STRATEGY
+    if name not in STRATEGIES:
+        raise ValueError(f"未知定局方法: {strategy}（可选: {', '.join(STRATEGIES)}）")
+    return STRATEGIES[name]
+
+def batch(years, months, days, hours, minutes,
+          strategy: Union[str, JuStrategy] = None) -> Dict[str, object]:
+    """批量定局（向量化），返回 {'yin': 是否阴遁数组, 'ju': 局数数组}"""
+    if np is None:
+        raise ImportError("批量计算需要安装 numpy")
+    strategy = get_strategy(strategy)
+    months = np.asarray(months, dtype=np.int64)
+    _, term_indexes = JieQiTable.find_batch(years, months, days, hours, minutes)
+    if np.any(term_indexes < 0):
+        raise ValueError(f"批量定局仅支持节气时刻表范围内的时刻"
+                         f"（{JieQiTable.FIRST_YEAR}-{JieQiTable.LAST_YEAR}年）")
+    yin, ju = strategy.calculate_batch(days_from_civil_batch(years, months, days), term_indexes, months)
+    return {'yin': yin, 'ju': ju}
@@ -1,11 +1,143 @@
 # -*- coding: utf-8 -*-
 """
 农历转换模块
-使用zhdate库进行公历转农历转换
+使用内置农历表（1900-2100年，内存映射读取）进行公历转农历转换，
+超出内置表范围时抛出 ValueError
 """
 
-import datetime
-from zhdate import ZhDate
+import mmap
+import os
+import struct
+import threading
+from typing import Tuple
+from .jieqi_table import days_from_civil, days_from_civil_batch
+from .metrics import instrument
+
+try:
+    import numpy as np
+except ImportError:  # numpy 仅批量转换需要
+    np = None
+
+class LunarTable:
+    """内置农历表
+    
+    每个农历年一条 8 字节记录：正月初一距 1900-01-01 的天数（int32）、
+    各月大小位图（uint16，第 k 位为 1 表示第 k 个月为 30 天，闰月按实际顺序排入）、
+    闰月月份（uint8，0 表示无闰月）和一个保留字节。
+    数据由 tools/build_lunar_table.py 生成。
+    """
+    
+    FIRST_YEAR = 1900
+    LAST_YEAR = 2100
+    DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'data', 'lunar_1900_2100.bin')
+    RECORD = struct.Struct('<iHBB')
+    EPOCH_DAYS = days_from_civil(1900, 1, 1)
+    
+    _buffer = None
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def buffer() -> mmap.mmap:
+        """内存映射的农历表（首次使用时打开，多个线程同时首次使用时只打开一次）"""
+        if LunarTable._buffer is None:
+            with LunarTable._lock:
+                if LunarTable._buffer is None:
+                    with open(LunarTable.DATA_FILE, 'rb') as f:
+                        LunarTable._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return LunarTable._buffer
+    
+    @staticmethod
+    def record(lunar_year: int) -> Tuple[int, int, int]:
+        """农历年记录：(正月初一天数, 各月大小位图, 闰月月份)"""
+        new_year, month_sizes, leap_month, _ = LunarTable.RECORD.unpack_from(
+            LunarTable.buffer(), (lunar_year - LunarTable.FIRST_YEAR) * LunarTable.RECORD.size)
+        return new_year, month_sizes, leap_month
+    
+    @staticmethod
+    def month_start(month_sizes: int, k: int) -> int:
+        """第 k 个月（从 0 起）距正月初一的天数"""
+        return 29 * k + bin(month_sizes & ((1 << k) - 1)).count('1')
+    
+    @staticmethod
+    def to_lunar(year: int, month: int, day: int) -> Tuple[int, int, int, bool]:
+        """公历转农历，返回 (农历年, 月, 日, 是否闰月)
+        
+        只需一次记录读取和常数次比较：农历年为公历年或前一年，
+        月份由已过天数估算后最多校正一次。
+        """
+        days = days_from_civil(year, month, day) - LunarTable.EPOCH_DAYS
+        lunar_year = min(year, LunarTable.LAST_YEAR)
+        if lunar_year < LunarTable.FIRST_YEAR:
+            raise ValueError(f"超出内置农历表范围: {year}-{month:02d}-{day:02d}")
+        new_year, month_sizes, leap_month = LunarTable.record(lunar_year)
+        if days < new_year:
+            lunar_year -= 1
+            if lunar_year < LunarTable.FIRST_YEAR:
+                raise ValueError(f"超出内置农历表范围: {year}-{month:02d}-{day:02d}")
+            new_year, month_sizes, leap_month = LunarTable.record(lunar_year)
+        
+        days_passed = days - new_year
+        month_count = 13 if leap_month else 12
+        # 每月 29 或 30 天，days_passed // 30 不大于实际月序，且至多相差 1
+        k = days_passed // 30
+        if k + 1 < month_count and LunarTable.month_start(month_sizes, k + 1) <= days_passed:
+            k += 1
+        lunar_day = days_passed - LunarTable.month_start(month_sizes, k) + 1
+        if k >= month_count or lunar_day > 29 + (month_sizes >> k & 1):
+            raise ValueError(f"超出内置农历表范围: {year}-{month:02d}-{day:02d}")
+        
+        # 闰月排在同名月之后
+        if leap_month and k >= leap_month:
+            return lunar_year, k, lunar_day, k == leap_month
+        return lunar_year, k + 1, lunar_day, False
+    
+    @staticmethod
+    def contains(year: int, month: int, day: int) -> bool:
+        """公历日期是否在内置农历表范围内"""
+        days = days_from_civil(year, month, day) - LunarTable.EPOCH_DAYS
+        first, _, _ = LunarTable.record(LunarTable.FIRST_YEAR)
+        last, month_sizes, leap_month = LunarTable.record(LunarTable.LAST_YEAR)
+        end = last + LunarTable.month_start(month_sizes, 13 if leap_month else 12)
+        return first <= days < end
+    
+    @staticmethod
+    def to_lunar_batch(years, months, days) -> Tuple:
+        """批量公历转农历，返回 (农历年, 月, 日, 是否闰月) 四个数组"""
+        if np is None:
+            raise ImportError("批量转换需要安装 numpy")
+        records = np.frombuffer(LunarTable.buffer(), dtype=[
+            ('new_year', '<i4'), ('month_sizes', '<u2'), ('leap_month', 'u1'), ('reserved', 'u1')])
+        
+        years = np.asarray(years, dtype=np.int64)
+        day_numbers = days_from_civil_batch(years, months, days) - LunarTable.EPOCH_DAYS
+        
+        index = np.clip(years, LunarTable.FIRST_YEAR, LunarTable.LAST_YEAR) - LunarTable.FIRST_YEAR
+        index = index - (day_numbers < records['new_year'][index])
+        if np.any(index < 0):
+            raise ValueError("超出内置农历表范围")
+        new_year = records['new_year'][index].astype(np.int64)
+        month_sizes = records['month_sizes'][index].astype(np.int64)
+        leap_month = records['leap_month'][index].astype(np.int64)
+        
+        # 各月起始天数：29 * k + 前 k 个月中大月的个数
+        k_all = np.arange(14)
+        big = (month_sizes[:, None] >> k_all[None, :]) & 1
+        starts = 29 * k_all[None, :] + np.concatenate(
+            [np.zeros((len(index), 1), dtype=np.int64), np.cumsum(big, axis=1)[:, :-1]], axis=1)
+        days_passed = day_numbers - new_year
+        k = np.minimum(days_passed // 30, 12)
+        next_start = np.take_along_axis(starts, (k + 1)[:, None], axis=1)[:, 0]
+        month_count = np.where(leap_month > 0, 13, 12)
+        k = k + ((k + 1 < month_count) & (next_start <= days_passed))
+        lunar_day = days_passed - np.take_along_axis(starts, k[:, None], axis=1)[:, 0] + 1
+        if np.any((k >= month_count) | (lunar_day > 29 + ((month_sizes >> k) & 1))):
+            raise ValueError("超出内置农历表范围")
+        
+        after_leap = (leap_month > 0) & (k >= leap_month)
+        lunar_month = np.where(after_leap, k, k + 1)
+        is_leap = after_leap & (k == leap_month)
+        return index + LunarTable.FIRST_YEAR, lunar_month, lunar_day, is_leap
 
 class LunarConverter:
     """农历转换器"""
@@ -28,11 +160,21 @@ class LunarConverter:
     }
     
     @staticmethod
+    @instrument('lunar')
     def get_lunar_date(year: int, month: int, day: int) -> str:
-        """获取农历日期"""
-        # 使用zhdate库进行转换
-        lunar_date = ZhDate.from_datetime(datetime.datetime(year, month, day))
-        return f"{lunar_date.chinese()}"
+        """获取农历日期，超出内置农历表范围时抛出 ValueError"""
+        lunar_year, lunar_month, lunar_day, is_leap = LunarTable.to_lunar(year, month, day)
+        return LunarConverter.format_lunar_date(lunar_year, lunar_month, lunar_day, is_leap)
+    
+    @staticmethod
+    def format_lunar_date(lunar_year: int, lunar_month: int, lunar_day: int, is_leap: bool) -> str:
+        """农历日期的中文表示，例如：二零二五年闰六月二十七 乙巳年 (蛇年)"""
+        zh_year = str(lunar_year).translate(_ZH_DIGITS)
+        zh_month = ('闰' if is_leap else '') + _MONTH_NAMES[lunar_month]
+        gan = LunarConverter.TIAN_GAN[(lunar_year - 4) % 10]
+        zhi = LunarConverter.DI_ZHI[(lunar_year - 4) % 12]
+        zodiac = LunarConverter.ZODIAC[(lunar_year - 4) % 12]
+        return f"{zh_year}年{zh_month}月{_DAY_NAMES[lunar_day]} {gan}{zhi}年 ({zodiac}年)"
     
     @staticmethod
     def get_lunar_year(year: int) -> str:
@@ -45,4 +187,18 @@ class LunarConverter:
     @staticmethod
     def get_dizhi_shi(hour: int) -> str:
         """获取地支时"""
-        return LunarConverter.SHI_CHEN.get(hour, "未知时")
\ No newline at end of file
+        return LunarConverter.SHI_CHEN.get(hour, "未知时")
+
+
+# 农历年份数字、月名、日名
+_ZH_NUMS = "零一二三四五六七八九十"
+_ZH_DIGITS = str.maketrans("0123456789", _ZH_NUMS[:10])
+_MONTH_NAMES = (None, "正", "二", "三", "四", "五", "六", "七", "八", "九", "十", "十一", "腊")
+_DAY_NAMES = (None,) + tuple(
+    f"初{_ZH_NUMS[d]}" if d <= 10 else
+    f"十{_ZH_NUMS[d - 10]}" if d < 20 else
+    "二十" if d == 20 else
+    f"二十{_ZH_NUMS[d - 20]}" if d < 30 else
+    "三十"
+    for d in range(1, 31)
+)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+排盘各步骤的耗时统计
+排盘、四柱和农历转换的各步骤经 instrument 装饰，启用统计（enable）后每次调用
+的耗时交给当前的统计接收器（sink）；未启用时只多一次判断。
+    
+    from qimen_system import metrics
+    sink = metrics.enable()          # 默认使用 InMemorySink
+    ...                              # 正常排盘
+    print(sink.to_prometheus())      # Prometheus 文本格式
+    metrics.disable()
+"""
+
+import bisect
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# 默认直方图分桶上界（秒）
+DEFAULT_BUCKETS = (
+    1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 1e-2
+)
+
+METRIC_NAME = 'qimen_stage_duration_seconds'
+
+class MetricsSink:
+    """统计接收器接口：实现 observe 即可接入其他监控系统"""
+    
+    def observe(self, stage: str, seconds: float):
+        raise NotImplementedError
+
+class InMemorySink(MetricsSink):
+    """内存统计：各步骤的调用次数、总耗时和耗时直方图（线程安全）"""
+    
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._stages = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, stage: str, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                # [次数, 总耗时, 各桶计数（最后一桶为 +Inf）]
+                entry = self._stages[stage] = [0, 0.0, [0] * (len(self.buckets) + 1)]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2][index] += 1
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """各步骤的统计：count、sum（秒）、mean（秒）和 buckets（上界 → 累计次数）"""
+        with self._lock:
+            stages = {stage: (count, total, list(counts))
+                      for stage, (count, total, counts) in self._stages.items()}
+        result = {}
+        for stage, (count, total, counts) in stages.items():
+            cumulative = 0
+            buckets = {}
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                buckets[bound] = cumulative
+            result[stage] = {
+                'count': count,
+                'sum': total,
+                'mean': total / count if count else 0.0,
+                'buckets': buckets
+            }
+        return result
+    
+    def to_prometheus(self, name: str = METRIC_NAME) -> str:
+        """Prometheus 文本格式（histogram），以 stage 标签区分各步骤"""
+        lines = [f"# HELP {name} 排盘各步骤耗时（秒）", f"# TYPE {name} histogram"]
+        for stage, stats in sorted(self.snapshot().items()):
+            for bound, count in stats['buckets'].items():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats["sum"]!r}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats["count"]}')
+        return '\n'.join(lines) + '\n'
+    
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+# 当前的统计接收器，None 表示未启用
+_sink: Optional[MetricsSink] = None
+
+def enable(sink: MetricsSink = None) -> MetricsSink:
+    """启用统计，返回使用的接收器（未指定时新建 InMemorySink）"""
+    global _sink
+    _sink = InMemorySink() if sink is None else sink
+    return _sink
+
+def disable():
+    """停用统计"""
+    global _sink
+    _sink = None
+
+def active_sink() -> Optional[MetricsSink]:
+    """当前的统计接收器，未启用时为 None"""
+    return _sink
+
+def instrument(stage: str) -> Callable:
+    """步骤装饰器：启用统计时记录每次调用的耗时"""
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            sink = _sink
+            if sink is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                sink.observe(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
@@ -4,317 +4,145 @@
 包含排盘算法和相关计算
 """
 
-from typing import List, Dict, Any
-from collections import deque
-from .constants import Men, Shen, Star, Palace
+from typing import List, Dict, Any, Sequence, Tuple, Union
+from .constants import (
+    TIANGAN_MEMBERS, MEN_MEMBERS, SHEN_MEMBERS, STAR_MEMBERS, PALACE_MEMBERS,
+    CHANGSHENG_NAMES, DIZHI_NAMES
+)
+from .chart_cache import ChartCache
+from .ju_strategy import JuStrategy, get_strategy
+from .board import (
+    Board, FLAG_RUMU, FLAG_JIXING, FLAG_MENPO, FLAG_KONGWANG, FLAG_YIMA, FLAG_GUIREN
+)
+from . import core
+from .frozen import FrozenDict, freeze
+from .metrics import instrument
 
 class QiMenCalculator:
-    """奇门遁甲计算器"""
+    """奇门遁甲计算器
     
-    def __init__(self, sizhu_calculator):
+    计算在 core 模块中以整数编码完成，各层结果保存在 self.layers 中；
+    self.palaces 为按需生成的宫位字典（含枚举对象），仅供兼容和展示使用。
+    
+    可重入：core 中的计算不修改输入，各层为元组，每步整体替换 self.layers（写时复制）
+    而不原地修改，多个线程同时调用各步骤或读取结果时不会看到不一致的中间状态；
+    get_result 返回只读结构（见 frozen 模块）。
+    """
+    
+    def __init__(self, sizhu_calculator, ju_strategy: Union[str, JuStrategy] = None):
+        """ju_strategy 为定局方法（见 ju_strategy 模块），默认为原有的简化算法"""
         self.sizhu_calculator = sizhu_calculator
-        self.sizhu = self.sizhu_calculator.get_sizhu()
-        self.palaces = self._initialize_palaces()
+        self.ju_strategy = get_strategy(ju_strategy)
+        self.sizhu = freeze(self.sizhu_calculator.get_sizhu())
+        (self.ri_gan, self.ri_zhi), (self.shi_gan, self.shi_zhi) = \
+            self.sizhu_calculator.get_sizhu_codes()[2:]
+        self.layers = self._initialize_layers()
+        # (生成时的 self.layers, 九宫格)
+        self._palaces = (None, None)
+        self.yima_code = 0
+        self.guiren_codes = (0, 0)
         self.yinyang, self.ju = self.calculate_ju()
     
-    def _initialize_palaces(self) -> List[Dict[str, Any]]:
-        """初始化九宫格"""
+    @staticmethod
+    def _initialize_layers() -> Dict[str, Tuple[int, ...]]:
+        """初始化各层数据（按宫位下标排列，0 表示空）"""
+        return {
+            'tiangan': (0,) * 9,     # 天干（三奇六仪）
+            'star': (0,) * 9,        # 九星
+            'men': (0,) * 9,         # 八门
+            'shen': (0,) * 9,        # 八神
+            'changsheng': (0,) * 9,  # 长生状态
+            'flags': (0,) * 9        # 入墓、击刑、门迫、空亡、驿马、贵人标记位
+        }
+    
+    @staticmethod
+    def _initialize_palaces(layers: Dict[str, Tuple[int, ...]]) -> List[Dict[str, Any]]:
+        """由各层数据生成九宫格"""
         palaces = []
         for i in range(9):
+            flags = layers['flags'][i]
             palace = {
                 'number': i + 1,
-                'name': Palace(i + 1),
-                'tiangan': None,    # 天干（三奇六仪）
-                'star': None,       # 九星
-                'men': None,        # 八门
-                'shen': None,       # 八神
-                'dizhi': None,      # 地支
-                'is_rumu': False,   # 是否入墓
-                'is_jixing': False, # 是否击刑
-                'is_menpo': False,  # 是否门迫
-                'is_kongwang': False, # 是否空亡
-                'changsheng': None, # 长生状态
-                'yima': False,      # 是否驿马
-                'guiren': False     # 是否贵人
+                'name': PALACE_MEMBERS[i + 1],
+                'tiangan': TIANGAN_MEMBERS[layers['tiangan'][i]],  # 天干（三奇六仪）
+                'star': STAR_MEMBERS[layers['star'][i]],           # 九星
+                'men': MEN_MEMBERS[layers['men'][i]],              # 八门
+                'shen': SHEN_MEMBERS[layers['shen'][i]],           # 八神
+                'dizhi': None,                                     # 地支
+                'is_rumu': bool(flags & FLAG_RUMU),                # 是否入墓
+                'is_jixing': bool(flags & FLAG_JIXING),            # 是否击刑
+                'is_menpo': bool(flags & FLAG_MENPO),              # 是否门迫
+                'is_kongwang': bool(flags & FLAG_KONGWANG),        # 是否空亡
+                'changsheng': CHANGSHENG_NAMES[layers['changsheng'][i]],  # 长生状态
+                'yima': bool(flags & FLAG_YIMA),                   # 是否驿马
+                'guiren': bool(flags & FLAG_GUIREN)                # 是否贵人
             }
             palaces.append(palace)
         return palaces
     
+    @property
+    def palaces(self) -> Tuple[Dict[str, Any], ...]:
+        """九宫格（字典格式，各层改变后首次访问时生成）"""
+        layers, palaces = self._palaces
+        if layers is not self.layers:
+            layers = self.layers
+            palaces = freeze(self._initialize_palaces(layers))
+            self._palaces = (layers, palaces)
+        return palaces
+    
+    def _set_layer(self, name: str, values: Sequence[int]):
+        """替换一层：复制 self.layers 后整体替换，读取方拿到的总是完整的一组层"""
+        self.layers = {**self.layers, name: tuple(values)}
+    
+    @instrument('calculate_ju')
     def calculate_ju(self) -> tuple:
-        """计算局数和阴阳遁"""
-        # 获取日柱干支
-        ri_gan_str, ri_zhi_str = self.sizhu['日柱']
-        
-        # 简化的局数计算（实际应根据节气和日干支精确计算）
-        ri_gan_value = [k for k, v in {1: "甲", 2: "乙", 3: "丙", 4: "丁", 5: "戊", 
-                                      6: "己", 7: "庚", 8: "辛", 9: "壬", 10: "癸"}.items() 
-                       if v == ri_gan_str][0]
-        ri_zhi_value = [k for k, v in {1: "子", 2: "丑", 3: "寅", 4: "卯", 5: "辰", 
-                                     6: "巳", 7: "午", 8: "未", 9: "申", 10: "酉", 
-                                     11: "戌", 12: "亥"}.items() if v == ri_zhi_str][0]
-        
-        # 确定阴阳遁（简化：8月为阴遁）
-        if self.sizhu_calculator.month in [11, 12, 1, 2, 3, 4, 5]:
-            yinyang = "阳"
-        else:
-            yinyang = "阴"
-        
-        # 局数计算（简化）
-        ju = (ri_gan_value + ri_zhi_value) % 9
-        if ju == 0:
-            ju = 9
-            
-        return yinyang, ju
+        """按所选定局方法计算阴阳遁和局数"""
+        return self.ju_strategy.calculate(self.sizhu_calculator)
     
+    @instrument('pai_di_pan')
     def pai_di_pan(self):
         """排地盘 - 三奇六仪"""
-        # 确定戊的起始宫位
-        start_positions = {
-            1: 4, 2: 4, 3: 4,  # 一、二、三局从巽四宫开始
-            4: 1, 5: 1, 6: 1,  # 四、五、六局从坎一宫开始
-            7: 7, 8: 7, 9: 7   # 七、八、九局从兑七宫开始
-        }
-        
-        start_palace = start_positions[self.ju]
-        
-        # 三奇六仪顺序
-        from .constants import TianGan
-        if self.yinyang == "阳":
-            sequence = [TianGan.WU, TianGan.JI, TianGan.GENG, 
-                       TianGan.XIN, TianGan.REN, TianGan.GUI,
-                       TianGan.DING, TianGan.BING, TianGan.YI]
-        else:
-            sequence = [TianGan.WU, TianGan.BING, TianGan.DING,
-                       TianGan.GUI, TianGan.REN, TianGan.XIN,
-                       TianGan.GENG, TianGan.JI, TianGan.YI]
-        
-        # 填充地盘
-        for i, tiangan in enumerate(sequence):
-            palace_index = (start_palace - 1 + i) % 9
-            self.palaces[palace_index]['tiangan'] = tiangan
+        self._set_layer('tiangan', core.pai_di_pan(self.yinyang, self.ju))
     
+    @instrument('pai_tian_pan')
     def pai_tian_pan(self):
         """排天盘 - 九星"""
-        # 九星顺序
-        stars_order = [
-            Star.TIANPENG, Star.TIANRUI, Star.TIANCHONG,
-            Star.TIANFU, Star.TIANQIN, Star.TIANXIN,
-            Star.TIANZHU, Star.TIANREN, Star.TIANYING
-        ]
-        
-        # 确定值符星（时干对应的星）
-        shi_gan_str, _ = self.sizhu['时柱']
-        shi_gan_value = [k for k, v in {1: "甲", 2: "乙", 3: "丙", 4: "丁", 5: "戊", 
-                                       6: "己", 7: "庚", 8: "辛", 9: "壬", 10: "癸"}.items() 
-                        if v == shi_gan_str][0]
-        
-        star_mapping = {
-            5: Star.TIANPENG, 6: Star.TIANRUI, 7: Star.TIANCHONG,
-            8: Star.TIANFU,   9: Star.TIANQIN, 10: Star.TIANXIN,
-            4: Star.TIANZHU,  3: Star.TIANREN, 2: Star.TIANYING
-        }
-        
-        zhi_fu_star = star_mapping.get(shi_gan_value, Star.TIANPENG)
-        
-        # 找到时干在地盘的位置
-        zhi_fu_position = None
-        for i, palace in enumerate(self.palaces):
-            if palace['tiangan'] and str(palace['tiangan']) == shi_gan_str:
-                zhi_fu_position = i
-                break
-        
-        if zhi_fu_position is not None:
-            # 排布九星
-            star_index = stars_order.index(zhi_fu_star)
-            for i in range(9):
-                palace_index = (zhi_fu_position + i) % 9
-                self.palaces[palace_index]['star'] = stars_order[(star_index + i) % 9]
+        self._set_layer('star', core.pai_tian_pan(self.layers['tiangan'], self.shi_gan))
     
+    @instrument('pai_men')
     def pai_men(self):
         """排八门"""
-        # 八门顺序
-        men_order = [
-            Men.XIU, Men.SHENG, Men.SHANG,
-            Men.DU, Men.JING, Men.SI,
-            Men.JING2, Men.KAI
-        ]
-        
-        # 确定值使门（时支对应的门）
-        _, shi_zhi_str = self.sizhu['时柱']
-        shi_zhi_value = [k for k, v in {1: "子", 2: "丑", 3: "寅", 4: "卯", 5: "辰", 
-                                      6: "巳", 7: "午", 8: "未", 9: "申", 10: "酉", 
-                                      11: "戌", 12: "亥"}.items() if v == shi_zhi_str][0]
-        
-        men_mapping = {
-            1: Men.XIU, 2: Men.SHENG, 3: Men.SHANG, 4: Men.DU,
-            5: Men.JING, 6: Men.SI, 7: Men.JING2, 8: Men.KAI,
-            9: Men.XIU, 10: Men.SHENG, 11: Men.SHANG, 12: Men.DU
-        }
-        
-        zhi_shi_men = men_mapping.get(shi_zhi_value, Men.XIU)
-        
-        # 找到值使门的位置（简化处理）
-        start_position = (self.ju - 1) % 9
-        
-        # 排布八门（中五宫无门）
-        men_index = men_order.index(zhi_shi_men)
-        men_count = 0
-        for i in range(9):
-            palace_index = (start_position + i) % 9
-            if palace_index != 4:  # 跳过中五宫
-                self.palaces[palace_index]['men'] = men_order[(men_index + men_count) % 8]
-                men_count += 1
+        self._set_layer('men', core.pai_men(self.ju, self.shi_zhi))
     
+    @instrument('pai_shen')
     def pai_shen(self):
         """排八神"""
-        # 八神顺序
-        if self.yinyang == "阳":
-            shen_order = [
-                Shen.ZHIFU, Shen.TENGHE, Shen.TAIYIN,
-                Shen.LIUHE, Shen.BAIHU, Shen.XUANWU,
-                Shen.JIUDI, Shen.JIUTIAN
-            ]
-        else:
-            shen_order = [
-                Shen.ZHIFU, Shen.JIUTIAN, Shen.JIUDI,
-                Shen.XUANWU, Shen.BAIHU, Shen.LIUHE,
-                Shen.TAIYIN, Shen.TENGHE
-            ]
-        
-        # 找到值符星的位置
-        zhi_fu_position = None
-        for i, palace in enumerate(self.palaces):
-            if palace['star']:
-                zhi_fu_position = i
-                break
-        
-        if zhi_fu_position is not None:
-            # 排布八神（中五宫无神）
-            shen_count = 0
-            for i in range(9):
-                palace_index = (zhi_fu_position + i) % 9
-                if palace_index != 4:  # 跳过中五宫
-                    self.palaces[palace_index]['shen'] = shen_order[shen_count % 8]
-                    shen_count += 1
+        self._set_layer('shen', core.pai_shen(self.yinyang, self.layers['star']))
     
+    @instrument('check_special_conditions')
     def check_special_conditions(self):
         """检查特殊条件"""
-        # 简化的特殊条件判断
-        from .constants import TianGan, Palace
-        for palace in self.palaces:
-            if palace['tiangan'] in [TianGan.BING, TianGan.DING] and palace['name'] == Palace.KUN:
-                palace['is_rumu'] = True
-            elif palace['tiangan'] == TianGan.WU and palace['name'] == Palace.KUN:
-                palace['is_rumu'] = True
+        self._set_layer('flags', core.check_special_conditions(self.layers['tiangan']))
     
+    @instrument('calculate_changsheng')
     def calculate_changsheng(self):
         """计算十二长生状态"""
-        # 十二长生状态
-        CHANGSHENG_STATES = [
-            "长生", "沐浴", "冠带", "临官", "帝旺", 
-            "衰", "病", "死", "墓", "绝", "胎", "养"
-        ]
-        
-        # 天干对应的长生位（在十二地支中的位置）
-        from .constants import TianGan, DiZhi
-        TIANGAN_CHANGSHENG = {
-            TianGan.JIA: 12,  # 甲长生在亥
-            TianGan.YI: 8,    # 乙长生在午
-            TianGan.BING: 3,  # 丙长生在寅
-            TianGan.DING: 10, # 丁长生在酉
-            TianGan.WU: 3,    # 戊长生在寅
-            TianGan.JI: 10,   # 己长生在酉
-            TianGan.GENG: 6,  # 庚长生在巳
-            TianGan.XIN: 1,   # 辛长生在子
-            TianGan.REN: 9,   # 壬长生在申
-            TianGan.GUI: 4    # 癸长生在卯
-        }
-        
-        # 地支对应的位置
-        DIZHI_POSITION = {
-            DiZhi.ZI: 1, DiZhi.CHOU: 2, DiZhi.YIN: 3, DiZhi.MAO: 4,
-            DiZhi.CHEN: 5, DiZhi.SI: 6, DiZhi.WU: 7, DiZhi.WEI: 8,
-            DiZhi.SHEN: 9, DiZhi.YOU: 10, DiZhi.XU: 11, DiZhi.HAI: 12
-        }
-        
-        # 阳干顺行，阴干逆行
-        YANG_GAN = [TianGan.JIA, TianGan.BING, TianGan.WU, TianGan.GENG, TianGan.REN]
-        
-        # 简化的地支映射（根据宫位）
-        PALACE_DIZHI = {
-            0: DiZhi.ZI,  # 坎一宫 - 子
-            1: DiZhi.WEI, # 坤二宫 - 未
-            2: DiZhi.YIN, # 震三宫 - 寅
-            3: DiZhi.CHEN, # 巽四宫 - 辰
-            4: DiZhi.CHEN, # 中五宫 - 辰/戌
-            5: DiZhi.WU,  # 乾六宫 - 戌
-            6: DiZhi.YOU, # 兑七宫 - 酉
-            7: DiZhi.CHOU, # 艮八宫 - 丑
-            8: DiZhi.WU   # 离九宫 - 午
-        }
-        
-        for i, palace in enumerate(self.palaces):
-            if palace['tiangan']:
-                tiangan = palace['tiangan']
-                # 获取宫位对应的地支
-                dizhi = PALACE_DIZHI.get(i, DiZhi.ZI)  # 默认子
-                dizhi_pos = DIZHI_POSITION[dizhi]
-                
-                # 获取天干的长生位
-                if tiangan in TIANGAN_CHANGSHENG:
-                    changsheng_pos = TIANGAN_CHANGSHENG[tiangan]
-                    
-                    # 计算相对位置差
-                    if tiangan in YANG_GAN:
-                        # 阳干顺行
-                        diff = (dizhi_pos - changsheng_pos) % 12
-                        if diff < 0:
-                            diff += 12
-                    else:
-                        # 阴干逆行
-                        diff = (changsheng_pos - dizhi_pos) % 12
-                        if diff < 0:
-                            diff += 12
-                    
-                    # 确定长生状态
-                    palace['changsheng'] = CHANGSHENG_STATES[diff]
-                else:
-                    palace['changsheng'] = "未知"
-            else:
-                palace['changsheng'] = None
+        self._set_layer('changsheng', core.calculate_changsheng(self.layers['tiangan']))
     
+    @instrument('calculate_yima_and_guiren')
     def calculate_yima_and_guiren(self):
         """计算驿马和贵人"""
-        # 驿马计算（简化）
-        # 通常根据日支来确定驿马
-        rizhi_str = self.sizhu['日柱'][1]  # 日支
-        
-        # 驿马口诀：寅申巳亥在辰戌丑未，辰戌丑未在寅申巳亥，子午卯酉在巳申寅亥
-        YIMA_MAP = {
-            '寅': '申', '申': '寅', '巳': '亥', '亥': '巳',
-            '辰': '戌', '戌': '辰', '丑': '未', '未': '丑',
-            '子': '午', '午': '子', '卯': '酉', '酉': '卯'
-        }
-        
-        yima = YIMA_MAP.get(rizhi_str, '未知')
-        
-        # 天乙贵人计算（简化）
-        # 甲戊庚牛羊，乙己鼠猴乡，丙丁猪鸡位，壬癸蛇兔藏，六辛逢虎马
-        rigan_str = self.sizhu['日柱'][0]  # 日干
-        
-        GUIREN_MAP = {
-            '甲': ['丑', '未'], '戊': ['丑', '未'], '庚': ['丑', '未'],
-            '乙': ['子', '申'], '己': ['子', '申'],
-            '丙': ['亥', '酉'], '丁': ['亥', '酉'],
-            '壬': ['巳', '卯'], '癸': ['巳', '卯'],
-            '辛': ['寅', '午']
-        }
-        
-        guiren = GUIREN_MAP.get(rigan_str, ['未知'])
-        
-        # 简化处理：将驿马和贵人信息添加到结果中
-        self.yima = yima
-        self.guiren = guiren
+        self.yima_code, self.guiren_codes = core.calculate_yima_and_guiren(self.ri_gan, self.ri_zhi)
+    
+    @property
+    def yima(self) -> str:
+        """驿马"""
+        return DIZHI_NAMES[self.yima_code] or '未知'
+    
+    @property
+    def guiren(self) -> List[str]:
+        """贵人"""
+        return [DIZHI_NAMES[code] for code in self.guiren_codes if code] or ['未知']
     
     def pai_pan(self):
         """完整排盘"""
@@ -326,28 +154,32 @@ class QiMenCalculator:
         self.calculate_changsheng()      # 计算长生状态
         self.calculate_yima_and_guiren() # 计算驿马和贵人
     
-    def get_result(self) -> Dict[str, Any]:
-        """获取排盘结果"""
-        return {
+    def get_board(self) -> Dict[str, Any]:
+        """获取盘面部分的结果（只取决于阴阳遁、局数、日柱和时柱，可缓存复用）"""
+        return self.get_compact_board().to_dict()
+    
+    def get_compact_board(self) -> Board:
+        """获取紧凑盘面"""
+        layers = self.layers
+        return Board.from_layers(layers['tiangan'], layers['star'], layers['men'], layers['shen'],
+                                 layers['changsheng'], layers['flags'],
+                                 self.yima_code, self.guiren_codes)
+    
+    def cache_key(self) -> tuple:
+        """盘面缓存键"""
+        return ChartCache.make_key(self.yinyang, self.ju, self.ri_gan, self.ri_zhi,
+                                   self.shi_gan, self.shi_zhi)
+    
+    def get_result(self, board: Board = None) -> Dict[str, Any]:
+        """获取排盘结果
+        
+        board 为缓存中的紧凑盘面时直接复用，不再读取本计算器的宫位数据。
+        结果为只读结构（字典为 FrozenDict，列表为元组），可在线程间共享。
+        """
+        if board is None:
+            board = self.get_compact_board()
+        return FrozenDict({
             'sizhu': self.sizhu,
             'ju': f"{self.yinyang}{self.ju}局",
-            'palaces': [
-                {
-                    'name': str(palace['name']),
-                    'tiangan': str(palace['tiangan']) if palace['tiangan'] else None,
-                    'star': str(palace['star']) if palace['star'] else None,
-                    'men': str(palace['men']) if palace['men'] else None,
-                    'shen': str(palace['shen']) if palace['shen'] else None,
-                    'is_rumu': palace['is_rumu'],
-                    'is_jixing': palace['is_jixing'],
-                    'is_menpo': palace['is_menpo'],
-                    'is_kongwang': palace['is_kongwang'],
-                    'changsheng': palace['changsheng'],
-                    'yima': palace['yima'],
-                    'guiren': palace['guiren']
-                }
-                for palace in self.palaces
-            ],
-            'yima': self.yima,
-            'guiren': self.guiren
-        }
\ No newline at end of file
+            **board.to_dict()
+        })
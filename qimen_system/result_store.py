@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+持久化排盘结果
+把 QiMenDunJia.to_bytes() 的结果按 时刻 + 定局方法 + 出生地经度 存入 SQLite（WAL 模式），
+重启后常用时刻直接读出，不再重新排盘。写入先在内存中攒批，每 batch_size 条提交一次；
+数据库记录排盘算法版本，与当前 ALGORITHM_VERSION 不同时打开即清空旧结果。
+    
+    with ResultStore('charts.db') as store:
+        store.prefill(timestamps)                  # 批量预先排盘
+        store.warm()                               # 把最常用的结果读入内存
+        payload = store.chart(2025, 8, 20, 17, 43)  # 命中时不排盘
+"""
+
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+from .ju_strategy import JuStrategy, get_strategy
+from .solar_time import Location, resolve_longitude
+
+# 排盘算法或输出格式改变时递增，旧数据库中的结果随之失效
+ALGORITHM_VERSION = 1
+
+Timestamp = Tuple[int, int, int, int, int]
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS charts ("
+    "key TEXT PRIMARY KEY, payload BLOB NOT NULL, hits INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID"
+)
+
+class ResultStore:
+    """SQLite 排盘结果库（线程安全）
+    
+    另有 memory_size 条的内存 LRU，warm 时按历史命中次数读入；
+    命中次数与写入一起攒批更新。
+    """
+    
+    def __init__(self, path: str, batch_size: int = 256, memory_size: int = 4096,
+                 version: int = ALGORITHM_VERSION):
+        self.path = path
+        self.batch_size = batch_size
+        self.memory_size = memory_size
+        self.version = version
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+        self._memory = OrderedDict()
+        self._pending = {}
+        self._pending_hits = Counter()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = self._check_version()
+    
+    def _check_version(self) -> int:
+        """数据库的算法版本与当前不同时清空结果，返回清除的条数"""
+        with self._db:
+            row = self._db.execute("SELECT value FROM meta WHERE name = 'algorithm_version'").fetchone()
+            if row is not None and row[0] == str(self.version):
+                return 0
+            removed = self._db.execute("DELETE FROM charts").rowcount
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('algorithm_version', ?)",
+                             (str(self.version),))
+            return removed
+    
+    @staticmethod
+    def make_key(year: int, month: int, day: int, hour: int, minute: int,
+                 ju_strategy: Union[str, JuStrategy] = None, location: Location = None) -> str:
+        """结果的键：时刻|定局方法|出生地经度（未指定出生地时为空）"""
+        longitude = '' if location is None else f"{resolve_longitude(location):.4f}"
+        return (f"{year:04d}-{month:02d}-{day:02d} {hour:02d}:{minute:02d}"
+                f"|{get_strategy(ju_strategy).name}|{longitude}")
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """查找结果，未命中返回 None"""
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+            else:
+                payload = self._pending.get(key)
+                if payload is None:
+                    row = self._db.execute("SELECT payload FROM charts WHERE key = ?", (key,)).fetchone()
+                    if row is None:
+                        self.misses += 1
+                        return None
+                    payload = row[0]
+                self._remember(key, payload)
+            self.hits += 1
+            self._pending_hits[key] += 1
+            if len(self._pending_hits) >= self.batch_size:
+                self.flush()
+            return payload
+    
+    def put(self, key: str, payload: bytes):
+        """存入结果，攒满 batch_size 条时提交"""
+        with self._lock:
+            self._pending[key] = payload
+            self._remember(key, payload)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+    
+    def _remember(self, key: str, payload: bytes):
+        """放入内存 LRU（调用方持有锁）"""
+        if self.memory_size <= 0:
+            return
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+    
+    def flush(self):
+        """提交攒下的写入和命中次数"""
+        with self._lock:
+            if not self._pending and not self._pending_hits:
+                return
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO charts (key, payload) VALUES (?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET payload = excluded.payload",
+                    self._pending.items())
+                self._db.executemany("UPDATE charts SET hits = hits + ? WHERE key = ?",
+                                     ((count, key) for key, count in self._pending_hits.items()))
+            self._pending.clear()
+            self._pending_hits.clear()
+    
+    def chart(self, year: int, month: int, day: int, hour: int, minute: int,
+              ju_strategy: Union[str, JuStrategy] = None, location: Location = None) -> bytes:
+        """排盘结果（to_bytes），命中时直接返回，否则排盘后存入"""
+        from . import QiMenDunJia
+        
+        key = self.make_key(year, month, day, hour, minute, ju_strategy, location)
+        payload = self.get(key)
+        if payload is None:
+            payload = QiMenDunJia(year, month, day, hour, minute, location=location,
+                                  ju_strategy=ju_strategy).to_bytes()
+            self.put(key, payload)
+        return payload
+    
+    def prefill(self, timestamps: Iterable[Timestamp], ju_strategy: Union[str, JuStrategy] = None,
+                location: Location = None, progress: Callable[[int], None] = None) -> int:
+        """批量预先排盘：跳过库中已有的时刻，返回新增的条数；排盘失败的时刻不写入，也不中断预先排盘"""
+        from . import QiMenDunJia
+        
+        strategy = get_strategy(ju_strategy)
+        added = 0
+        chunk = []
+        
+        def fill():
+            nonlocal added
+            keys = [self.make_key(*timestamp, strategy, location) for timestamp in chunk]
+            with self._lock:
+                placeholders = ','.join('?' * len(keys))
+                existing = {key for key, in self._db.execute(
+                    f"SELECT key FROM charts WHERE key IN ({placeholders})", keys)}
+            for timestamp, key in zip(chunk, keys):
+                if key in existing or key in self._pending:
+                    continue
+                try:
+                    payload = QiMenDunJia(*timestamp, location=location, ju_strategy=strategy).to_bytes()
+                except Exception:  # 与服务、批量排盘相同：单个时刻失败只跳过该时刻
+                    continue
+                with self._lock:
+                    self._pending[key] = payload
+                    if len(self._pending) >= self.batch_size:
+                        self.flush()
+                added += 1
+            chunk.clear()
+            if progress is not None:
+                progress(added)
+        
+        for timestamp in timestamps:
+            chunk.append(tuple(timestamp))
+            if len(chunk) >= self.batch_size:
+                fill()
+        if chunk:
+            fill()
+        self.flush()
+        return added
+    
+    def warm(self, limit: int = None) -> int:
+        """按历史命中次数把最常用的结果读入内存（默认读满 memory_size），返回读入的条数"""
+        limit = self.memory_size if limit is None else min(limit, self.memory_size)
+        with self._lock:
+            rows = self._db.execute("SELECT key, payload FROM charts ORDER BY hits DESC LIMIT ?",
+                                    (limit,)).fetchall()
+            # 命中次数少的先放入，LRU 中最常用的最后被淘汰
+            for key, payload in reversed(rows):
+                self._remember(key, payload)
+            return len(rows)
+    
+    def stats(self) -> Dict[str, int]:
+        """命中统计（先提交攒下的写入）"""
+        with self._lock:
+            self.flush()
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': self._db.execute("SELECT COUNT(*) FROM charts").fetchone()[0],
+                'memory': len(self._memory),
+                'invalidated': self.invalidated
+            }
+    
+    def close(self):
+        """提交未写入的数据并关闭数据库"""
+        with self._lock:
+            self.flush()
+            self._db.close()
+    
+    def __len__(self) -> int:
+        return self.stats()['size']
+    
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._memory or key in self._pending:
+                return True
+            return self._db.execute("SELECT 1 FROM charts WHERE key = ?", (key,)).fetchone() is not None
+    
+    def __enter__(self) -> 'ResultStore':
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+排盘结果序列化
+按九宫格顺序（上南下北）组织盘面，字段名使用中文；
+安装了 orjson 时使用 orjson 编码，否则使用标准库 json
+"""
+
+import json
+from typing import Any, Dict
+from .board import (
+    Board, TIANGAN, STAR, MEN, SHEN, CHANGSHENG, FLAGS,
+    FLAG_RUMU, FLAG_JIXING, FLAG_MENPO, FLAG_KONGWANG, FLAG_YIMA, FLAG_GUIREN
+)
+from .constants import (
+    TIANGAN_NAMES, STAR_NAMES, MEN_NAMES, SHEN_NAMES, CHANGSHENG_NAMES, PALACE_NAMES
+)
+
+try:
+    import orjson
+except ImportError:  # orjson 仅用于加速编码
+    orjson = None
+
+# 九宫格各行的宫位下标（0 为坎一宫）
+GRID_ROWS = (
+    ('第一行', (3, 8, 1)),  # 巽四宫 离九宫 坤二宫
+    ('第二行', (2, 4, 6)),  # 震三宫 中五宫 兑七宫
+    ('第三行', (7, 0, 5))   # 艮八宫 坎一宫 乾六宫
+)
+
+# 宫位字段：(中文字段名, 盘面层起始位置, 名称表)
+LAYER_FIELDS = (
+    ('天干', TIANGAN, TIANGAN_NAMES),
+    ('八神', SHEN, SHEN_NAMES),
+    ('九星', STAR, STAR_NAMES),
+    ('八门', MEN, MEN_NAMES),
+    ('长生', CHANGSHENG, CHANGSHENG_NAMES)
+)
+
+# 标记字段：(中文字段名, 标记位)
+FLAG_FIELDS = (
+    ('入墓', FLAG_RUMU),
+    ('击刑', FLAG_JIXING),
+    ('门迫', FLAG_MENPO),
+    ('空亡', FLAG_KONGWANG),
+    ('驿马', FLAG_YIMA),
+    ('贵人', FLAG_GUIREN)
+)
+
+def palace_grid(board: Board) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """盘面的九宫格布局：{行名: {宫名: {字段: 值}}}"""
+    data = board.data
+    grid = {}
+    for row_name, indexes in GRID_ROWS:
+        row = {}
+        for i in indexes:
+            palace = {name: names[data[layer + i]] for name, layer, names in LAYER_FIELDS}
+            flags = data[FLAGS + i]
+            for name, bit in FLAG_FIELDS:
+                palace[name] = bool(flags & bit)
+            row[PALACE_NAMES[i + 1]] = palace
+        grid[row_name] = row
+    return grid
+
+def dumps(obj: Any, compact: bool = False) -> str:
+    """编码为 JSON 字符串（保留中文），compact=True 时不缩进、不留空格"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=0 if compact else orjson.OPT_INDENT_2).decode('utf-8')
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+def dumps_bytes(obj: Any, compact: bool = True) -> bytes:
+    """编码为 UTF-8 JSON 字节串（默认紧凑格式）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=0 if compact else orjson.OPT_INDENT_2)
+    return dumps(obj, compact).encode('utf-8')
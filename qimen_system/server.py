@@ -0,0 +1,411 @@
+# -*- coding: utf-8 -*-
+"""
+本地排盘 HTTP 服务
+基于 asyncio，只监听本机地址。并发到达的排盘请求先进入队列，
+由批处理任务合并为小批（相同时间只排一次）后交给线程或进程池计算，
+排盘不在事件循环中执行。
+
+接口：
+    GET  /chart?datetime=2025-08-20T17:43        单个排盘（也可用 year、month、day、hour、minute 参数）
+    POST /chart    {"datetime": "..."}            单个排盘
+    POST /batch    [{"datetime": "..."}, ...]     批量排盘，按输入顺序返回
+    GET  /stats                                   请求数、批次、延迟分位数和吞吐量
+"""
+
+import asyncio
+import json
+import multiprocessing
+import signal
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+from .bulk import Timestamp, parse_timestamp
+from .ju_strategy import JuStrategy, STRATEGIES, get_strategy
+
+HOST = '127.0.0.1'
+PORT = 8000
+
+# 单批最多合并的请求数和等待凑批的最长时间（秒）
+MAX_BATCH = 256
+MAX_DELAY = 0.002
+
+# 等待接受的连接数上限（asyncio 默认 100，突发并发连接较多时会被丢弃重试）
+BACKLOG = 1024
+
+# 单个请求体上限
+MAX_BODY = 16 * 1024 * 1024
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error'}
+
+def chart_batch(timestamps: List[Timestamp],
+                ju_strategy: Union[str, JuStrategy] = None) -> List[Tuple[Optional[bytes], Optional[str]]]:
+    """排盘一批时间，返回 (结果JSON字节串, 错误信息) 列表（在线程或进程池中执行）
+    
+    ju_strategy 为定局方法名称或实例，进程池中只能传名称。
+    
+    错误按时间分别记录：一个时间排盘失败不影响同批的其他时间。
+    """
+    from . import QiMenDunJia
+    
+    results = []
+    for timestamp in timestamps:
+        try:
+            results.append((QiMenDunJia(*timestamp, ju_strategy=ju_strategy).to_bytes(), None))
+        except Exception as e:
+            results.append((None, str(e) or type(e).__name__))
+    return results
+
+def _ignore_interrupt():
+    """工作进程忽略 Ctrl+C，由主进程负责停止"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _init_worker(table_name: Optional[str]):
+    """工作进程初始化：忽略 Ctrl+C，指定时挂接共享盘面表"""
+    _ignore_interrupt()
+    if table_name is not None:
+        from .shared_table import attach_default
+        attach_default(table_name)
+
+class ServerStats:
+    """延迟和吞吐量计数器"""
+    
+    def __init__(self, window: int = 10000):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.charts = 0
+        self.batches = 0
+        self.batched_items = 0
+        # 最近 window 个请求的延迟（秒）
+        self.latencies = deque(maxlen=window)
+    
+    def record_request(self, latency: float, ok: bool):
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.latencies.append(latency)
+    
+    def record_batch(self, size: int, charted: int):
+        self.batches += 1
+        self.batched_items += size
+        self.charts += charted
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """当前统计：延迟分位数为毫秒"""
+        uptime = time.monotonic() - self.started
+        latencies = sorted(self.latencies)
+        
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+        
+        return {
+            'uptime_seconds': round(uptime, 3),
+            'requests': self.requests,
+            'errors': self.errors,
+            'charts': self.charts,
+            'batches': self.batches,
+            'mean_batch_size': round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+            'requests_per_second': round(self.requests / uptime, 2) if uptime else 0.0,
+            'charts_per_second': round(self.charts / uptime, 2) if uptime else 0.0,
+            'latency_ms': {'p50': percentile(0.5), 'p90': percentile(0.9),
+                           'p99': percentile(0.99), 'max': percentile(1.0)}
+        }
+
+class ChartServer:
+    """本地排盘服务
+    
+    workers 为排盘进程数，1 时使用单个工作线程（同样不阻塞事件循环）。
+    shared_table=True 且 workers > 1 时，启动前把全部盘面发布到共享内存，各工作进程挂接同一份只读表。
+    store 为 ResultStore 时先查结果库，命中的请求不进入批次，新排的结果写回结果库（启动时预热）；
+    结果库的读写在单独的线程中进行，SQLite 查询和提交不阻塞事件循环。
+    ju_strategy 为全部请求使用的定局方法，结果库的键也按它查找；
+    在进程池中排盘时只能使用已登记的定局方法（STRATEGIES），自定义的 JuStrategy 实例需用线程池。
+    """
+    
+    def __init__(self, host: str = HOST, port: int = PORT, workers: int = 1,
+                 max_batch: int = MAX_BATCH, max_delay: float = MAX_DELAY,
+                 executor: Executor = None, shared_table: bool = False, store=None,
+                 ju_strategy: Union[str, JuStrategy] = None):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.executor = executor
+        # 线程或进程池由 start 创建时为 True，stop 只关闭自己创建的池，调用方传入的池由调用方关闭
+        self._owns_executor = False
+        self.shared_table = shared_table
+        self.table = None
+        self.store = store
+        self.ju_strategy = get_strategy(ju_strategy)
+        # 交给 chart_batch 的定局方法：线程池中直接传实例，进程池中传名称（start 时确定）
+        self._strategy_arg = self.ju_strategy
+        self._store_executor = None
+        # 尚未完成的结果库写回，stop 时等待全部完成后再提交
+        self._pending_saves = set()
+        self.stats = ServerStats()
+        self._queue = None
+        self._server = None
+        self._batchers = []
+    
+    # ---------- 微批处理 ----------
+    
+    async def submit(self, timestamps: List[Timestamp]) -> List[Tuple[Optional[bytes], Optional[str]]]:
+        """提交一组时间，等待所在批次完成后按顺序返回结果"""
+        loop = asyncio.get_running_loop()
+        if self.store is not None:
+            payloads = await loop.run_in_executor(self._store_executor, self._store_lookup, timestamps)
+        else:
+            payloads = [None] * len(timestamps)
+        futures = []
+        for timestamp, payload in zip(timestamps, payloads):
+            future = loop.create_future()
+            if payload is not None:
+                future.set_result((payload, None))
+            else:
+                self._queue.put_nowait((timestamp, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+    
+    def _store_lookup(self, timestamps: List[Timestamp]) -> List[Optional[bytes]]:
+        """在结果库中查找一组时间（在结果库线程中执行）"""
+        return [self.store.get(self.store.make_key(*timestamp, self.ju_strategy)) for timestamp in timestamps]
+    
+    def _store_save(self, charts: List[Tuple[Timestamp, bytes]]):
+        """把新排的结果写回结果库（在结果库线程中执行）"""
+        for timestamp, chart in charts:
+            self.store.put(self.store.make_key(*timestamp, self.ju_strategy), chart)
+    
+    def _save_done(self, future: asyncio.Future):
+        """写回完成：移出待完成集合；写回失败只少存几条结果，不影响已答复的请求"""
+        self._pending_saves.discard(future)
+        if not future.cancelled():
+            future.exception()
+    
+    async def _collect(self) -> List[tuple]:
+        """从队列取出一批：至少一个，最多 max_batch 个，凑批最多等待 max_delay"""
+        items = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_delay
+        while len(items) < self.max_batch:
+            if self._queue.empty():
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                items.append(self._queue.get_nowait())
+        return items
+    
+    async def _batcher(self):
+        """批处理任务：合并相同时间后交给线程或进程池计算"""
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+            unique = {}
+            for timestamp, _ in items:
+                unique.setdefault(timestamp, len(unique))
+            try:
+                results = await loop.run_in_executor(self.executor, chart_batch, list(unique),
+                                                     self._strategy_arg)
+            except Exception as e:  # 线程或进程池本身出错（如工作进程退出）时整批返回错误，服务继续运行
+                results = [(None, f"排盘失败: {e}")] * len(unique)
+            self.stats.record_batch(len(items), len(unique))
+            for timestamp, future in items:
+                if not future.done():
+                    future.set_result(results[unique[timestamp]])
+            if self.store is not None:
+                # 先答复请求再写回，写回不等待完成，批处理任务直接收集下一批；
+                # 写回与查找共用结果库线程，按提交顺序执行
+                charts = [(timestamp, results[index][0]) for timestamp, index in unique.items()
+                          if results[index][1] is None]
+                if charts:
+                    save = loop.run_in_executor(self._store_executor, self._store_save, charts)
+                    self._pending_saves.add(save)
+                    save.add_done_callback(self._save_done)
+    
+    # ---------- HTTP ----------
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个连接（支持 HTTP/1.1 长连接）"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                started = time.perf_counter()
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': '请求行格式错误'}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = headers.get('content-length') or '0'
+                if not length.isdigit() or not length.isascii():
+                    await self._respond(writer, 400, {'error': f"Content-Length 格式错误: {length}"}, False)
+                    break
+                length = int(length)
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {'error': '请求体过大'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version != 'HTTP/1.0')
+                
+                try:
+                    status, payload = await self._route(method, target, body)
+                except Exception as e:  # 处理中的意外错误只影响本次请求，连接继续可用
+                    status, payload = 500, {'error': f"服务内部错误: {str(e) or type(e).__name__}"}
+                self.stats.record_request(time.perf_counter() - started, status == 200)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            # 请求行或请求头超出长度限制（readline 抛出 ValueError）等：尽量答复后关闭连接
+            status = 400 if isinstance(e, (ValueError, asyncio.LimitOverrunError)) else 500
+            try:
+                await self._respond(writer, status, {'error': f"请求无法处理: {str(e) or type(e).__name__}"}, False)
+            except Exception:
+                pass
+        finally:
+            writer.close()
+    
+    async def _route(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        """分发请求，返回 (状态码, 响应体)；响应体为字节串时原样返回"""
+        url = urlsplit(target)
+        if url.path == '/stats':
+            snapshot = self.stats.snapshot()
+            if self.store is not None:
+                snapshot['store'] = await asyncio.get_running_loop().run_in_executor(
+                    self._store_executor, self.store.stats)
+            return 200, snapshot
+        if url.path not in ('/chart', '/batch'):
+            return 404, {'error': f"未知路径: {url.path}"}
+        
+        try:
+            if method == 'GET' and url.path == '/chart':
+                rows = [dict(parse_qsl(url.query))]
+            elif method == 'POST':
+                data = json.loads(body or b'null')
+                if url.path == '/chart':
+                    data = [data]
+                if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+                    return 400, {'error': '请求体应为 JSON 对象（/chart）或对象数组（/batch）'}
+                rows = data
+            else:
+                return 405, {'error': f"不支持的方法: {method}"}
+        except ValueError as e:
+            return 400, {'error': f"请求体不是合法的 JSON: {e}"}
+        
+        # 逐行解析时间：/batch 中格式错误的行只在本行位置返回错误，其他行照常排盘
+        timestamps, errors = [], []
+        for row in rows:
+            try:
+                timestamps.append(parse_timestamp(row))
+                errors.append(None)
+            except (ValueError, TypeError) as e:
+                errors.append(f"时间格式错误: {e}")
+        if url.path == '/chart' and errors[0] is not None:
+            return 400, {'error': errors[0]}
+        charted = iter(await self.submit(timestamps))
+        results = [next(charted) if error is None else (None, error) for error in errors]
+        if url.path == '/chart':
+            chart, error = results[0]
+            return (200, chart) if error is None else (422, {'error': error})
+        parts = [chart if error is None else json.dumps({'error': error}, ensure_ascii=False).encode('utf-8')
+                 for chart, error in results]
+        return 200, b'[' + b','.join(parts) + b']'
+    
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool):
+        if not isinstance(payload, bytes):
+            payload = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + payload)
+        await writer.drain()
+    
+    # ---------- 启动与停止 ----------
+    
+    async def start(self):
+        """开始监听（port 为 0 时由系统分配，实际端口写回 self.port）"""
+        if isinstance(self.executor, ProcessPoolExecutor) or (self.executor is None and self.workers > 1):
+            if STRATEGIES.get(self.ju_strategy.name) is not self.ju_strategy:
+                raise ValueError(f"进程池中只能使用已登记的定局方法（{', '.join(STRATEGIES)}），"
+                                 f"当前: {self.ju_strategy!r}；自定义定局方法请使用 workers=1 或线程池")
+            self._strategy_arg = self.ju_strategy.name
+        if self.store is not None:
+            self._store_executor = ThreadPoolExecutor(1)
+            await asyncio.get_running_loop().run_in_executor(self._store_executor, self.store.warm)
+        if self.executor is None:
+            if self.workers > 1:
+                table_name = None
+                if self.shared_table:
+                    from .shared_table import SharedBoardTable
+                    self.table = SharedBoardTable.publish()
+                    table_name = self.table.name
+                # 事件循环所在进程已有多个线程，fork 可能继承被占用的锁，改用 spawn 启动工作进程
+                self.executor = ProcessPoolExecutor(self.workers,
+                                                    mp_context=multiprocessing.get_context('spawn'),
+                                                    initializer=_init_worker, initargs=(table_name,))
+            else:
+                self.executor = ThreadPoolExecutor(1)
+            self._owns_executor = True
+        self._queue = asyncio.Queue()
+        # 每个工作进程对应一个批处理任务，使各进程同时有批次在算
+        self._batchers = [asyncio.ensure_future(self._batcher()) for _ in range(max(self.workers, 1))]
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=BACKLOG)
+        self.port = self._server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        """停止监听和批处理任务，关闭自己创建的线程或进程池，删除共享盘面表，提交结果库的写入"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._batchers:
+            task.cancel()
+        await asyncio.gather(*self._batchers, return_exceptions=True)
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            self._owns_executor = False
+        if self.table is not None:
+            self.table.unlink()
+            self.table = None
+        if self.store is not None:
+            await asyncio.gather(*self._pending_saves, return_exceptions=True)
+            await asyncio.get_running_loop().run_in_executor(self._store_executor, self.store.flush)
+            self._store_executor.shutdown(wait=True)
+            self._store_executor = None
+    
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+def serve(host: str = HOST, port: int = PORT, workers: int = 1, **kwargs):
+    """启动服务并阻塞运行，直到被中断"""
+    server = ChartServer(host, port, workers, **kwargs)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
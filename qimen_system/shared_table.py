@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+共享内存盘面表
+盘面只取决于 阴阳遁 × 局数 × 日柱 × 时支（时干由日干按五鼠遁确定），共 2 × 9 × 60 × 12 = 12960 种，
+全部排出后约 740KB。主进程 publish 一次写入 multiprocessing.shared_memory，
+各工作进程 attach 为只读视图，所有进程的排盘查找同一份已预热的表，不再各自缓存。
+    
+    # 主进程
+    table = SharedBoardTable.publish()
+    # 工作进程（如 Pool 的 initializer、gunicorn 的 post_fork）
+    shared_table.attach_default(table.name)
+    ...
+    table.unlink()                    # 全部进程用完后由主进程删除
+
+共享内存开头 16 字节为表头（小端）：
+    4s      魔数 b'QMSB'
+    uint16  版本
+    uint16  盘面长度
+    uint32  盘面数
+    其余保留
+随后按 slot_of 的顺序依次存放各盘面。
+节气时刻表和农历表本身已是 mmap 映射的数据文件，多个进程共享页缓存，不需要放入共享内存。
+"""
+
+import os
+import struct
+import sys
+import threading
+from typing import Dict, Optional, Tuple
+from .board import Board, BOARD_SIZE
+from .core import ganzhi_index
+from . import core
+
+try:
+    from multiprocessing import resource_tracker, shared_memory
+except ImportError:  # Python 3.8 以前没有 shared_memory
+    resource_tracker = shared_memory = None
+
+MAGIC = b'QMSB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+HEADER_SIZE = 16
+SLOT_COUNT = 2 * 9 * 60 * 12
+
+# Python 3.13 起挂接共享内存可以不登记到 resource_tracker（track=False）
+TRACK_OPTION = sys.version_info >= (3, 13)
+
+def slot_of(key: Tuple) -> int:
+    """缓存键 → 表中位置；时干与日干不符（不可能出现的键）时返回 -1"""
+    yinyang, ju, ri_gan, ri_zhi, shi_gan, shi_zhi = key
+    if shi_gan != (core.WUSHUDUN[ri_gan] + shi_zhi - 2) % 10 + 1:
+        return -1
+    yin = 1 if yinyang == core.YIN else 0
+    return ((yin * 9 + ju - 1) * 60 + ganzhi_index(ri_gan, ri_zhi)) * 12 + shi_zhi - 1
+
+def build_table() -> bytes:
+    """按 slot_of 的顺序排出全部盘面"""
+    data = bytearray(SLOT_COUNT * BOARD_SIZE)
+    for yinyang in (core.YANG, core.YIN):
+        for ju in range(1, 10):
+            for index in range(60):
+                ri_gan, ri_zhi = index % 10 + 1, index % 12 + 1
+                for shi_zhi in range(1, 13):
+                    shi_gan = (core.WUSHUDUN[ri_gan] + shi_zhi - 2) % 10 + 1
+                    key = (yinyang, ju, ri_gan, ri_zhi, shi_gan, shi_zhi)
+                    position = slot_of(key) * BOARD_SIZE
+                    data[position:position + BOARD_SIZE] = core.pai_pan(*key).data
+    return bytes(data)
+
+def _tracker_name(shm) -> str:
+    """resource_tracker 登记用的名称：posix 共享内存对象名以 "/" 开头，shm.name 不含此前缀"""
+    return '/' + shm.name
+
+def _untrack(shm):
+    """从 resource_tracker 注销：Python 3.13 以前挂接共享内存也会登记，
+    挂接进程退出时会被当作泄漏而删除，删除只应由发布者负责"""
+    if os.name == 'posix':
+        resource_tracker.unregister(_tracker_name(shm), 'shared_memory')
+
+class SharedBoardTable:
+    """共享内存盘面表（只读）
+    
+    接口与 ChartCache 相同（get、put、stats 等），可作为 QiMenDunJia 的 cache 参数，
+    或经 attach_default 设为默认缓存；put 不做任何事。
+    """
+    
+    def __init__(self, shm, owner: bool):
+        self._shm = shm
+        self.owner = owner
+        self.name = shm.name
+        magic, version, board_size, count = HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"不是共享盘面表: {self.name}")
+        if version != VERSION or board_size != BOARD_SIZE or count != SLOT_COUNT:
+            raise ValueError(f"不支持的共享盘面表版本: {version}（盘面长度 {board_size}，盘面数 {count}）")
+        self._view = shm.buf[HEADER_SIZE:HEADER_SIZE + SLOT_COUNT * BOARD_SIZE].toreadonly()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @classmethod
+    def publish(cls, name: str = None) -> 'SharedBoardTable':
+        """排出全部盘面并写入新建的共享内存（name 为 None 时由系统命名），返回发布者一方的表"""
+        if shared_memory is None:
+            raise ImportError("共享盘面表需要 Python 3.8 以上的 multiprocessing.shared_memory")
+        data = build_table()
+        shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + len(data))
+        try:
+            shm.buf[HEADER_SIZE:HEADER_SIZE + len(data)] = data
+            # 表头最后写入，挂接方看到魔数时盘面已全部就绪
+            HEADER.pack_into(shm.buf, 0, MAGIC, VERSION, BOARD_SIZE, SLOT_COUNT)
+            return cls(shm, owner=True)
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+    
+    @classmethod
+    def attach(cls, name: str) -> 'SharedBoardTable':
+        """挂接已发布的共享盘面表（只读）"""
+        if shared_memory is None:
+            raise ImportError("共享盘面表需要 Python 3.8 以上的 multiprocessing.shared_memory")
+        if TRACK_OPTION:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+            _untrack(shm)
+        try:
+            return cls(shm, owner=False)
+        except BaseException:
+            shm.close()
+            raise
+    
+    @staticmethod
+    def make_key(yinyang: str, ju: int, ri_gan: int, ri_zhi: int,
+                 shi_gan: int, shi_zhi: int) -> Tuple:
+        """与 ChartCache.make_key 相同"""
+        return yinyang, ju, ri_gan, ri_zhi, shi_gan, shi_zhi
+    
+    def get(self, key: Tuple) -> Optional[Board]:
+        """查找盘面，不可能出现的键返回 None"""
+        slot = slot_of(key)
+        if slot < 0:
+            with self._lock:
+                self.misses += 1
+            return None
+        position = slot * BOARD_SIZE
+        board = Board(self._view[position:position + BOARD_SIZE])
+        with self._lock:
+            self.hits += 1
+        return board
+    
+    def put(self, key: Tuple, board: Board):
+        """只读表，不存入"""
+    
+    def stats(self) -> Dict[str, int]:
+        """命中统计（各进程分别计数）"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': 0,
+                'size': SLOT_COUNT,
+                'maxsize': SLOT_COUNT
+            }
+    
+    def close(self):
+        """解除本进程的映射"""
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+            self._shm.close()
+    
+    def unlink(self):
+        """关闭并删除共享内存（发布者在所有进程用完后调用）"""
+        if not self.owner:
+            raise ValueError("只有发布者可以删除共享盘面表")
+        self.close()
+        # Python 3.13 以前，挂接进程注销登记时可能已注销发布者的登记（同一个 resource_tracker），先补登记再删除
+        if os.name == 'posix' and not TRACK_OPTION:
+            resource_tracker.register(_tracker_name(self._shm), 'shared_memory')
+        self._shm.unlink()
+    
+    def __len__(self) -> int:
+        return SLOT_COUNT
+    
+    def __contains__(self, key: Tuple) -> bool:
+        return slot_of(key) >= 0
+    
+    def __enter__(self) -> 'SharedBoardTable':
+        return self
+    
+    def __exit__(self, *exc):
+        if self.owner:
+            self.unlink()
+        else:
+            self.close()
+
+# 本进程经 attach_default 挂接的表
+_attached: Optional[SharedBoardTable] = None
+
+def attach_default(name: str) -> SharedBoardTable:
+    """挂接共享盘面表并设为 QiMenDunJia 的默认缓存（可用作工作进程的 initializer）"""
+    global _attached
+    from . import set_default_cache
+    
+    table = SharedBoardTable.attach(name)
+    set_default_cache(table)
+    _attached = table
+    return table
@@ -5,266 +5,201 @@
 """
 
 import datetime
-from typing import Tuple
-from .constants import TianGan, DiZhi, JIEQI_LIST, JIEQI_APPROX_DATES
+from typing import Tuple, Dict
+from .constants import (
+    JIEQI_LIST, TIANGAN_MEMBERS, DIZHI_MEMBERS, TIANGAN_NAMES, DIZHI_NAMES
+)
+from .jieqi_table import JieQiTable, days_from_civil_batch
+from .jieqi_solver import JieQiSolver
+from .solar_time import Location
+from . import core, solar_time
+from .metrics import instrument
+
+try:
+    import numpy as np
+except ImportError:  # numpy 仅批量计算需要
+    np = None
 
 class SolarTerm:
     """二十四节气处理"""
     
     @staticmethod
     def get_term_date(year: int, term_index: int) -> datetime.date:
-        """获取指定年份的节气日期（简化版）"""
-        month, day = JIEQI_APPROX_DATES[term_index]
-        if year % 4 == 0 and term_index >= 2:  # 闰年调整
-            day -= 1
-        return datetime.date(year, month, day)
+        """获取指定年份的节气日期"""
+        if JieQiTable.FIRST_YEAR <= year <= JieQiTable.LAST_YEAR:
+            return JieQiTable.get_term_moment(year, term_index).date()
+        # 超出节气时刻表范围时按太阳黄经求解
+        return JieQiSolver.get_term_moment(year, term_index).date()
+    
+    @staticmethod
+    def get_current_term(year: int, month: int, day: int,
+                         hour: int = 0, minute: int = 0) -> Tuple[int, str]:
+        """获取当前时刻所在的节气"""
+        _, term_index = SolarTerm.get_pillar_term(year, month, day, hour, minute)
+        return term_index, JIEQI_LIST[term_index]
     
     @staticmethod
-    def get_current_term(year: int, month: int, day: int) -> Tuple[int, str]:
-        """获取当前日期所在的节气"""
-        date = datetime.date(year, month, day)
-        for i in range(24):
-            term_date = SolarTerm.get_term_date(year, i)
-            if date >= term_date:
-                if i == 23 or date < SolarTerm.get_term_date(year, i + 1):
-                    return i, JIEQI_LIST[i]
-        return 0, JIEQI_LIST[0]
+    @instrument('pillar_term')
+    def get_pillar_term(year: int, month: int, day: int,
+                        hour: int = 0, minute: int = 0) -> Tuple[int, int]:
+        """获取年柱、月柱所依据的（节气年, 节气索引）"""
+        solar_year, term_index = JieQiTable.find(year, month, day, hour, minute)
+        if term_index >= 0:
+            return solar_year, term_index
+        # 超出节气时刻表范围时按太阳黄经求解（每年只求解一次）
+        return JieQiSolver.find(year, month, day, hour, minute)
 
 class SiZhuCalculator:
     """四柱计算器"""
     
-    def __init__(self, year: int, month: int, day: int, hour: int, minute: int):
+    def __init__(self, year: int, month: int, day: int, hour: int, minute: int,
+                 pillar_term: Tuple[int, int] = None, ri_zhu: Tuple[int, int] = None,
+                 location: Location = None):
+        """pillar_term（节气年, 节气索引）和 ri_zhu（日干, 日支）已知时可直接传入，
+        逐时排盘时同一节气、同一天内复用，不再重复查找和计算
+        
+        location 为出生地经度（东经为正）或地名，指定时日柱、时柱按当地真太阳时计算
+        （此时忽略 ri_zhu）；年柱、月柱以交节时刻为界，仍按北京时间比较。
+        """
         self.year = year
         self.month = month
         self.day = day
         self.hour = hour
         self.minute = minute
+        self.location = location
+        self.true_solar_time = None
         self.true_hour = self._calculate_true_solar_time()
-        self.nian_zhu = self._calculate_nian_zhu()
-        self.yue_zhu = self._calculate_yue_zhu()
-        self.ri_zhu = self._calculate_ri_zhu()
-        self.shi_zhu = self._calculate_shi_zhu()
+        if self.true_solar_time is not None:
+            # 真太阳时可能跨日，日柱随之改变
+            ri_zhu = core.ri_zhu(self.true_solar_time.year, self.true_solar_time.month,
+                                 self.true_solar_time.day)
+        # 年柱、月柱共用一次节气查找
+        if pillar_term is None:
+            pillar_term = SolarTerm.get_pillar_term(year, month, day, hour, minute)
+        self.solar_year, self.term_index = pillar_term
+        # 四柱以枚举值计算，枚举对象只在最后查表得到
+        self.codes = self._calculate_codes(ri_zhu)
+        self.nian_zhu, self.yue_zhu, self.ri_zhu, self.shi_zhu = [
+            (TIANGAN_MEMBERS[gan], DIZHI_MEMBERS[zhi]) for gan, zhi in self.codes
+        ]
     
     def _calculate_true_solar_time(self) -> int:
-        """计算真太阳时（简化版）"""
-        # 真太阳时 = 平太阳时 + 时差
-        # 这里简单处理：北京时间减15分钟左右
-        # 但为了不影响时辰归属，我们只在边界时间进行调整
-        adjusted_minute = self.minute - 15
-        adjusted_hour = self.hour
-        
-        if adjusted_minute < 0:
-            adjusted_minute += 60
-            adjusted_hour -= 1
-        
-        if adjusted_hour < 0:
-            adjusted_hour += 24
-            
-        # 如果调整后的时间在时辰边界上，保持原时辰
-        # 例如17:00调整为16:45，仍然属于酉时
-        original_shichen = (self.hour + 1) // 2
-        if original_shichen == 0:
-            original_shichen = 12
-        adjusted_shichen = (adjusted_hour + 1) // 2
-        if adjusted_shichen == 0:
-            adjusted_shichen = 12
-            
-        # 如果时辰改变，调整回原时辰
-        if original_shichen != adjusted_shichen:
-            return self.hour
-            
-        return adjusted_hour
+        """计算真太阳时的小时"""
+        if self.location is not None:
+            # 真太阳时 = 北京时间 + 经度差 + 均时差
+            self.true_solar_time = solar_time.true_solar_time(
+                self.year, self.month, self.day, self.hour, self.minute, self.location)
+            return self.true_solar_time.hour
+        # 未指定地点时简单处理：北京时间减15分钟左右
+        # 但为了不影响时辰归属，时辰改变时保持原时
+        return core.true_solar_hour(self.hour, self.minute)
     
-    def _calculate_nian_zhu(self) -> Tuple[TianGan, DiZhi]:
-        """计算年柱"""
-        # 以立春为界判断年份
-        li_chun_date = SolarTerm.get_term_date(self.year, 0)
-        current_date = datetime.date(self.year, self.month, self.day)
-        actual_year = self.year - 1 if current_date < li_chun_date else self.year
-        
-        # 年干 = (年份 - 3) % 10
-        year_gan_value = (actual_year - 3) % 10
-        if year_gan_value == 0:
-            year_gan_value = 10
-        year_gan = TianGan(year_gan_value)
-        
-        # 年支 = (年份 - 3) % 12
-        year_zhi_value = (actual_year - 3) % 12
-        if year_zhi_value == 0:
-            year_zhi_value = 12
-        year_zhi = DiZhi(year_zhi_value)
-        
-        return year_gan, year_zhi
+    @instrument('sizhu')
+    def _calculate_codes(self, ri_zhu: Tuple[int, int] = None) -> Tuple[Tuple[int, int], ...]:
+        """计算四柱干支的枚举值"""
+        # 年柱：以立春为界
+        nian_gan, nian_zhi = core.nian_zhu(self.solar_year)
+        # 月柱：月支由节气确定，月干按五虎遁推算
+        # 甲己之年丙作首，乙庚之岁戊为头，丙辛必定寻庚起，丁壬壬位顺行流，若问戊癸何方发，甲寅之上好追求
+        yue_zhu = core.yue_zhu(nian_gan, self.term_index)
+        # 日柱：由天数对 60 取模得到
+        ri_gan, ri_zhi = ri_zhu or core.ri_zhu(self.year, self.month, self.day)
+        # 时柱：时支由真太阳时确定，时干按五鼠遁推算
+        # 甲己还加甲，乙庚丙作初，丙辛从戊起，丁壬庚子居，戊癸何方发，壬子是真途
+        shi_zhu = core.shi_zhu(ri_gan, self.true_hour)
+        return (nian_gan, nian_zhi), yue_zhu, (ri_gan, ri_zhi), shi_zhu
     
-    def _calculate_yue_zhu(self) -> Tuple[TianGan, DiZhi]:
-        """计算月柱"""
-        # 获取当前节气
-        term_index, term_name = SolarTerm.get_current_term(self.year, self.month, self.day)
-        
-        # 月支：根据节气确定
-        # 寅月(立春-惊蛰)、卯月(惊蛰-清明)...丑月(小寒-立春)
-        yue_zhi_value = (term_index // 2 + 3) % 12
-        if yue_zhi_value == 0:
-            yue_zhi_value = 12
-        yue_zhi = DiZhi(yue_zhi_value)
-        
-        # 月干：根据年干通过"五虎遁"口诀推算
-        # 甲己之年丙作首，乙庚之岁戊为头
-        # 丙辛必定寻庚起，丁壬壬位顺行流
-        # 若问戊癸何方发，甲寅之上好追求
-        nian_gan, _ = self.nian_zhu
-        
-        wuhudun_rules = {
-            TianGan.JIA: TianGan.BING,  # 甲→丙
-            TianGan.YI: TianGan.WU,     # 乙→戊
-            TianGan.BING: TianGan.GENG, # 丙→庚
-            TianGan.DING: TianGan.REN,  # 丁→壬
-            TianGan.WU: TianGan.JIA,    # 戊→甲
-            TianGan.JI: TianGan.BING,   # 己→丙
-            TianGan.GENG: TianGan.WU,   # 庚→戊
-            TianGan.XIN: TianGan.GENG,  # 辛→庚
-            TianGan.REN: TianGan.REN,   # 壬→壬
-            TianGan.GUI: TianGan.JIA    # 癸→甲
-        }
-        
-        start_gan = wuhudun_rules[nian_gan]
-        # 从寅月开始计算距离
-        yin_index = 3  # 寅的索引是3
-        distance = (yue_zhi_value - yin_index) % 12
-        yue_gan_value = (start_gan.value + distance - 1) % 10
-        if yue_gan_value == 0:
-            yue_gan_value = 10
-        # 修正：应该包括起始位置
-        yue_gan_value = (start_gan.value + distance) % 10
-        if yue_gan_value == 0:
-            yue_gan_value = 10
-        yue_gan = TianGan(yue_gan_value)
-        
-        return yue_gan, yue_zhi
+    def get_sizhu_codes(self) -> Tuple[Tuple[int, int], ...]:
+        """获取四柱干支的枚举值：((年干, 年支), (月干, 月支), (日干, 日支), (时干, 时支))"""
+        return self.codes
     
-    def _calculate_ri_zhu(self) -> Tuple[TianGan, DiZhi]:
-        """计算日柱"""
-        # 仅支持1901-2100年的日柱计算
-        year, month, day = self.year, self.month, self.day
-        
-        if not (1901 <= year <= 2100):
-            raise ValueError(f"日柱计算仅支持1901-2100年，当前年份: {year}")
-        
-        # 1. 计算当年第几天
-        # 判断是否闰年
-        is_leap = (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0)
-        
-        # 每月天数
-        days_in_month = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-        if is_leap:
-            days_in_month[1] = 29
-        
-        # 计算到指定日期的天数
-        days = 0
-        for i in range(month - 1):
-            days += days_in_month[i]
-        days += day
-        
-        # 2. 基础计算
-        year_last_two = year % 100
-        
-        if 1901 <= year <= 2000:
-            # 1901-2000年公式
-            # [(年尾二位数-1)*5 + (年尾二位数-1)/4 + 当年第几天 + 15] mod 60
-            base_calc = ((year_last_two - 1) * 5 + (year_last_two - 1) // 4 + days + 15) % 60
-        else:
-            # 2001-2100年公式
-            # [(年尾二位数-1)*5 + (年尾二位数-1)/4 + 当年第几天] mod 60
-            base_calc = ((year_last_two - 1) * 5 + (year_last_two - 1) // 4 + days) % 60
-        
-        # 3. 对应干支
-        remainder = base_calc
-        if remainder == 0:
-            remainder = 60
-        
-        # 天干：余数÷10的余数对应天干（0为癸）
-        tiangan_index = remainder % 10
-        if tiangan_index == 0:
-            tiangan_index = 10
-        
-        # 地支：余数÷12的余数对应地支（0为亥）
-        dizhi_index = remainder % 12
-        if dizhi_index == 0:
-            dizhi_index = 12
-        
-        ri_gan = TianGan(tiangan_index)
-        ri_zhi = DiZhi(dizhi_index)
-        
-        return ri_gan, ri_zhi
+    def get_sizhu(self) -> dict:
+        """获取四柱结果"""
+        (ng, nz), (yg, yz), (rg, rz), (sg, sz) = self.codes
+        return {
+            '年柱': (TIANGAN_NAMES[ng], DIZHI_NAMES[nz]),
+            '月柱': (TIANGAN_NAMES[yg], DIZHI_NAMES[yz]),
+            '日柱': (TIANGAN_NAMES[rg], DIZHI_NAMES[rz]),
+            '时柱': (TIANGAN_NAMES[sg], DIZHI_NAMES[sz])
+        }
     
-    def _calculate_shi_zhu(self) -> Tuple[TianGan, DiZhi]:
-        """计算时柱"""
-        # 时支：根据真太阳时确定
-        # 子时(23-1)、丑时(1-3)、寅时(3-5)...亥时(21-23)
-        # 修正时支计算方法
-        hour = self.true_hour
-        
-        if hour == 23 or hour == 0:
-            shi_zhi_value = 1  # 子时
-        elif 1 <= hour <= 2:
-            shi_zhi_value = 2  # 丑时
-        elif 3 <= hour <= 4:
-            shi_zhi_value = 3  # 寅时
-        elif 5 <= hour <= 6:
-            shi_zhi_value = 4  # 卯时
-        elif 7 <= hour <= 8:
-            shi_zhi_value = 5  # 辰时
-        elif 9 <= hour <= 10:
-            shi_zhi_value = 6  # 巳时
-        elif 11 <= hour <= 12:
-            shi_zhi_value = 7  # 午时
-        elif 13 <= hour <= 14:
-            shi_zhi_value = 8  # 未时
-        elif 15 <= hour <= 16:
-            shi_zhi_value = 9  # 申时
-        elif 17 <= hour <= 18:
-            shi_zhi_value = 10  # 酉时
-        elif 19 <= hour <= 20:
-            shi_zhi_value = 11  # 戌时
-        elif 21 <= hour <= 22:
-            shi_zhi_value = 12  # 亥时
+    @staticmethod
+    def batch(years, months, days, hours, minutes, locations=None) -> Dict[str, tuple]:
+        """批量计算四柱（向量化）
+        
+        参数为等长的整数数组（或可转换为数组的序列），返回与 get_sizhu 相同
+        键名的字典，每柱为 (天干数组, 地支数组)，数值与 TianGan/DiZhi 枚举值一致。
+        locations 为各记录的经度或地名数组（或单个经度、地名），指定时日柱、时柱按真太阳时计算。
+        """
+        if np is None:
+            raise ImportError("批量计算需要安装 numpy")
+        
+        years = np.asarray(years, dtype=np.int64)
+        months = np.asarray(months, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        hours = np.asarray(hours, dtype=np.int64)
+        minutes = np.asarray(minutes, dtype=np.int64)
+        
+        # 年柱、月柱：在节气时刻表中一次定位
+        actual_year, term_index = JieQiTable.find_batch(years, months, days, hours, minutes)
+        if np.any(term_index < 0):
+            bad = int(years[term_index < 0][0])
+            raise ValueError(f"批量计算仅支持节气时刻表范围内的时刻"
+                             f"（{JieQiTable.FIRST_YEAR}-{JieQiTable.LAST_YEAR}年），当前年份: {bad}")
+        nian_gan = _one_based(actual_year - 3, 10)
+        nian_zhi = _one_based(actual_year - 3, 12)
+        
+        yue_zhi = _one_based(term_index // 2 + 3, 12)
+        # 五虎遁：甲己丙、乙庚戊、丙辛庚、丁壬壬、戊癸甲
+        yue_start = (2 * (nian_gan - 1) + 2) % 10 + 1
+        yue_gan = _one_based(yue_start + (yue_zhi - 3) % 12, 10)
+        
+        if locations is None:
+            ri_gan, ri_zhi = SiZhuCalculator.batch_ri_zhu(years, months, days)
         else:
-            shi_zhi_value = 1  # 默认子时
-            
-        shi_zhi = DiZhi(shi_zhi_value)
+            day_numbers, hours, _ = solar_time.true_solar_batch(years, months, days,
+                                                                hours, minutes, locations)
+            index = (day_numbers + core.DAY_NUMBER_OFFSET) % 60
+            ri_gan, ri_zhi = index % 10 + 1, index % 12 + 1
         
-        # 时干：根据日干通过"五鼠遁"口诀推算
-        # 甲己还加甲，乙庚丙作初
-        # 丙辛从戊起，丁壬庚子居
-        # 戊癸何方发，壬子是真途
-        ri_gan, _ = self.ri_zhu
+        # 时柱：23点与0点同属子时；五鼠遁：甲己甲、乙庚丙、丙辛戊、丁壬庚、戊癸壬
+        shi_zhi = (hours + 1) // 2 % 12 + 1
+        shi_start = 2 * (ri_gan - 1) % 10 + 1
+        shi_gan = _one_based(shi_start + shi_zhi - 1, 10)
         
-        wushudun_rules = {
-            TianGan.JIA: TianGan.JIA,   # 甲→甲
-            TianGan.YI: TianGan.BING,   # 乙→丙
-            TianGan.BING: TianGan.WU,   # 丙→戊
-            TianGan.DING: TianGan.GENG, # 丁→庚
-            TianGan.WU: TianGan.REN,    # 戊→壬
-            TianGan.JI: TianGan.JIA,    # 己→甲
-            TianGan.GENG: TianGan.BING, # 庚→丙
-            TianGan.XIN: TianGan.WU,    # 辛→戊
-            TianGan.REN: TianGan.GENG,  # 壬→庚
-            TianGan.GUI: TianGan.REN    # 癸→壬
+        return {
+            '年柱': (nian_gan, nian_zhi),
+            '月柱': (yue_gan, yue_zhi),
+            '日柱': (ri_gan, ri_zhi),
+            '时柱': (shi_gan, shi_zhi)
         }
-        
-        start_gan = wushudun_rules[ri_gan]
-        shi_gan_value = (start_gan.value + shi_zhi_value - 1) % 10
-        if shi_gan_value == 0:
-            shi_gan_value = 10
-        shi_gan = TianGan(shi_gan_value)
-        
-        return shi_gan, shi_zhi
     
-    def get_sizhu(self) -> dict:
-        """获取四柱结果"""
-        return {
-            '年柱': (str(self.nian_zhu[0]), str(self.nian_zhu[1])),
-            '月柱': (str(self.yue_zhu[0]), str(self.yue_zhu[1])),
-            '日柱': (str(self.ri_zhu[0]), str(self.ri_zhu[1])),
-            '时柱': (str(self.shi_zhu[0]), str(self.shi_zhu[1]))
-        }
\ No newline at end of file
+    @staticmethod
+    def batch_ri_zhu(years, months, days) -> tuple:
+        """批量计算日柱（向量化），返回 (日干数组, 日支数组)，适用于任意前推格里历日期"""
+        if np is None:
+            raise ImportError("批量计算需要安装 numpy")
+        index = (days_from_civil_batch(years, months, days) + core.DAY_NUMBER_OFFSET) % 60
+        return index % 10 + 1, index % 12 + 1
+    
+    @staticmethod
+    def batch_datetime64(timestamps, locations=None) -> Dict[str, tuple]:
+        """批量计算四柱，输入为 numpy datetime64 数组（按北京时间解释），locations 同 batch"""
+        if np is None:
+            raise ImportError("批量计算需要安装 numpy")
+        
+        timestamps = np.asarray(timestamps, dtype='datetime64[m]')
+        years = timestamps.astype('datetime64[Y]').astype(np.int64) + 1970
+        months = timestamps.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        days = (timestamps.astype('datetime64[D]')
+                - timestamps.astype('datetime64[M]')).astype(np.int64) + 1
+        minutes_of_day = (timestamps - timestamps.astype('datetime64[D]')).astype(np.int64)
+        return SiZhuCalculator.batch(years, months, days,
+                                     minutes_of_day // 60, minutes_of_day % 60, locations)
+
+
+def _one_based(values, modulus):
+    """取模并将 0 映射为模数本身（对应枚举从 1 开始编号）"""
+    remainder = values % modulus
+    return np.where(remainder == 0, modulus, remainder)
+
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+真太阳时
+真太阳时 = 北京时间（东经120°的平太阳时）+ 经度差（每度4分钟）+ 均时差。
+均时差按年内日序预先算成表（秒），单个时刻和批量计算都只需查表；
+批量计算时各记录可有不同的出生地，相同地名只解析一次。
+"""
+
+import datetime
+import math
+from typing import Tuple, Union
+from .jieqi_table import days_from_civil, days_from_civil_batch
+
+try:
+    import numpy as np
+except ImportError:  # numpy 仅批量计算需要
+    np = None
+
+# 北京时间的标准经度和每度经度差对应的秒数
+STANDARD_LONGITUDE = 120.0
+SECONDS_PER_DEGREE = 240
+
+# 常用地名的经度（东经）
+LOCATIONS = {
+    '北京': 116.41, '天津': 117.20, '上海': 121.47, '重庆': 106.55,
+    '石家庄': 114.51, '太原': 112.55, '呼和浩特': 111.75, '沈阳': 123.43,
+    '长春': 125.32, '哈尔滨': 126.64, '南京': 118.80, '杭州': 120.16,
+    '合肥': 117.23, '福州': 119.30, '南昌': 115.86, '济南': 117.00,
+    '郑州': 113.62, '武汉': 114.31, '长沙': 112.94, '广州': 113.26,
+    '深圳': 114.06, '南宁': 108.37, '海口': 110.20, '成都': 104.07,
+    '贵阳': 106.63, '昆明': 102.71, '拉萨': 91.11, '西安': 108.94,
+    '兰州': 103.83, '西宁': 101.78, '银川': 106.23, '乌鲁木齐': 87.62,
+    '香港': 114.17, '澳门': 113.54, '台北': 121.56
+}
+
+# 地点：经度（东经为正）或 LOCATIONS 中的地名
+Location = Union[int, float, str]
+
+def _equation_of_time_table() -> Tuple[int, ...]:
+    """年内各日（日序 0-365）的均时差（秒，真太阳时 - 平太阳时），按 Spencer 级数计算"""
+    table = []
+    for doy in range(366):
+        b = 2 * math.pi * doy / 365
+        minutes = 229.18 * (0.000075 + 0.001868 * math.cos(b) - 0.032077 * math.sin(b)
+                            - 0.014615 * math.cos(2 * b) - 0.040849 * math.sin(2 * b))
+        table.append(round(minutes * 60))
+    return tuple(table)
+
+EQUATION_OF_TIME = _equation_of_time_table()
+
+# EQUATION_OF_TIME 的 numpy 数组版本（首次批量计算时创建）
+_equation_of_time_array = None
+
+def resolve_longitude(location: Location) -> float:
+    """地名或经度 → 经度"""
+    if isinstance(location, str):
+        if location not in LOCATIONS:
+            raise ValueError(f"未知地名: {location}（可直接传入经度）")
+        return LOCATIONS[location]
+    longitude = float(location)
+    if not -180 <= longitude <= 180:
+        raise ValueError(f"经度应在-180到180之间，当前: {location}")
+    return longitude
+
+def correction_seconds(year: int, month: int, day: int, longitude: float) -> int:
+    """真太阳时相对北京时间的修正量（秒）：经度差 + 均时差"""
+    day_of_year = days_from_civil(year, month, day) - days_from_civil(year, 1, 1)
+    return (round((longitude - STANDARD_LONGITUDE) * SECONDS_PER_DEGREE)
+            + EQUATION_OF_TIME[day_of_year])
+
+def true_solar_time(year: int, month: int, day: int, hour: int, minute: int,
+                    location: Location) -> datetime.datetime:
+    """北京时间在指定地点的真太阳时（可能跨日）"""
+    longitude = resolve_longitude(location)
+    return (datetime.datetime(year, month, day, hour, minute)
+            + datetime.timedelta(seconds=correction_seconds(year, month, day, longitude)))
+
+def resolve_longitudes(locations):
+    """地名或经度数组 → 经度数组（float64），相同地名只解析一次"""
+    if np is None:
+        raise ImportError("批量计算需要安装 numpy")
+    values = np.asarray(locations)
+    if values.dtype.kind not in 'UO':
+        longitudes = values.astype(np.float64)
+        # NaN 与任何数比较均为 False，与逐个计算的 resolve_longitude 一样拒绝非有限值
+        valid = (longitudes >= -180) & (longitudes <= 180)
+        if not np.all(valid):
+            bad = longitudes[~valid].flat[0]
+            raise ValueError(f"经度应在-180到180之间，当前: {bad}")
+        return longitudes
+    names, inverse = np.unique(values.astype(str), return_inverse=True)
+    resolved = []
+    for name in names:
+        try:
+            resolved.append(resolve_longitude(name if name in LOCATIONS else float(name)))
+        except (TypeError, ValueError):
+            raise ValueError(f"未知地名: {name}（可直接传入经度）") from None
+    return np.asarray(resolved, dtype=np.float64)[inverse.reshape(values.shape)]
+
+def true_solar_batch(years, months, days, hours, minutes, locations) -> Tuple:
+    """批量计算真太阳时（向量化）
+    
+    返回 (自 1970-01-01 起的天数, 时, 分) 数组；locations 为经度或地名数组，
+    也可为单个经度或地名（对全部记录生效）。
+    """
+    global _equation_of_time_array
+    if np is None:
+        raise ImportError("批量计算需要安装 numpy")
+    if _equation_of_time_array is None:
+        _equation_of_time_array = np.asarray(EQUATION_OF_TIME, dtype=np.int64)
+    
+    years = np.asarray(years, dtype=np.int64)
+    day_numbers = days_from_civil_batch(years, months, days)
+    day_of_year = day_numbers - days_from_civil_batch(years, 1, 1)
+    longitudes = resolve_longitudes(locations)
+    correction = (np.rint((longitudes - STANDARD_LONGITUDE) * SECONDS_PER_DEGREE).astype(np.int64)
+                  + _equation_of_time_array[day_of_year])
+    seconds = (np.asarray(hours, dtype=np.int64) * 3600
+               + np.asarray(minutes, dtype=np.int64) * 60 + correction)
+    day_offset, seconds = np.divmod(seconds, 86400)
+    return day_numbers + day_offset, seconds // 3600, seconds // 60 % 60
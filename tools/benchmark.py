@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+排盘性能基准
+
+离线运行，输入为固定随机种子生成的时间，覆盖排盘流程的各个步骤：
+    sizhu           SiZhuCalculator 四柱计算
+    pai_pan         QiMenCalculator.pai_pan 完整排盘
+    lunar           LunarConverter.get_lunar_date 农历转换
+    display         QiMenDunJia.display 的结果组装与 JSON 输出（输出到内存）
+    to_bytes        QiMenDunJia.to_bytes 紧凑 JSON 序列化
+    chart_cold      QiMenDunJia 完整排盘（不使用缓存）
+    chart_warm      QiMenDunJia 完整排盘（缓存已预热）
+    stream          iter_charts 逐时排盘（每项为一个时辰）
+    batch_sizhu     SiZhuCalculator.batch 批量四柱（需要 numpy，每项为一条记录）
+    threaded        bulk.chart_threaded 线程池排盘（不使用缓存，线程数为 CPU 核数）
+
+每项记录每次调用的耗时（多轮取最小值和中位数，计时时暂停垃圾回收）、每秒次数和峰值内存（tracemalloc）。
+与基线对比时看中位数：本次中位数比基线慢超过阈值、且本次最快一轮也慢于基线中位数时才判为变慢，
+几微秒的基准不会因单轮抖动误报。
+
+用法：
+    python tools/benchmark.py                            运行全部基准
+    python tools/benchmark.py sizhu lunar                只运行指定基准
+    python tools/benchmark.py --save baseline.json       保存为基线
+    python tools/benchmark.py --compare baseline.json    与基线对比，变慢超过阈值时返回 1
+    python tools/benchmark.py --scaling                  线程池排盘随线程数的扩展情况
+                                                         （在自由线程的 CPython 上运行，如 python3.13t）
+"""
+
+import argparse
+import contextlib
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from qimen_system import QiMenDunJia, iter_charts, bulk
+from qimen_system.chart_cache import ChartCache
+from qimen_system.lunar_converter import LunarConverter
+from qimen_system.qimen_calculator import QiMenCalculator
+from qimen_system.sizhu_calculator import SiZhuCalculator
+
+SEED = 20250820
+SAMPLES = 2000
+REPEAT = 9
+# 判定变慢的默认比例
+THRESHOLD = 0.2
+
+
+def make_timestamps(count: int = SAMPLES, seed: int = SEED):
+    """固定种子生成 1901-2100 年内的随机时间"""
+    rng = random.Random(seed)
+    timestamps = []
+    for _ in range(count):
+        timestamps.append((rng.randint(1901, 2100), rng.randint(1, 12), rng.randint(1, 28),
+                           rng.randint(0, 23), rng.randint(0, 59)))
+    return timestamps
+
+
+def bench_sizhu(timestamps):
+    for ts in timestamps:
+        SiZhuCalculator(*ts)
+    return len(timestamps)
+
+
+def bench_pai_pan(timestamps, calculators=None):
+    for calculator in calculators:
+        calculator.pai_pan()
+    return len(calculators)
+
+
+def bench_lunar(timestamps):
+    for year, month, day, _, _ in timestamps:
+        LunarConverter.get_lunar_date(year, month, day)
+    return len(timestamps)
+
+
+def bench_display(timestamps, charts=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        for chart in charts:
+            chart.display()
+    return len(charts)
+
+
+def bench_to_bytes(timestamps, charts=None):
+    for chart in charts:
+        chart.to_bytes()
+    return len(charts)
+
+
+def bench_chart_cold(timestamps):
+    cache = ChartCache(maxsize=0)
+    for ts in timestamps:
+        QiMenDunJia(*ts, cache=cache)
+    return len(timestamps)
+
+
+def bench_chart_warm(timestamps, cache=None):
+    for ts in timestamps:
+        QiMenDunJia(*ts, cache=cache)
+    return len(timestamps)
+
+
+def bench_stream(timestamps):
+    start = datetime.datetime(2025, 1, 1)
+    count = 0
+    for _ in iter_charts(start, start + datetime.timedelta(hours=2 * len(timestamps)),
+                         cache=ChartCache()):
+        count += 1
+    return count
+
+
+def bench_batch_sizhu(timestamps):
+    columns = list(zip(*timestamps))
+    SiZhuCalculator.batch(*columns)
+    return len(timestamps)
+
+
+def bench_threaded(timestamps, workers=None):
+    bulk.chart_threaded(timestamps, workers=workers, chunk_size=64, cache=ChartCache(maxsize=0))
+    return len(timestamps)
+
+
+def _prepare_pai_pan(timestamps):
+    return {'calculators': [QiMenCalculator(SiZhuCalculator(*ts)) for ts in timestamps]}
+
+
+def _prepare_display(timestamps):
+    return {'charts': [QiMenDunJia(*ts, cache=ChartCache(0)) for ts in timestamps[:200]]}
+
+
+def _prepare_chart_warm(timestamps):
+    cache = ChartCache(maxsize=len(timestamps))
+    for ts in timestamps:
+        QiMenDunJia(*ts, cache=cache)
+    return {'cache': cache}
+
+
+def _numpy_available():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# 名称 → (基准函数, 准备函数, 是否可运行)
+BENCHMARKS = {
+    'sizhu': (bench_sizhu, None, None),
+    'pai_pan': (bench_pai_pan, _prepare_pai_pan, None),
+    'lunar': (bench_lunar, None, None),
+    'display': (bench_display, _prepare_display, None),
+    'to_bytes': (bench_to_bytes, _prepare_display, None),
+    'chart_cold': (bench_chart_cold, None, None),
+    'chart_warm': (bench_chart_warm, _prepare_chart_warm, None),
+    'stream': (bench_stream, None, None),
+    'batch_sizhu': (bench_batch_sizhu, None, _numpy_available),
+    'threaded': (bench_threaded, None, None),
+}
+
+
+def run_benchmark(name: str, timestamps, repeat: int = REPEAT):
+    """运行一项基准，返回每次调用的耗时统计（微秒）和峰值内存（KB）"""
+    func, prepare, available = BENCHMARKS[name]
+    if available is not None and not available():
+        return None
+
+    durations = []
+    count = 0
+    for _ in range(repeat):
+        # 每轮重新准备（pai_pan 会修改计算器状态，display 需要新排盘）
+        kwargs = prepare(timestamps) if prepare else {}
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            count = func(timestamps, **kwargs)
+            durations.append((time.perf_counter() - start) / count)
+        finally:
+            gc.enable()
+
+    # 峰值内存单独测一轮，避免 tracemalloc 影响计时
+    kwargs = prepare(timestamps) if prepare else {}
+    tracemalloc.start()
+    func(timestamps, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(durations)
+    return {
+        'calls': count,
+        'best_us': round(best * 1e6, 3),
+        'median_us': round(statistics.median(durations) * 1e6, 3),
+        'per_second': round(1 / best),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, threshold: float):
+    """与基线对比中位数，返回变慢超过阈值的基准名
+    
+    本次最快一轮仍慢于基线中位数时才计入，排除个别轮次受干扰造成的误报。
+    """
+    regressions = []
+    print(f"\n{'基准':<14}{'基线中位(us)':>14}{'本次中位(us)':>14}{'变化':>10}")
+    for name, result in results.items():
+        old = baseline.get('results', {}).get(name)
+        if not result or not old:
+            continue
+        change = result['median_us'] / old['median_us'] - 1
+        mark = ''
+        if change > threshold and result['best_us'] > old['median_us']:
+            regressions.append(name)
+            mark = '  ← 变慢'
+        print(f"{name:<14}{old['median_us']:>14.2f}{result['median_us']:>14.2f}{change:>+10.1%}{mark}")
+    return regressions
+
+
+def gil_enabled() -> bool:
+    """当前解释器是否启用 GIL（3.13 以前总是启用）"""
+    check = getattr(sys, '_is_gil_enabled', None)
+    return True if check is None else check()
+
+
+def scaling(timestamps, repeat: int = REPEAT):
+    """线程池排盘在 1、2、4……个线程（至 CPU 核数）下的耗时和相对单线程的加速比"""
+    cpus = os.cpu_count() or 1
+    counts = sorted({min(2 ** i, cpus) for i in range(cpus.bit_length() + 1)})
+    print(f"Python {platform.python_version()}，GIL {'启用' if gil_enabled() else '未启用'}，CPU {cpus} 核")
+    print(f"{'线程数':<8}{'最小(us)':>12}{'加速比':>10}")
+    single = None
+    for workers in counts:
+        best = min(_timed(bench_threaded, timestamps, workers) for _ in range(repeat))
+        single = single or best
+        print(f"{workers:<8}{best * 1e6:>12.2f}{single / best:>10.2f}")
+
+
+def _timed(func, timestamps, *args):
+    start = time.perf_counter()
+    count = func(timestamps, *args)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='排盘性能基准')
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help=f"只运行指定基准：{', '.join(BENCHMARKS)}")
+    parser.add_argument('-n', '--samples', type=int, default=SAMPLES, help=f"每轮的时间数，默认 {SAMPLES}")
+    parser.add_argument('-r', '--repeat', type=int, default=REPEAT, help=f"轮数，默认 {REPEAT}")
+    parser.add_argument('--save', metavar='FILE', help="保存结果为基线文件")
+    parser.add_argument('--compare', metavar='FILE', help="与基线文件对比")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f"判定变慢的比例（比较中位数），默认 {THRESHOLD}")
+    parser.add_argument('--scaling', action='store_true', help="只测线程池排盘随线程数的扩展情况")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知基准: {', '.join(unknown)}")
+
+    timestamps = make_timestamps(args.samples)
+    if args.scaling:
+        scaling(timestamps, args.repeat)
+        return
+    results = {}
+    print(f"{'基准':<14}{'最小(us)':>12}{'中位(us)':>12}{'次/秒':>12}{'峰值内存(KB)':>16}")
+    for name in args.names or BENCHMARKS:
+        result = run_benchmark(name, timestamps, args.repeat)
+        results[name] = result
+        if result is None:
+            print(f"{name:<14}{'跳过（缺少依赖）':>12}")
+            continue
+        print(f"{name:<14}{result['best_us']:>12.2f}{result['median_us']:>12.2f}"
+              f"{result['per_second']:>12}{result['peak_kb']:>16.1f}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'samples': args.samples,
+                'seed': SEED,
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n已保存基线: {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('samples') != args.samples:
+            print(f"注意：基线的时间数为 {baseline.get('samples')}，本次为 {args.samples}")
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+生成盘面目录 qimen_system/data/board_catalog.bin
+
+排出全部 2 × 9 × 60 × 12 种缓存键的盘面，互不相同的盘面各给一个编号（uint16）。
+已有目录文件时沿用其中全部盘面的编号，新出现的盘面追加在末尾，
+排盘算法改变后重新生成也不会使下游已保存的编号指向别的盘面。
+
+本脚本在排盘算法改变后运行：
+    python tools/build_board_catalog.py
+    python tools/build_board_catalog.py --check    # 仅检查目录是否与当前算法一致
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from qimen_system.board_catalog import BoardCatalog, build_catalog, encode_catalog, write_catalog, DATA_FILE
+
+
+def load_previous(path: str) -> list:
+    """已有目录中按编号排列的盘面，没有目录文件时为空"""
+    if not os.path.exists(path):
+        return []
+    with BoardCatalog(path) as catalog:
+        return [catalog.board(board_id).data for board_id in range(len(catalog))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成盘面目录')
+    parser.add_argument('--check', action='store_true', help='只检查，不一致时返回非零')
+    args = parser.parse_args()
+
+    previous = load_previous(DATA_FILE)
+    slot_ids, boards = build_catalog(previous)
+    added = len(boards) - len(previous)
+    if args.check:
+        current = False
+        if os.path.exists(DATA_FILE):
+            with open(DATA_FILE, 'rb') as f:
+                current = f.read() == encode_catalog(slot_ids, boards)
+        print("盘面目录与当前排盘算法一致" if current else "盘面目录已过期，请重新生成")
+        sys.exit(0 if current else 1)
+
+    write_catalog(DATA_FILE, slot_ids, boards)
+    print(f"已写入 {len(boards)} 个盘面（新增 {added} 个）: {os.path.normpath(DATA_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+生成节气时刻表 qimen_system/data/jieqi_1900_2101.bin
+
+按时间顺序存放 1900-2101 年每年的 24 个节气交节时刻（小寒、大寒、立春……冬至），
+数值为自 1900-01-01 00:00（北京时间）起的分钟数，向上取整，小端 int32。
+
+本脚本仅在重新生成数据时使用，依赖 pymeeus（完整 VSOP87 行星理论）：
+    pip install pymeeus
+    python tools/build_jieqi_table.py
+"""
+
+import math
+import os
+import sys
+from array import array
+
+from pymeeus.Epoch import Epoch
+from pymeeus.Sun import Sun
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from qimen_system.jieqi_solver import delta_t, EPOCH_JD, TERM_LONGITUDES
+
+FIRST_YEAR = 1900
+LAST_YEAR = 2101
+
+OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      '..', 'qimen_system', 'data', 'jieqi_1900_2101.bin')
+
+
+def apparent_longitude(jde: float) -> float:
+    """太阳视黄经（度）"""
+    longitude, _, _ = Sun.apparent_geocentric_position(Epoch(jde))
+    return float(longitude)
+
+
+def solve_term(year: int, longitude: float) -> float:
+    """求太阳视黄经到达指定值的时刻，返回儒略日（世界时）"""
+    # 初值：按平均速度从当年春分附近推算
+    jde = Epoch(year, 3, 21).jde() + ((longitude - 0) % 360) / 360 * 365.2422
+    if longitude >= 285:
+        jde -= 365.2422
+    for _ in range(20):
+        diff = (longitude - apparent_longitude(jde) + 180) % 360 - 180
+        jde += diff / 360 * 365.2422
+        if abs(diff) < 1e-7:
+            break
+    return jde - delta_t(year + 0.5) / 86400
+
+
+def main():
+    table = array('i')
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        for longitude in TERM_LONGITUDES:
+            jd = solve_term(year, longitude)
+            table.append(math.ceil(round((jd - EPOCH_JD) * 1440, 6)))
+    if sys.byteorder != 'little':
+        table.byteswap()
+    with open(OUTPUT, 'wb') as f:
+        table.tofile(f)
+    print(f"已写入 {len(table)} 个节气时刻: {os.path.normpath(OUTPUT)}")
+
+
+if __name__ == "__main__":
+    main()
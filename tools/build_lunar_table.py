@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+生成农历表 qimen_system/data/lunar_1900_2100.bin
+
+每个农历年一条 8 字节记录（小端）：
+    int32   正月初一距 1900-01-01 的天数
+    uint16  各月大小，第 k 位为 1 表示当年第 k 个月（闰月按实际顺序排入）为 30 天
+    uint8   闰月月份，0 表示无闰月
+    uint8   保留
+
+数据取自 zhdate 的农历年代码表，本脚本仅在重新生成数据时使用：
+    pip install zhdate
+    python tools/build_lunar_table.py
+"""
+
+import datetime
+import os
+import struct
+
+from zhdate import CHINESEYEARCODE, CHINESENEWYEAR, ZhDate
+
+FIRST_YEAR = 1900
+LAST_YEAR = 2100
+
+RECORD = struct.Struct('<iHBB')
+
+OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                      '..', 'qimen_system', 'data', 'lunar_1900_2100.bin')
+
+
+def main():
+    epoch = datetime.date(1900, 1, 1)
+    with open(OUTPUT, 'wb') as f:
+        for year in range(FIRST_YEAR, LAST_YEAR + 1):
+            year_code = CHINESEYEARCODE[year - FIRST_YEAR]
+            new_year = datetime.datetime.strptime(CHINESENEWYEAR[year - FIRST_YEAR], '%Y%m%d').date()
+            month_sizes = 0
+            for k, days in enumerate(ZhDate.decode(year_code)):
+                if days == 30:
+                    month_sizes |= 1 << k
+            f.write(RECORD.pack((new_year - epoch).days, month_sizes, year_code & 0xf, 0))
+    print(f"已写入 {LAST_YEAR - FIRST_YEAR + 1} 个农历年: {os.path.normpath(OUTPUT)}")
+
+
+if __name__ == "__main__":
+    main()